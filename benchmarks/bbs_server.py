@@ -0,0 +1,301 @@
+"""A local stand-in for a MajorBBS teleconference, for end-to-end load tests.
+
+Usage:
+    python benchmarks/bbs_server.py [--port 2323] [--users 20] [--rate 200]
+                                    [--messages N] [--duration S] [--art 0.1]
+
+Every connection gets the logon prompts, a "You are in ... are here with you."
+room banner listing --users members, an action listing and then a flood of
+teleconference traffic at --rate messages per second (0 = as fast as the
+socket takes it): public "From X:" lines, "(to Y)", "(whispered)" and
+"(to you)" messages, ANSI colour, URLs, blocks of ANSI art and members
+joining and leaving, which re-sends the banner.  The flood stops after
+--messages messages or --duration seconds, then the server logs the client
+off.  Traffic is generated from --seed, so the first connection of every run gets
+the same bytes.
+
+Point the client at it with:
+    python main.py --headless 127.0.0.1 2323 --username bench --password bench --quiet
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import telnetlib3
+
+WORDS = ("the quick brown fox jumps over lazy dog bbs door game ansi art modem "
+         "baud sysop teleconference download upload message board callers").split()
+NAMES = ("Noah Ultron Sysop Zed Maggie Kirk Trinity Neo Morpheus Dade Kate Cereal "
+         "Phreak Joey Razor Blade Gibson Plague Lord Nikon Acid Burn Crash Override").split()
+DOMAINS = ("example.com", "bbs.example.org", "files.example.net")
+ACTIONS = ("smile dance bow wave hug laugh grin nod shrug wink cheer clap sigh "
+           "yawn poke tickle highfive bonk").split()
+COLOURS = ("1;32", "1;33", "1;36", "0;37", "1;35", "0;36")
+TICK = 0.01  # seconds between flood bursts
+LINE_WIDTH = 79
+
+
+class TeleconferenceTraffic:
+    """Generate lines in the formats the client scrapes, from a seeded RNG."""
+
+    def __init__(self, users=20, art_ratio=0.1, url_ratio=0.1, directed_ratio=0.1,
+                 churn_ratio=0.01, colour=True, seed=1, you="bench"):
+        self.rng = random.Random(seed)
+        self.art_ratio = art_ratio
+        self.url_ratio = url_ratio
+        self.directed_ratio = directed_ratio
+        self.churn_ratio = churn_ratio
+        self.colour = colour
+        self.you = you
+        self.members = [self.user_name(i) for i in range(users)]
+        self.sequence = 0
+
+    def user_name(self, index):
+        name = NAMES[index % len(NAMES)]
+        if index >= len(NAMES):
+            name += str(index // len(NAMES))
+        if index % 7 == 3:
+            name += "@" + DOMAINS[index % len(DOMAINS)]
+        return name
+
+    def sgr(self, params):
+        return f"\x1b[{params}m" if self.colour else ""
+
+    def text(self, low=3, high=14):
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high)))
+
+    def banner(self, room="General"):
+        """The room banner, with the member list wrapped like the BBS does."""
+        names = [name for name in self.members if name != self.you]
+        if len(names) > 1:
+            listing = ", ".join(names[:-1]) + ", and " + names[-1]
+        else:
+            listing = names[0] if names else "nobody"
+        wrapped = []
+        line = ""
+        for word in f"{listing} are here with you.".split(" "):
+            if line and len(line) + 1 + len(word) > LINE_WIDTH:
+                wrapped.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        wrapped.append(line)
+        return ([f"{self.sgr('1;37')}You are in the {room} chat channel.{self.sgr('0')}",
+                 f"Topic: ({room} Chat)."]
+                + wrapped
+                + ['Just press "?" if you need any assistance.'])
+
+    def action_listing(self, room="General"):
+        lines = [f"Action listing for: {room}"]
+        for i in range(0, len(ACTIONS), 8):
+            lines.append("  " + "  ".join(ACTIONS[i:i + 8]))
+        lines.append(":")
+        return lines
+
+    def art(self, rows=8, cols=40):
+        """A block of ANSI art: a colour change every cell."""
+        lines = []
+        for _ in range(rows):
+            cells = [f"\x1b[{self.rng.randint(30, 37)};{self.rng.randint(40, 47)}m█▓"
+                     for _ in range(cols)]
+            lines.append("".join(cells) + "\x1b[0m")
+        return lines
+
+    def churn(self):
+        """A member joins or leaves; the BBS announces it and re-sends the banner."""
+        if self.rng.random() < 0.5 and len(self.members) > 2:
+            name = self.rng.choice(self.members)
+            self.members.remove(name)
+            notice = f"{name} just left the channel."
+        else:
+            name = self.user_name(len(self.members) + self.sequence)
+            self.members.append(name)
+            notice = f"{name} just joined the channel."
+        return [notice] + self.banner()
+
+    def message(self):
+        """One teleconference message in one of the formats the client classifies."""
+        self.sequence += 1
+        sender = self.rng.choice(self.members)
+        text = self.text()
+        if self.rng.random() < self.url_ratio:
+            text += f" https://{self.rng.choice(DOMAINS)}/{self.sequence}"
+        roll = self.rng.random()
+        if roll < self.directed_ratio / 2:
+            line = f"From {sender} (whispered): {text}"
+        elif roll < self.directed_ratio:
+            line = f"From {sender} (to you): {text}"
+        elif roll < self.directed_ratio + 0.1:
+            line = f"From {sender} (to {self.rng.choice(self.members)}): {text}"
+        elif roll < self.directed_ratio + 0.15:
+            line = f"From {sender} (whispered to {self.rng.choice(self.members)}): {text}"
+        else:
+            line = f"From {sender}: {text}"
+        colour = self.rng.choice(COLOURS)
+        return f"{self.sgr(colour)}{line}{self.sgr('0')}"
+
+    def burst(self, count):
+        """count messages, with art blocks and member churn mixed in."""
+        lines = []
+        for _ in range(count):
+            roll = self.rng.random()
+            if roll < self.art_ratio:
+                lines.extend(self.art())
+            elif roll < self.art_ratio + self.churn_ratio:
+                lines.extend(self.churn())
+            lines.append(self.message())
+        return lines
+
+    def lines(self, count):
+        """A whole session's worth of traffic as a list of lines."""
+        return self.banner() + self.action_listing() + self.burst(count)
+
+
+async def read_line(reader, timeout=30.0):
+    """Read one line of input, echoing nothing; returns "" on EOF."""
+    chars = []
+    while True:
+        char = await asyncio.wait_for(reader.read(1), timeout)
+        if not char:
+            return "".join(chars)
+        if char in "\r\n":
+            if chars:
+                return "".join(chars)
+            continue
+        chars.append(char)
+
+
+def write_lines(writer, lines):
+    writer.write("\r\n".join(lines) + "\r\n")
+
+
+async def consume_input(reader, writer, traffic, stopped):
+    """Echo chat the client sends and log it off on =x or quit."""
+    while not stopped.is_set():
+        try:
+            line = await read_line(reader, timeout=None)
+        except (asyncio.CancelledError, ConnectionError):
+            break
+        if not line:
+            break
+        command = line.strip().lower()
+        if command in ("=x", "quit", "x"):
+            break
+        if command == "?":
+            write_lines(writer, traffic.action_listing())
+        else:
+            write_lines(writer, [f"From {traffic.you}: {line.strip()}"])
+    stopped.set()
+
+
+async def flood(writer, traffic, rate, messages, duration, stopped):
+    """Send messages at rate per second until the message count or duration is reached."""
+    sent = 0
+    start = time.monotonic()
+    while not stopped.is_set():
+        elapsed = time.monotonic() - start
+        if duration and elapsed >= duration:
+            break
+        if rate > 0:
+            due = int(elapsed * rate) - sent
+            if due <= 0:
+                await asyncio.sleep(TICK)
+                continue
+        else:
+            due = 100
+        if messages:
+            due = min(due, messages - sent)
+        write_lines(writer, traffic.burst(due))
+        await writer.drain()
+        sent += due
+        if messages and sent >= messages:
+            break
+    return sent, time.monotonic() - start
+
+
+async def wait_sent(writer):
+    """Wait until the transport has handed everything written to the socket."""
+    transport = writer.transport
+    while transport is not None and not transport.is_closing() and transport.get_write_buffer_size():
+        await asyncio.sleep(TICK)
+
+
+def make_shell(args):
+    connections = 0
+
+    async def shell(reader, writer):
+        nonlocal connections
+        connections += 1
+        traffic = TeleconferenceTraffic(users=args.users, art_ratio=args.art, url_ratio=args.urls,
+                                        directed_ratio=args.directed, churn_ratio=args.churn,
+                                        colour=not args.no_colour, seed=args.seed + connections - 1)
+        peer = writer.get_extra_info("peername")
+        try:
+            if not args.no_logon:
+                # The client answers prompts per complete line, so each ends the line
+                writer.write("If you already have a User-ID on this system, type it in and press ENTER.\r\n"
+                             'Otherwise type "new":\r\n')
+                traffic.you = (await read_line(reader)).strip() or traffic.you
+                writer.write("Enter your password:\r\n")
+                await read_line(reader)
+            write_lines(writer, traffic.banner())
+            write_lines(writer, traffic.action_listing())
+            await writer.drain()
+
+            stopped = asyncio.Event()
+            reader_task = asyncio.ensure_future(consume_input(reader, writer, traffic, stopped))
+            sent, elapsed = await flood(writer, traffic, args.rate, args.messages, args.duration, stopped)
+            await wait_sent(writer)
+            print(f"{peer}: sent {sent} messages in {elapsed:.1f}s ({sent / max(elapsed, 1e-9):,.0f}/s)")
+            if not stopped.is_set() and args.linger:
+                # Let the client finish parsing before it is logged off
+                try:
+                    await asyncio.wait_for(stopped.wait(), args.linger)
+                except asyncio.TimeoutError:
+                    pass
+            stopped.set()
+            reader_task.cancel()
+            writer.write("\r\nGoodbye!\r\n")
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    return shell
+
+
+async def serve(args):
+    server = await telnetlib3.create_server(host=args.host, port=args.port, shell=make_shell(args),
+                                           encoding="cp437", connect_maxwait=0.5)
+    print(f"Stand-in BBS listening on {args.host}:{args.port}")
+    await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--users", type=int, default=20, help="members in the room banner")
+    parser.add_argument("--rate", type=float, default=200.0,
+                        help="messages per second; 0 sends as fast as the client reads")
+    parser.add_argument("--messages", type=int, default=0, help="stop after this many messages (0 = no limit)")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many seconds (0 = no limit)")
+    parser.add_argument("--linger", type=float, default=2.0, help="seconds to wait before logging the client off")
+    parser.add_argument("--art", type=float, default=0.05, help="chance of an ANSI art block before a message")
+    parser.add_argument("--urls", type=float, default=0.1, help="chance of a URL in a message")
+    parser.add_argument("--directed", type=float, default=0.1, help="share of whispered / to-you messages")
+    parser.add_argument("--churn", type=float, default=0.01, help="chance of a member joining or leaving")
+    parser.add_argument("--no-colour", action="store_true", help="send plain text without SGR codes")
+    parser.add_argument("--no-logon", action="store_true", help="skip the User-ID and password prompts")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark the streaming AnsiParser against the old per-line regex path.
+
+Usage:
+    python benchmarks/bench_ansi_parser.py [--input capture.txt] [--lines N]
+
+Without --input a synthetic mix of BBS chat lines and colour-heavy ANSI art
+is generated.  --input takes raw BBS output (decoded as CP437, like the telnet
+client does) so recorded traffic can be replayed through both parsers.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import AnsiParser  # noqa: E402
+
+CHUNK_SIZE = 4096
+
+
+def synthetic_traffic(line_count, art_ratio=0.4, seed=1):
+    """Return a string resembling a busy teleconference with ANSI art mixed in."""
+    rng = random.Random(seed)
+    names = ["Noah", "Ultron", "Sysop", "Zed", "Maggie", "Kirk"]
+    words = "the quick brown fox jumps over lazy dog bbs door game ansi art".split()
+    lines = []
+    for i in range(line_count):
+        kind = rng.random()
+        name = rng.choice(names)
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        if kind < (1 - art_ratio) * 0.8:
+            lines.append(f"\x1b[1;32mFrom {name}:\x1b[0m {text}")
+        elif kind < 1 - art_ratio:
+            lines.append(f"\x1b[33mFrom {name} (whispered): {text} https://example.com/{i}\x1b[0m")
+        else:
+            # A line of ANSI art: a colour change every few characters
+            cells = []
+            for _ in range(40):
+                cells.append(f"\x1b[{rng.randint(30, 37)};{rng.randint(40, 47)}m█▓")
+            lines.append("".join(cells) + "\x1b[0m")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def chunks(data, size=CHUNK_SIZE):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+LEGACY_ANSI_REGEX = re.compile(r'\x1b\[(.*?)m')
+LEGACY_STRIP_REGEX = re.compile(r'\x1b\[[0-9;]*m')
+LEGACY_CODES = {
+    '30': 'black', '31': 'red', '32': 'green', '33': 'yellow', '34': 'blue',
+    '35': 'magenta', '36': 'cyan', '37': 'white', '90': 'bright_black',
+    '91': 'bright_red', '92': 'bright_green', '93': 'bright_yellow',
+    '94': 'bright_blue', '95': 'bright_magenta', '96': 'bright_cyan',
+    '97': 'bright_white',
+}
+
+
+def legacy_parse(chunk_list):
+    """The pre-AnsiParser path: normalise newlines, split, regex each line."""
+    partial = ""
+    line_count = 0
+    for data in chunk_list:
+        data = data.replace('\r\n', '\n').replace('\r', '\n')
+        partial += data
+        lines = partial.split("\n")
+        for line in lines[:-1]:
+            LEGACY_STRIP_REGEX.sub('', line).strip()
+            runs = []
+            last_end = 0
+            current_tag = "normal"
+            for match in LEGACY_ANSI_REGEX.finditer(line):
+                start, end = match.span()
+                if start > last_end:
+                    runs.append((line[last_end:start], current_tag))
+                codes = match.group(1).split(';')
+                if '0' in codes:
+                    current_tag = "normal"
+                    codes.remove('0')
+                for code in codes:
+                    current_tag = LEGACY_CODES.get(code, current_tag)
+                last_end = end
+            if last_end < len(line):
+                runs.append((line[last_end:], current_tag))
+            line_count += 1
+        partial = lines[-1]
+    return line_count
+
+
+def streaming_parse(chunk_list):
+    parser = AnsiParser()
+    line_count = 0
+    for data in chunk_list:
+        for parsed in parser.feed(data):
+            parsed.text.strip()
+            line_count += 1
+    return line_count
+
+
+def run(name, func, chunk_list, repeat):
+    best = None
+    lines = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines = func(chunk_list)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<10} {lines:>8} lines  {best * 1000:9.1f} ms  "
+          f"{lines / best:12,.0f} lines/s  {best / lines * 1e6:7.2f} us/line")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="raw BBS capture to replay (CP437)")
+    parser.add_argument("--lines", type=int, default=20000, help="synthetic line count")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as file:
+            workloads = [(args.input, file.read().decode("cp437"))]
+    else:
+        workloads = [
+            ("chat", synthetic_traffic(args.lines, art_ratio=0.0)),
+            ("mixed", synthetic_traffic(args.lines, art_ratio=0.4)),
+            ("art", synthetic_traffic(args.lines, art_ratio=1.0)),
+        ]
+
+    for name, data in workloads:
+        chunk_list = chunks(data)
+        print(f"\n[{name}] {len(data):,} chars in {len(chunk_list)} chunks of {CHUNK_SIZE}")
+        legacy = run("legacy", legacy_parse, chunk_list, args.repeat)
+        streaming = run("streaming", streaming_parse, chunk_list, args.repeat)
+        print(f"streaming/legacy time ratio: {streaming / legacy:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark classify_line against the old per-line regex cascade.
+
+Usage:
+    python benchmarks/bench_line_classifier.py [--input capture.txt] [--lines N]
+
+Lines are taken from the AnsiParser output, so only the per-line dispatch
+(banner filters, directed/chat matching, chatlog parsing, URL extraction and
+the trigger lowercase) is timed.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import AnsiParser, classify_line  # noqa: E402
+from bench_ansi_parser import chunks, synthetic_traffic  # noqa: E402
+
+TRIGGERS = ["hello bot", "!help", "ping", "lazy dog bbs"]
+
+LEGACY_SKIP_PATTERNS = [
+    r"You are in",
+    r"Topic:",
+    r"Just press",
+    r"are here with you",
+    r"^\s*$",
+    r"^\s*:.*$",
+    r"^\s*\(.*\)\s*$",
+]
+LEGACY_MESSAGE_PATTERNS = [
+    r'^From\s+(\S+?)(?:@[\w.]+)?\s*\(whispered(?:\s+to\s+\S+)?\):\s*(.+)$',
+    r'^From\s+(\S+?)(?:@[\w.]+)?(?:\s+\([^)]+\))?\s*:\s*(.+)$',
+    r'^From\s+(\S+?)(?:@[\w.]+)?\s*\(to\s+[^)]+\):\s*(.+)$',
+]
+
+
+def legacy_urls(message):
+    urls = []
+    for url in re.findall(r'(https?://[^\s<>"\']+|www\.[^\s<>"\']+)', message):
+        url = re.sub(r'[.,;:]+$', '', url)
+        if url.startswith('www.'):
+            url = 'http://' + url
+        urls.append(url)
+    return urls
+
+
+def legacy_classify(lines):
+    """The pre-classifier path: every check re-scans the line with its own regex."""
+    hits = 0
+    for line in lines:
+        clean_line = line.strip()
+        if clean_line.startswith("You are in"):
+            continue
+        if any(pattern in clean_line for pattern in ["Topic:", "Just press", "are here with you"]):
+            continue
+        directed = re.match(r'^From\s+(\S+)\s+\((whispered|to you)\):\s*(.+)$', clean_line, re.IGNORECASE)
+        if directed:
+            legacy_urls(directed.group(3))
+            hits += 1
+            continue
+        if clean_line.startswith("Action listing for:") or not clean_line:
+            continue
+        for trigger in TRIGGERS:
+            trigger.lower() in line.lower()
+        if any(re.search(pattern, line, re.IGNORECASE) for pattern in LEGACY_SKIP_PATTERNS):
+            continue
+        for pattern in LEGACY_MESSAGE_PATTERNS:
+            if re.match(pattern, line, re.IGNORECASE):
+                legacy_urls(line)
+                hits += 1
+                break
+        re.match(r'^From\s+\S+', clean_line, re.IGNORECASE)
+    return hits
+
+
+def single_pass_classify(lines):
+    hits = 0
+    triggers = [trigger.lower() for trigger in TRIGGERS]
+    for line in lines:
+        event = classify_line(line)
+        if event.message is not None:
+            hits += 1
+        if event.kind == "text" or event.kind == "chat":
+            for trigger in triggers:
+                trigger in event.lower
+    return hits
+
+
+def run(name, func, lines, repeat):
+    best = None
+    hits = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = func(lines)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<12} {hits:>8} messages  {best * 1000:9.1f} ms  "
+          f"{best / len(lines) * 1e6:7.2f} us/line")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="raw BBS capture to replay (CP437)")
+    parser.add_argument("--lines", type=int, default=20000, help="synthetic line count")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as file:
+            data = file.read().decode("cp437")
+    else:
+        data = synthetic_traffic(args.lines, art_ratio=0.2)
+
+    ansi = AnsiParser()
+    lines = [parsed.text for chunk in chunks(data) for parsed in ansi.feed(chunk)]
+    print(f"{len(lines):,} lines")
+    legacy = run("legacy", legacy_classify, lines, args.repeat)
+    single = run("single-pass", single_pass_classify, lines, args.repeat)
+    print(f"single-pass/legacy time ratio: {single / legacy:.2f}")
+
+
+if __name__ == "__main__":
+    main()
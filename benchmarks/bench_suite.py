@@ -0,0 +1,390 @@
+"""End-to-end benchmark suite for the client's hot paths, with regression thresholds.
+
+Usage:
+    python benchmarks/bench_suite.py [--recording FILE] [--messages N]
+                                     [--output results.json]
+                                     [--baseline old.json] [--threshold 10]
+
+Each benchmark runs in its own process, so peak RSS is measured per
+benchmark.  The input is synthetic teleconference traffic from
+bbs_server.TeleconferenceTraffic (seeded, so every run is identical) or
+a session recording made with the client's Record option / --record.
+
+    session_feed        BBSSession.feed: ANSI parsing, classification, banners,
+                        triggers and chatlog writes, one line per call
+    terminal_render     AnsiTagPool + insert_with_hyperlinks + TextBatch into a
+                        Tk Text widget, flushed every RENDER_FRAME_LINES lines
+                        (skipped without a display)
+    chatlog_append      BBSSession.save_chatlog_message
+    store_hyperlinks    BBSSession.store_hyperlinks, for messages with URLs
+    update_members      BBSSession.update_chat_members, one room banner per call
+    chatlog_page        the Chatlog viewer's queries: a newest page for one user,
+                        for everyone and a merged page for three users
+
+Each benchmark is run --repeat times and the fastest run is kept.  For
+every benchmark the suite reports items/sec (lines, messages, banners or
+pages), p50/p99 latency per item and peak RSS.  Results are written as JSON;
+with --baseline, any benchmark whose items/sec dropped by more than
+--threshold percent, or that the baseline measured and this run could not,
+is reported and the exit status is 1.  A benchmark that fails is an exit
+status of 1 with or without a baseline.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: peak RSS is not reported
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+RENDER_FRAME_LINES = 50   # lines per TextBatch flush, about one drain's worth
+DEFAULT_THRESHOLD = 10.0  # percent drop in items/sec that counts as a regression
+
+BENCHMARKS = {}
+
+
+class Skipped(Exception):
+    """The benchmark cannot run here (no display, nothing in the input to measure)."""
+
+
+def benchmark(name):
+    """Register func(workload, args) -> list of per-item latencies in seconds."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+class Workload:
+    """Raw received text split into lines, plus what the parser makes of it."""
+
+    def __init__(self, args):
+        from main import AnsiParser, classify_line, read_recording, LINE_CHAT, LINE_DIRECTED
+
+        if args.recording:
+            data = "".join(chunk for offset, chunk in read_recording(args.recording))
+            self.name = os.path.basename(args.recording)
+        else:
+            from bbs_server import TeleconferenceTraffic
+            traffic = TeleconferenceTraffic(users=args.users, seed=args.seed)
+            data = "\r\n".join(traffic.lines(args.messages)) + "\r\n"
+            self.name = f"synthetic:{args.messages}"
+
+        # Raw lines keep their escapes and CR LF, so feeding them one at a
+        # time gives the parser exactly what it would have seen
+        self.raw_lines = [line + "\n" for line in data.split("\n")[:-1]]
+        parser = AnsiParser()
+        self.parsed = parser.feed(data)
+        self.attrs = parser.attrs
+        self.events = [classify_line(parsed.text) for parsed in self.parsed]
+        self.messages = [event for event in self.events if event.kind in (LINE_CHAT, LINE_DIRECTED)]
+        self.banners = []
+        banner = None
+        for parsed in self.parsed:
+            if parsed.text.startswith("You are in"):
+                banner = [parsed.text]
+            elif banner is not None:
+                banner.append(parsed.text)
+                if "are here with you." in parsed.text:
+                    self.banners.append(banner)
+                    banner = None
+
+
+def make_session():
+    from main import BBSSession, ChatlogStore, NetworkService
+    # The loop is never started; nothing is connected, so nothing is sent
+    return BBSSession(NetworkService(), ChatlogStore())
+
+
+@benchmark("session_feed")
+def bench_session_feed(workload, args):
+    session = make_session()
+    feed = session.feed
+    latencies = []
+    for line in workload.raw_lines:
+        start = time.perf_counter()
+        feed(line)
+        latencies.append(time.perf_counter() - start)
+    session.chatlog_store.close()
+    return latencies
+
+
+@benchmark("terminal_render")
+def bench_terminal_render(workload, args):
+    import tkinter as tk
+    from main import AnsiTagPool, BBSTerminalApp, TextBatch
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise Skipped(f"no display ({e})")
+    root.withdraw()
+    widget = tk.Text(root)
+    widget.tag_configure("normal", foreground="white")
+    widget.tag_configure("hyperlink", foreground="blue", underline=True)
+    tags = AnsiTagPool(widget)
+    batch = TextBatch(widget, tag_pool=tags)
+    # insert_with_hyperlinks only needs the batch from the app
+    app = type("RenderTarget", (), {"terminal_batch": batch})()
+    attrs = workload.attrs
+
+    latencies = []
+    parsed = workload.parsed
+    for first in range(0, len(parsed), RENDER_FRAME_LINES):
+        frame = parsed[first:first + RENDER_FRAME_LINES]
+        start = time.perf_counter()
+        for line in frame:
+            for text, attr_id in line.runs:
+                BBSTerminalApp.insert_with_hyperlinks(app, text, tags.tag_for(attrs[attr_id]))
+            batch.add("\n", "normal")
+            batch.lines += 1
+        batch.flush()
+        root.update_idletasks()
+        per_line = (time.perf_counter() - start) / len(frame)
+        latencies.extend([per_line] * len(frame))
+    root.destroy()
+    return latencies
+
+
+@benchmark("chatlog_append")
+def bench_chatlog_append(workload, args):
+    from main import chatlog_timestamp
+    session = make_session()
+    latencies = []
+    for event in workload.messages:
+        ts, timestamp = chatlog_timestamp()
+        start = time.perf_counter()
+        session.save_chatlog_message(event.sender, timestamp + event.text, ts, event.chatlog_kind)
+        latencies.append(time.perf_counter() - start)
+    session.chatlog_store.close()
+    return latencies
+
+
+@benchmark("store_hyperlinks")
+def bench_store_hyperlinks(workload, args):
+    session = make_session()
+    latencies = []
+    for event in [event for event in workload.messages if event.urls][:args.links]:
+        start = time.perf_counter()
+        session.store_hyperlinks(event.urls, event.sender)
+        latencies.append(time.perf_counter() - start)
+    session.chatlog_store.close()
+    return latencies
+
+
+@benchmark("update_members")
+def bench_update_members(workload, args):
+    if not workload.banners:
+        raise Skipped("no room banners in the input")
+    session = make_session()
+    latencies = []
+    for i in range(args.banners):
+        banner = workload.banners[i % len(workload.banners)]
+        start = time.perf_counter()
+        session.update_chat_members(banner)
+        latencies.append(time.perf_counter() - start)
+    session.chatlog_store.close()
+    return latencies
+
+
+@benchmark("chatlog_page")
+def bench_chatlog_page(workload, args):
+    from main import ChatlogStore, chatlog_timestamp
+    store = ChatlogStore()
+    for event in workload.messages:
+        ts, timestamp = chatlog_timestamp()
+        store.append(event.sender, timestamp + event.text, kind=event.chatlog_kind, ts=ts)
+    users = store.usernames()
+    if not users:
+        raise Skipped("no chat messages in the input")
+    latencies = []
+    for i in range(args.pages):
+        choice = i % 3
+        start = time.perf_counter()
+        if choice == 0:
+            rows = store.page(users[i % len(users)])
+        elif choice == 1:
+            rows = store.page(None)
+        else:
+            rows = store.merged_page([users[(i + k) % len(users)] for k in range(3)])
+        # What the viewer inserts into the Text widget
+        "".join(message + "\n" for ts, row_id, message in rows)
+        latencies.append(time.perf_counter() - start)
+    store.close()
+    return latencies
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_worker(name, args):
+    """Run one benchmark in this process and return its result dict."""
+    if args.recording:
+        args.recording = os.path.abspath(args.recording)
+    workload = Workload(args)
+    latencies = None
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            # The session writes its chatlog and JSON files to the working directory
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                # Silence the session's debug prints without buffering them
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    run = BENCHMARKS[name](workload, args)
+            except Skipped as e:
+                return {"skipped": str(e)}
+            finally:
+                os.chdir(cwd)
+        # Keep the fastest run; slower ones measure the machine, not the code
+        if latencies is None or sum(run) < sum(latencies):
+            latencies = run
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "items": len(latencies),
+        "seconds": round(total, 6),
+        "items_per_sec": round(len(latencies) / total, 1) if total else 0.0,
+        "p50_us": round(percentile(latencies, 0.50) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1) if resource is not None else None,
+    }
+
+
+def run_suite(names, argv):
+    results = {}
+    for name in names:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name] + argv,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            results[name] = {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else
+                             f"exit status {proc.returncode}"}
+        else:
+            results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name, result):
+    if "skipped" in result:
+        print(f"{name:<18} skipped: {result['skipped']}")
+    elif "error" in result:
+        print(f"{name:<18} failed: {result['error']}")
+    else:
+        rss = f"{result['peak_rss_mb']:8.1f} MB" if result["peak_rss_mb"] is not None else ""
+        print(f"{name:<18} {result['items']:>8} items  {result['items_per_sec']:>12,.0f}/s  "
+              f"p50 {result['p50_us']:>9.1f} us  p99 {result['p99_us']:>9.1f} us  {rss}")
+
+
+def compare(results, baseline, threshold):
+    """Return the benchmarks whose items/sec fell more than threshold percent below baseline.
+
+    A benchmark the baseline measured that failed or was skipped this time
+    counts as a regression: a hot path that no longer runs is the worst kind.
+    """
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get("benchmarks", {}).get(name, {})
+        if not old.get("items_per_sec"):
+            continue
+        if "items_per_sec" not in result:
+            regressions.append(name)
+            reason = "failed" if "error" in result else "skipped"
+            print(f"{name:<18} {old['items_per_sec']:>12,.0f}/s -> {reason}  REGRESSION")
+            continue
+        change = (result["items_per_sec"] - old["items_per_sec"]) / old["items_per_sec"] * 100
+        marker = ""
+        if change < -threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(f"{name:<18} {old['items_per_sec']:>12,.0f}/s -> {result['items_per_sec']:>12,.0f}/s  "
+              f"{change:+6.1f}%{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording", help="session recording to use instead of synthetic traffic")
+    parser.add_argument("--messages", type=int, default=20000, help="synthetic message count")
+    parser.add_argument("--users", type=int, default=40, help="members in the synthetic room")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--links", type=int, default=2000, help="messages with URLs to store")
+    parser.add_argument("--banners", type=int, default=500, help="room banners to parse")
+    parser.add_argument("--pages", type=int, default=300, help="chatlog pages to query")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest is kept")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="run only this benchmark (repeatable)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="percent drop in items/sec that fails the run (default %(default)s)")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args)))
+        return 0
+
+    # Workers get the same workload options
+    argv = [arg for option in ("recording", "messages", "users", "seed", "links", "banners",
+                           "pages", "repeat")
+            if getattr(args, option) is not None
+            for arg in (f"--{option}", str(getattr(args, option)))]
+    workload = args.recording or f"synthetic, {args.messages} messages, {args.users} users, seed {args.seed}"
+    print(f"Input: {workload}")
+    results = run_suite(args.only or list(BENCHMARKS), argv)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "input": workload,
+        "benchmarks": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    status = 0
+    failed = [name for name, result in results.items() if "error" in result]
+    if failed:
+        print(f"{len(failed)} benchmark(s) failed: {', '.join(failed)}")
+        status = 1
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        print(f"\nCompared with {args.baseline} ({baseline.get('timestamp', 'unknown')}), "
+              f"threshold {args.threshold:g}%:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
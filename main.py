@@ -1,31 +1,3111 @@
 import tkinter as tk
 from tkinter import ttk
 import threading
+import sys
+import argparse
 import asyncio
 import telnetlib3
 import time
 import queue
+import heapq
+import itertools
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import deque, OrderedDict
 import re
 import json
 import os
+import sqlite3
+import hashlib
+import struct
+import math
+import tempfile
+import urllib.parse
 import webbrowser
 from PIL import Image, ImageTk
 import requests
 from io import BytesIO
-import winsound  # Import winsound for playing sound effects on Windows
+try:
+    import winsound  # Import winsound for playing sound effects on Windows
+except ImportError:
+    winsound = None  # Not available on Linux/macOS; the ding is skipped
 from tkinter import simpledialog  # Import simpledialog for input dialogs
+from tkinter import filedialog
+
+
+###############################################################################
+#                         Chatlog Storage (SQLite)
+###############################################################################
+
+CHATLOG_DB_FILE = "chatlog.db"
+LEGACY_CHATLOG_FILE = "chatlog.json"
+LEGACY_LINKS_FILE = "hyperlinks.json"
+CHATLOG_MAX_BYTES = 1 * 1024 * 1024 * 1024  # 1GB
+CHATLOG_RETENTION_INTERVAL = 3600  # seconds between age-based retention passes
+
+CHATLOG_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+CHATLOG_SEARCH_PAGE_SIZE = 200
+CHATLOG_VIEW_PAGE_SIZE = 200   # rows fetched per scroll step in the Chatlog viewer
+CHATLOG_VIEW_MAX_ROWS = 600    # rows kept rendered before the far end is dropped
+LINKS_VIEW_LIMIT = 500         # most recent links shown in the Chatlog window's links panel
+LINK_COLUMNS = "id, url, count, first_seen, last_seen, last_sender"
+URL_TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'mc_cid', 'mc_eid', 'ref_src', 'si'}
+
+# Message kinds stored with each chatlog row
+CHATLOG_KIND_PUBLIC = "public"
+CHATLOG_KIND_WHISPERED = "whispered"
+CHATLOG_KIND_TO_YOU = "to_you"
+CHATLOG_SEARCH_KINDS = {
+    "All": None,
+    "Public": CHATLOG_KIND_PUBLIC,
+    "Whispered": CHATLOG_KIND_WHISPERED,
+    "To You": CHATLOG_KIND_TO_YOU,
+}
+CHATLOG_KIND_REGEX = re.compile(
+    r'^(?:\[[^\]]*\]\s*)?From\s+\S+?\s*\((whispered|to you)\b', re.IGNORECASE)
+
+
+def parse_chatlog_timestamp(message):
+    """Return the epoch time of a '[YYYY-MM-DD HH:MM:SS]' prefix, or None."""
+    if not message.startswith('[') or len(message) < 21 or message[20] != ']':
+        return None
+    return _parse_timestamp_text(message[1:20])
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_timestamp_text(stamp):
+    # Lines arriving in the same second share a stamp, so strptime runs once per second
+    try:
+        return time.mktime(time.strptime(stamp, CHATLOG_TIMESTAMP_FORMAT))
+    except (ValueError, OverflowError):
+        return None
+
+
+def chatlog_timestamp(ts=None):
+    """Return ts (default now) together with its '[YYYY-MM-DD HH:MM:SS] ' prefix."""
+    if ts is None:
+        ts = time.time()
+    return ts, time.strftime("[%Y-%m-%d %H:%M:%S] ", time.localtime(ts))
+
+
+def chatlog_message_kind(message):
+    """Classify a stored chat line as public, whispered or directed to you."""
+    match = CHATLOG_KIND_REGEX.match(message)
+    if not match:
+        return CHATLOG_KIND_PUBLIC
+    if match.group(1).lower() == "whispered":
+        return CHATLOG_KIND_WHISPERED
+    return CHATLOG_KIND_TO_YOU
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    terms = []
+    for word in text.split():
+        terms.append('"%s"*' % word.replace('"', '""'))
+    return " ".join(terms)
+
+
+class ChatlogStore:
+    """Append-only chatlog storage backed by an embedded SQLite database.
+
+    Every message is a single row insert, so saving a line costs the same no
+    matter how much history has accumulated.  Users are kept in their own table
+    so that clearing a user's log keeps them in the user list, exactly like the
+    old ``chatlog.json`` layout did with an empty list.
+    """
+
+    def __init__(self, path=CHATLOG_DB_FILE, legacy_path=LEGACY_CHATLOG_FILE,
+                 legacy_links_path=LEGACY_LINKS_FILE):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                " id INTEGER PRIMARY KEY,"
+                " username TEXT NOT NULL UNIQUE)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY,"
+                " username TEXT NOT NULL,"
+                " ts REAL NOT NULL,"
+                " message TEXT NOT NULL)"
+            )
+            self.ensure_column("messages", "size", "INTEGER NOT NULL DEFAULT -1")
+            self.conn.execute(
+                "UPDATE messages SET size = length(CAST(message AS BLOB)) WHERE size < 0"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_username ON messages (username, id)"
+            )
+            self.ensure_column("messages", "kind", "TEXT NOT NULL DEFAULT ''")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_ts ON messages (ts)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_username_ts ON messages (username, ts)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT)"
+            )
+        self.has_fts = self.create_search_index()
+        if legacy_path:
+            self.migrate_legacy_json(legacy_path)
+        self.backfill_kinds()
+        self.load_byte_counts()
+        self.links = LinkStore(self, legacy_links_path)
+
+    def ensure_column(self, table, column, definition):
+        """Add column to table if an older database does not have it yet."""
+        columns = [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def create_search_index(self):
+        """Create the FTS5 full-text index, kept in sync by triggers.
+
+        Returns False when this SQLite build has no FTS5, in which case
+        search() falls back to a LIKE scan.
+        """
+        try:
+            with self.conn:
+                exists = self.conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone()
+                self.conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+                    " message, content='messages', content_rowid='id')"
+                )
+                self.conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN"
+                    " INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);"
+                    " END"
+                )
+                self.conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN"
+                    " INSERT INTO messages_fts (messages_fts, rowid, message)"
+                    " VALUES ('delete', old.id, old.message);"
+                    " END"
+                )
+                if not exists:
+                    self.conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"[DEBUG] Full-text search unavailable: {e}")
+            return False
+
+    def backfill_kinds(self, batch=5000):
+        """Classify rows written before the kind column existed."""
+        while True:
+            with self.lock, self.conn:
+                rows = self.conn.execute(
+                    "SELECT id, message FROM messages WHERE kind = '' LIMIT ?",
+                    (batch,)).fetchall()
+                if not rows:
+                    return
+                self.conn.executemany(
+                    "UPDATE messages SET kind = ? WHERE id = ?",
+                    [(chatlog_message_kind(message), row_id) for row_id, message in rows])
+
+    def load_byte_counts(self):
+        """Initialise the running per-user and total byte counts."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT username, SUM(size) FROM messages GROUP BY username").fetchall()
+            self.user_bytes = {username: total for username, total in rows}
+            self.total_bytes = sum(self.user_bytes.values())
+
+    def get_meta(self, key, default=None):
+        """Return a stored setting from the meta table."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        """Store a setting in the meta table."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def migrate_legacy_json(self, legacy_path):
+        """One-time import of an existing chatlog.json into the database."""
+        if not os.path.exists(legacy_path):
+            return
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone()
+            if row:
+                return
+            try:
+                with open(legacy_path, "r") as file:
+                    chatlog = json.load(file)
+            except Exception as e:
+                print(f"[DEBUG] Error reading legacy chatlog: {e}")
+                return
+
+            # Import in chronological order so row ids follow the timeline
+            rows = []
+            for username, messages in chatlog.items():
+                for message in messages:
+                    ts = parse_chatlog_timestamp(message) or 0.0
+                    rows.append((username, ts, message, len(message.encode('utf-8')),
+                                 chatlog_message_kind(message)))
+            rows.sort(key=lambda row: row[1])
+
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO users (username) VALUES (?)",
+                    [(username,) for username in chatlog.keys()])
+                self.conn.executemany(
+                    "INSERT INTO messages (username, ts, message, size, kind)"
+                    " VALUES (?, ?, ?, ?, ?)", rows)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_migrated', ?)",
+                    (str(int(time.time())),))
+        try:
+            os.replace(legacy_path, legacy_path + ".migrated")
+        except OSError as e:
+            print(f"[DEBUG] Could not rename legacy chatlog: {e}")
+
+    def append(self, username, message, kind=None, ts=None):
+        """Append one message for username.
+
+        ts is the epoch time of the message; when omitted it is parsed from the
+        message's timestamp prefix once here, so readers never re-parse text.
+        """
+        if ts is None:
+            ts = parse_chatlog_timestamp(message) or time.time()
+        size = len(message.encode('utf-8'))
+        if kind is None:
+            kind = chatlog_message_kind(message)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO users (username) VALUES (?)", (username,))
+            self.conn.execute(
+                "INSERT INTO messages (username, ts, message, size, kind) VALUES (?, ?, ?, ?, ?)",
+                (username, ts, message, size, kind))
+            self.user_bytes[username] = self.user_bytes.get(username, 0) + size
+            self.total_bytes += size
+
+    def usernames(self):
+        """Return all usernames in the order they were first seen."""
+        with self.lock:
+            rows = self.conn.execute("SELECT username FROM users ORDER BY id").fetchall()
+        return [row[0] for row in rows]
+
+    def messages_for(self, username):
+        """Return the stored messages for username, oldest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT message FROM messages WHERE username = ? ORDER BY id",
+                (username,)).fetchall()
+        return [row[0] for row in rows]
+
+    def page(self, username=None, before=None, after=None, limit=CHATLOG_VIEW_PAGE_SIZE):
+        """Return one page of (ts, id, message) rows in chronological order.
+
+        With neither before nor after the newest page is returned.  before and
+        after are (ts, id) keys of the first or last row already shown, so each
+        page is an index range scan no matter how deep into history it is.
+        username may be a single name, a list of names (merged timeline), or
+        None for everyone.
+        """
+        if isinstance(username, (list, tuple)):
+            return self.merged_page(username, before, after, limit)
+        clauses = []
+        params = []
+        if username is not None:
+            clauses.append("username = ?")
+            params.append(username)
+        if after is not None:
+            clauses.append("(ts, id) > (?, ?)")
+            params.extend(after)
+            order = "ASC"
+        else:
+            if before is not None:
+                clauses.append("(ts, id) < (?, ?)")
+                params.extend(before)
+            order = "DESC"
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        params.append(limit)
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT ts, id, message FROM messages{where}"
+                f" ORDER BY ts {order}, id {order} LIMIT ?", params).fetchall()
+        if order == "DESC":
+            rows.reverse()
+        return rows
+
+    def iter_user_rows(self, username, before=None, after=None, chunk=CHATLOG_VIEW_PAGE_SIZE):
+        """Lazily yield one user's rows, newest first (oldest first when after is given)."""
+        while True:
+            rows = self.page(username, before=before, after=after, limit=chunk)
+            if after is not None:
+                yield from rows
+                if len(rows) < chunk:
+                    return
+                after = rows[-1][:2]
+            else:
+                yield from reversed(rows)
+                if len(rows) < chunk:
+                    return
+                before = rows[0][:2]
+
+    def merged_page(self, usernames, before=None, after=None, limit=CHATLOG_VIEW_PAGE_SIZE):
+        """Build a page of several users' timelines with a streaming k-way merge.
+
+        Each user's rows already come off the (username, ts) index in time
+        order, so a heap merge yields the combined timeline incrementally and
+        stops after limit rows instead of sorting every matching message.
+        """
+        newest_first = after is None
+        streams = [self.iter_user_rows(username, before, after, limit) for username in usernames]
+        rows = list(itertools.islice(heapq.merge(*streams, reverse=newest_first), limit))
+        if newest_first:
+            rows.reverse()
+        return rows
+
+    def search(self, text="", sender=None, since=None, until=None, kind=None,
+               before_id=None, limit=CHATLOG_SEARCH_PAGE_SIZE):
+        """Search the chatlog, newest first.
+
+        text is matched word-by-word against the full-text index; sender, the
+        since/until epoch range and kind narrow the results.  Pass the smallest
+        id of the previous page as before_id to fetch the next (older) page.
+        Returns a list of (id, username, ts, kind, message) tuples.
+        """
+        clauses = []
+        params = []
+        query = fts_query(text) if text else ""
+        if query and self.has_fts:
+            # Ordering on the FTS rowid lets FTS5 stream matches newest first
+            source = "messages_fts JOIN messages m ON m.id = messages_fts.rowid"
+            order = "messages_fts.rowid"
+            clauses.append("messages_fts MATCH ?")
+            params.append(query)
+        else:
+            source = "messages m"
+            order = "m.id"
+            for word in text.split():
+                clauses.append("m.message LIKE ?")
+                params.append(f"%{word}%")
+        if sender:
+            clauses.append("m.username = ?")
+            params.append(sender)
+        if since is not None:
+            clauses.append("m.ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("m.ts < ?")
+            params.append(until)
+        if kind:
+            clauses.append("m.kind = ?")
+            params.append(kind)
+        if before_id is not None:
+            clauses.append("m.id < ?")
+            params.append(before_id)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        sql = (f"SELECT m.id, m.username, m.ts, m.kind, m.message FROM {source}{where}"
+               f" ORDER BY {order} DESC LIMIT ?")
+        params.append(limit)
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def clear_user(self, username):
+        """Remove all messages for username but keep the user listed."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM messages WHERE username = ?", (username,))
+            self.total_bytes -= self.user_bytes.pop(username, 0)
+
+    def delete_user(self, username):
+        """Remove username and all of their messages."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM messages WHERE username = ?", (username,))
+            self.conn.execute("DELETE FROM users WHERE username = ?", (username,))
+            self.total_bytes -= self.user_bytes.pop(username, 0)
+
+    def evict_oldest(self, max_bytes, batch=5000):
+        """Delete the oldest messages across all users until the log fits max_bytes.
+
+        Walks the timeline once from the oldest row, deleting in batches so the
+        lock is released between transactions and new messages keep flowing.
+        Returns the number of bytes freed.
+        """
+        freed = 0
+        while self.total_bytes > max_bytes:
+            with self.lock, self.conn:
+                excess = self.total_bytes - max_bytes
+                rows = self.conn.execute(
+                    "SELECT id, username, size FROM messages ORDER BY id LIMIT ?",
+                    (batch,)).fetchall()
+                if not rows:
+                    break
+                removed = {}
+                last_id = None
+                for row_id, username, size in rows:
+                    if excess <= 0:
+                        break
+                    removed[username] = removed.get(username, 0) + size
+                    excess -= size
+                    last_id = row_id
+                self.conn.execute("DELETE FROM messages WHERE id <= ?", (last_id,))
+                freed += self.forget_bytes(removed)
+        return freed
+
+    def evict_older_than(self, cutoff_ts):
+        """Delete every message timestamped before cutoff_ts. Returns bytes freed."""
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT username, SUM(size) FROM messages WHERE ts < ? GROUP BY username",
+                (cutoff_ts,)).fetchall()
+            if not rows:
+                return 0
+            self.conn.execute("DELETE FROM messages WHERE ts < ?", (cutoff_ts,))
+            return self.forget_bytes(dict(rows))
+
+    def forget_bytes(self, removed):
+        """Subtract a {username: bytes} mapping from the running counts."""
+        freed = 0
+        for username, size in removed.items():
+            remaining = self.user_bytes.get(username, 0) - size
+            if remaining > 0:
+                self.user_bytes[username] = remaining
+            else:
+                self.user_bytes.pop(username, None)
+            freed += size
+        self.total_bytes -= freed
+        return freed
+
+    def close(self):
+        """Close the database connection."""
+        with self.lock:
+            self.conn.close()
+
+
+def canonical_url(url):
+    """Return the key a link is deduplicated under.
+
+    http and https, a leading "www.", default ports, the fragment and
+    tracking parameters (utm_*, fbclid, ...) do not make a link different;
+    YouTube links are reduced to their video id.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme in ("http", "https", ""):
+        scheme = "https"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path or "/"
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+             if not key.lower().startswith("utm_") and key.lower() not in URL_TRACKING_PARAMS]
+    if host == "youtu.be" and len(path) > 1:
+        host, path, query = "youtube.com", "/watch", [("v", path[1:])]
+    elif host in ("youtube.com", "m.youtube.com", "music.youtube.com") and path == "/watch":
+        host, query = "youtube.com", [(key, value) for key, value in query if key == "v"]
+    if port is not None and port not in (80, 443):
+        host = f"{host}:{port}"
+    return urllib.parse.urlunsplit((scheme, host, path, urllib.parse.urlencode(query), ""))
+
+
+class StoredLink:
+    """One deduplicated link as returned by LinkStore."""
+
+    __slots__ = ('id', 'url', 'count', 'first_seen', 'last_seen', 'sender')
+
+    def __init__(self, id, url, count, first_seen, last_seen, sender):
+        self.id = id
+        self.url = url
+        self.count = count
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.sender = sender
+
+
+class LinkStore:
+    """Deduplicated hyperlinks, kept in the chatlog database.
+
+    Links are keyed by canonical_url(), so a link posted fifty times is one
+    row with a count of fifty.  A row keeps the URL as first posted, its
+    first and last seen times and the last sender; link_senders counts the
+    posts per sender.  Storing a link is a pair of indexed upserts, so it
+    costs the same however many links are stored, and the caller gets the
+    updated row back to draw.
+    """
+
+    def __init__(self, chatlog_store, legacy_path=LEGACY_LINKS_FILE):
+        self.conn = chatlog_store.conn
+        self.lock = chatlog_store.lock
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS links ("
+                " id INTEGER PRIMARY KEY,"
+                " canonical TEXT NOT NULL UNIQUE,"
+                " url TEXT NOT NULL,"
+                " count INTEGER NOT NULL DEFAULT 1,"
+                " first_seen REAL NOT NULL,"
+                " last_seen REAL NOT NULL,"
+                " last_sender TEXT)"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS links_last_seen ON links (last_seen)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS link_senders ("
+                " link_id INTEGER NOT NULL,"
+                " sender TEXT NOT NULL,"
+                " count INTEGER NOT NULL DEFAULT 1,"
+                " last_seen REAL NOT NULL,"
+                " PRIMARY KEY (link_id, sender))"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS link_senders_sender ON link_senders (sender, last_seen)"
+            )
+        if legacy_path:
+            self.migrate_legacy_json(legacy_path)
+
+    def add(self, urls, sender=None, ts=None):
+        """Record one post of each URL; returns the StoredLink rows, updated."""
+        if ts is None:
+            ts = time.time()
+        links = []
+        with self.lock, self.conn:
+            for url in urls:
+                canonical = canonical_url(url)
+                self.conn.execute(
+                    "INSERT INTO links (canonical, url, first_seen, last_seen, last_sender)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (canonical) DO UPDATE SET count = count + 1,"
+                    " last_seen = excluded.last_seen, last_sender = excluded.last_sender",
+                    (canonical, url, ts, ts, sender))
+                row = self.conn.execute(
+                    f"SELECT {LINK_COLUMNS} FROM links WHERE canonical = ?", (canonical,)).fetchone()
+                if sender:
+                    self.conn.execute(
+                        "INSERT INTO link_senders (link_id, sender, last_seen) VALUES (?, ?, ?)"
+                        " ON CONFLICT (link_id, sender) DO UPDATE SET count = count + 1,"
+                        " last_seen = excluded.last_seen",
+                        (row[0], sender, ts))
+                links.append(StoredLink(*row))
+        return links
+
+    def recent(self, limit=LINKS_VIEW_LIMIT, since=None):
+        """Return up to limit links, most recently first posted last."""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT {LINK_COLUMNS} FROM links WHERE last_seen >= ?"
+                " ORDER BY id DESC LIMIT ?", (since or 0, limit)).fetchall()
+        return [StoredLink(*row) for row in reversed(rows)]
+
+    def for_sender(self, sender, limit=LINKS_VIEW_LIMIT):
+        """Return the links sender posted, most recently posted last."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT links.id, links.url, link_senders.count, links.first_seen,"
+                " link_senders.last_seen, link_senders.sender"
+                " FROM link_senders JOIN links ON links.id = link_senders.link_id"
+                " WHERE link_senders.sender = ? ORDER BY link_senders.last_seen DESC LIMIT ?",
+                (sender, limit)).fetchall()
+        return [StoredLink(*row) for row in reversed(rows)]
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM link_senders")
+            self.conn.execute("DELETE FROM links")
+
+    def migrate_legacy_json(self, legacy_path):
+        """One-time import of an existing hyperlinks.json, merging duplicates."""
+        if not os.path.exists(legacy_path):
+            return
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'legacy_links_migrated'").fetchone()
+            if row:
+                return
+            try:
+                with open(legacy_path, "r") as file:
+                    entries = json.load(file)
+            except Exception as e:
+                print(f"[DEBUG] Error reading legacy hyperlinks: {e}")
+                return
+            posts = []
+            for entry in entries:
+                stamp = entry.get("timestamp", "")
+                ts = _parse_timestamp_text(stamp.strip("[]")) or 0.0
+                if entry.get("url"):
+                    posts.append((ts, entry["url"], entry.get("sender")))
+            posts.sort(key=lambda post: post[0])
+            for ts, url, sender in posts:
+                self.add([url], sender, ts)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_links_migrated', ?)",
+                    (str(int(time.time())),))
+        try:
+            os.replace(legacy_path, legacy_path + ".migrated")
+        except OSError as e:
+            print(f"[DEBUG] Could not rename legacy hyperlinks: {e}")
+
+
+class ChatlogRetention:
+    """Background thread that keeps the chatlog within its size and age limits.
+
+    The size cap is checked against the store's running byte count, so saving
+    a message only has to compare two integers; when it is exceeded the saver
+    calls request() and the eviction runs here instead of on the Tk thread.
+    """
+
+    def __init__(self, store, max_bytes=CHATLOG_MAX_BYTES, max_age_days=0,
+                 interval=CHATLOG_RETENTION_INTERVAL):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.interval = interval
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start the retention thread."""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the retention thread, waiting for a pass in progress to finish.
+
+        Callers close the store next, so the thread must be done with it.
+        """
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def request(self):
+        """Wake the thread for an immediate retention pass."""
+        self.wake_event.set()
+
+    def over_limit(self):
+        """True when the running byte count is above the configured cap."""
+        return self.max_bytes > 0 and self.store.total_bytes > self.max_bytes
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.enforce()
+            except Exception as e:
+                print(f"[DEBUG] Chatlog retention error: {e}")
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+
+    def enforce(self):
+        """Run one age pass and one size pass."""
+        if self.max_age_days > 0:
+            cutoff = time.time() - self.max_age_days * 86400
+            self.store.evict_older_than(cutoff)
+        if self.over_limit():
+            self.store.evict_oldest(self.max_bytes)
+
+
+###############################################################################
+#                         JSON State Persistence
+###############################################################################
+
+PERSIST_DEBOUNCE = 2.0  # seconds changes are collected before dirty files are written
+PERSIST_RETRY_MAX = 60.0  # longest wait between retries of a failing write
+
+
+def atomic_write_text(path, text):
+    """Write text to path so that a crash leaves either the old or the new file.
+
+    The text goes to a temporary file in the same directory, which is
+    flushed to disk and then renamed over path.
+    """
+    _atomic_write(path, text, "w")
+
+
+def atomic_write_bytes(path, data):
+    """Like atomic_write_text(), for binary data."""
+    _atomic_write(path, data, "wb")
+
+
+def _atomic_write(path, data, mode):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode) as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JsonStateStore:
+    """Write-behind cache for the small JSON files that hold the app's state.
+
+    load() reads a file once and keeps the parsed value; later loads return
+    the same object, so sessions sharing a store share it too.  save()
+    replaces the value and marks the file dirty without touching the disk.
+    A background thread wakes on the first change, waits PERSIST_DEBOUNCE
+    seconds for more, then writes every dirty file in one pass with
+    atomic_write_text().  A file that fails to write stays dirty and is
+    retried, backing off up to PERSIST_RETRY_MAX.  stop() writes whatever
+    is still dirty.
+    """
+
+    def __init__(self, debounce=PERSIST_DEBOUNCE):
+        self.debounce = debounce
+        self.values = {}
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.flushes = 0
+        self.writes = 0
+        self.retry_delay = 0.0  # grows while writes keep failing
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="state-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the writer thread and write anything still dirty."""
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.flush()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.wake.wait()
+            # Debounce: let a burst of changes land before writing; back off after failures
+            self.stop_event.wait(max(self.debounce, self.retry_delay))
+            self.flush()
+
+    def load(self, path, default=None):
+        """Return the cached value for path, reading the file on first use."""
+        with self.lock:
+            if path in self.values:
+                return self.values[path]
+        value = default
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    value = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"Error loading {path}: {e}")
+        with self.lock:
+            return self.values.setdefault(path, value)
+
+    def save(self, path, value):
+        """Replace the value for path and schedule it to be written."""
+        with self.lock:
+            self.values[path] = value
+            self.dirty.add(path)
+        self.wake.set()
+
+    def flush(self):
+        """Write every dirty file now."""
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+            self.wake.clear()
+            pending = [(path, self.values[path]) for path in dirty]
+        if not pending:
+            return
+        self.flushes += 1
+        failed = False
+        for path, value in pending:
+            try:
+                text = json.dumps(value)
+                atomic_write_text(path, text)
+                self.writes += 1
+            except (OSError, TypeError, ValueError, RuntimeError) as e:
+                # RuntimeError: the value changed size while it was encoded
+                print(f"Error saving {path}: {e}")
+                failed = True
+                with self.lock:
+                    self.dirty.add(path)
+        if failed:
+            # Retry on its own rather than waiting for an unrelated save()
+            self.retry_delay = min(max(self.retry_delay * 2, self.debounce), PERSIST_RETRY_MAX)
+            self.wake.set()
+        else:
+            self.retry_delay = 0.0
+
+
+###############################################################################
+#                         ANSI / VT100 Parsing
+###############################################################################
+
+# SGR attribute flags
+ATTR_BOLD = 1
+ATTR_DIM = 2
+ATTR_ITALIC = 4
+ATTR_UNDERLINE = 8
+ATTR_BLINK = 16
+ATTR_REVERSE = 32
+ATTR_CONCEAL = 64
+ATTR_STRIKE = 128
+
+# (foreground, background, flags); colours are None (default), a 0-255 palette
+# index or a '#rrggbb' string
+DEFAULT_ATTR = (None, None, 0)
+
+SGR_SET_FLAGS = {1: ATTR_BOLD, 2: ATTR_DIM, 3: ATTR_ITALIC, 4: ATTR_UNDERLINE,
+                 5: ATTR_BLINK, 6: ATTR_BLINK, 7: ATTR_REVERSE, 8: ATTR_CONCEAL, 9: ATTR_STRIKE}
+SGR_CLEAR_FLAGS = {21: ATTR_BOLD | ATTR_DIM, 22: ATTR_BOLD | ATTR_DIM, 23: ATTR_ITALIC,
+                   24: ATTR_UNDERLINE, 25: ATTR_BLINK, 27: ATTR_REVERSE, 28: ATTR_CONCEAL,
+                   29: ATTR_STRIKE}
+
+# One token per match: a run of printable text, an SGR sequence plus the text
+# it colours (the hot path), a line ending, any other complete escape sequence, an escape cut off by the end of
+# the chunk, a stray ESC, or a single control character (TAB is kept as text)
+ANSI_TOKEN_REGEX = re.compile(
+    r'(?P<text>[^\x00-\x08\x0a-\x1f\x7f]+)'
+    r'|(?P<sgr>\x1b\[(?P<sgr_params>[0-9;]*)m(?P<sgr_text>[^\x00-\x08\x0a-\x1f\x7f]*))'
+    r'|(?P<csi>\x1b\[(?P<csi_params>[0-?]*)[ -/]*(?P<csi_final>[@-~]))'
+    r'|(?P<esc>\x1b(?:\][^\x07\x1b]*(?:\x07|\x1b\\)|[()*+].|[^\[\]()*+]))'
+    r'|(?P<eol>\r\n?|\n)'
+    r'|(?P<partial>\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()*+])?\Z)'
+    r'|(?P<control>[\x00-\x1f\x7f])',
+    re.DOTALL)
+ANSI_MAX_CARRY = 256
+
+
+class ParsedLine:
+    """One complete line from the parser: its plain text and its styled runs."""
+
+    __slots__ = ('text', 'runs')
+
+    def __init__(self, text, runs):
+        self.text = text
+        self.runs = runs  # [(text, attr_id), ...]
+
+
+class AnsiParser:
+    """Streaming ANSI/VT100 parser fed raw chunks straight from the telnet reader.
+
+    SGR colour/attribute state, the cursor column and any escape sequence cut
+    off at the end of a chunk are kept between feed() calls, so a sequence
+    split across two reads or a colour that spans several lines is handled
+    the same as if the data had arrived in one piece.
+
+    A single token regex splits each chunk into text runs, SGR sequences,
+    other escapes and control characters; controls and CSI final bytes are
+    dispatched through tables and SGR results are cached per (attribute,
+    parameters) pair, since BBS art repeats the same few codes.  feed()
+    returns the completed lines as ParsedLine objects whose runs carry a
+    small integer attribute id (see attrs for the id -> attribute table).
+    """
+
+    def __init__(self):
+        self.attr = DEFAULT_ATTR
+        self.attr_id = 0
+        self.attrs = [DEFAULT_ATTR]
+        self.attr_ids = {DEFAULT_ATTR: 0}
+        self.carry = ""
+        self.lines = []
+        self.runs = []
+        self.col = 0
+        self.saved_col = 0
+        self.after_cr = False
+        self.screen_clears = 0
+        self.sgr_cache = {}  # (attr_id, SGR params) -> resulting attr_id
+        self.controls = {
+            '\x08': self.on_backspace,
+            '\x0c': self.on_form_feed,
+        }
+        self.csi_handlers = {
+            'm': self.on_sgr,
+            'C': self.on_cursor_forward,
+            'G': self.on_cursor_column,
+            'J': self.on_erase_display,
+            's': self.on_save_cursor,
+            'u': self.on_restore_cursor,
+        }
+
+    def feed(self, data):
+        """Parse a chunk and return the list of lines it completed."""
+        if self.carry:
+            data = self.carry + data
+            self.carry = ""
+        self.lines = []
+        runs = self.runs
+        attr_id = self.attr_id
+        sgr_cache = self.sgr_cache
+        for match in ANSI_TOKEN_REGEX.finditer(data):
+            kind = match.lastgroup
+            if kind == 'sgr':
+                params, text = match.group(3, 4)  # sgr_params, sgr_text
+                key = (attr_id, params)
+                new_id = sgr_cache.get(key)
+                if new_id is None:
+                    self.attr = self.attrs[attr_id]
+                    self.on_sgr(params)
+                    new_id = self.attr_id
+                    if len(sgr_cache) > 4096:
+                        sgr_cache.clear()
+                    sgr_cache[key] = new_id
+                attr_id = new_id
+                self.after_cr = False
+                if not text:
+                    continue
+            elif kind == 'text':
+                text = match.group()
+                self.after_cr = False
+            elif kind == 'eol':
+                eol = match.group()
+                if eol == '\n' and self.after_cr:
+                    # Second half of a CR LF pair split across chunks
+                    self.after_cr = False
+                    continue
+                self.lines.append(ParsedLine("".join([run[0] for run in runs]), runs))
+                runs = self.runs = []
+                self.col = 0
+                self.after_cr = eol == '\r'
+                continue
+            else:
+                # Rare tokens go through the handlers, which work on self
+                self.attr_id = attr_id
+                self.attr = self.attrs[attr_id]
+                self.dispatch(kind, match)
+                attr_id = self.attr_id
+                runs = self.runs
+                continue
+            if runs and runs[-1][1] == attr_id:
+                runs[-1] = (runs[-1][0] + text, attr_id)
+            else:
+                runs.append((text, attr_id))
+            self.col += len(text)
+        self.attr_id = attr_id
+        self.attr = self.attrs[attr_id]
+        lines, self.lines = self.lines, []
+        return lines
+
+    def dispatch(self, kind, match):
+        """Handle a control character or a non-SGR escape token."""
+        if kind == 'control':
+            handler = self.controls.get(match.group())
+            if handler:
+                handler()
+                return
+        elif kind == 'csi':
+            handler = self.csi_handlers.get(match.group('csi_final'))
+            if handler:
+                handler(match.group('csi_params'))
+        elif kind == 'partial' and match.end() - match.start() <= ANSI_MAX_CARRY:
+            self.carry = match.group()
+        # Anything else (OSC titles, charset selection) is ignored
+        self.after_cr = False
+
+    def add_text(self, text):
+        self.after_cr = False
+        runs = self.runs
+        if runs and runs[-1][1] == self.attr_id:
+            runs[-1] = (runs[-1][0] + text, self.attr_id)
+        else:
+            runs.append((text, self.attr_id))
+        self.col += len(text)
+
+    def set_attr(self, attr):
+        self.attr = attr
+        attr_id = self.attr_ids.get(attr)
+        if attr_id is None:
+            attr_id = self.attr_ids[attr] = len(self.attrs)
+            self.attrs.append(attr)
+        self.attr_id = attr_id
+
+    # --- Control characters ---
+    def on_backspace(self):
+        self.after_cr = False
+        if self.runs and self.col:
+            text, attr_id = self.runs[-1]
+            if len(text) > 1:
+                self.runs[-1] = (text[:-1], attr_id)
+            else:
+                self.runs.pop()
+            self.col -= 1
+
+    def on_form_feed(self):
+        self.after_cr = False
+        self.screen_clears += 1
+
+    # --- Escape sequences ---
+    @staticmethod
+    def csi_params(params, default=0):
+        values = []
+        for part in params.split(';'):
+            values.append(int(part) if part.isdigit() else default)
+        return values
+
+    def on_sgr(self, params):
+        fg, bg, flags = self.attr
+        codes = self.csi_params(params)
+        i = 0
+        count = len(codes)
+        while i < count:
+            code = codes[i]
+            i += 1
+            if code == 0:
+                fg, bg, flags = DEFAULT_ATTR
+            elif 30 <= code <= 37:
+                fg = code - 30
+            elif 90 <= code <= 97:
+                fg = code - 82
+            elif 40 <= code <= 47:
+                bg = code - 40
+            elif 100 <= code <= 107:
+                bg = code - 92
+            elif code == 39:
+                fg = None
+            elif code == 49:
+                bg = None
+            elif code in (38, 48) and i < count:
+                mode = codes[i]
+                if mode == 5 and i + 1 < count:
+                    color = codes[i + 1] & 0xFF
+                    i += 2
+                elif mode == 2 and i + 3 < count:
+                    color = "#%02x%02x%02x" % tuple(c & 0xFF for c in codes[i + 1:i + 4])
+                    i += 4
+                else:
+                    i += 1
+                    continue
+                if code == 38:
+                    fg = color
+                else:
+                    bg = color
+            elif code in SGR_SET_FLAGS:
+                flags |= SGR_SET_FLAGS[code]
+            elif code in SGR_CLEAR_FLAGS:
+                flags &= ~SGR_CLEAR_FLAGS[code]
+        self.set_attr((fg, bg, flags))
+
+    def on_cursor_forward(self, params):
+        # ANSI art uses cursor-forward to skip columns; render it as spaces
+        self.add_text(" " * max(1, self.csi_params(params, 1)[0]))
+
+    def on_cursor_column(self, params):
+        column = max(1, self.csi_params(params, 1)[0]) - 1
+        if column > self.col:
+            self.add_text(" " * (column - self.col))
+
+    def discard_partial(self):
+        """Forget the unfinished line and escape carry, e.g. after input was skipped."""
+        self.carry = ""
+        self.runs = []
+        self.col = 0
+        self.after_cr = False
+
+    def on_erase_display(self, params):
+        if self.csi_params(params)[0] == 2:
+            self.screen_clears += 1
+
+    def on_save_cursor(self, params):
+        self.saved_col = self.col
+
+    def on_restore_cursor(self, params):
+        if self.saved_col > self.col:
+            self.add_text(" " * (self.saved_col - self.col))
+
+
+###############################################################################
+#                         Line Classification
+###############################################################################
+
+# Line kinds produced by classify_line
+LINE_TEXT = "text"                  # anything else (displayed, triggers checked)
+LINE_EMPTY = "empty"
+LINE_BANNER_START = "banner_start"  # "You are in ..." opens the member banner
+LINE_BANNER = "banner"              # other banner lines that are never displayed
+LINE_CHAT = "chat"                  # From X: / From X (to Y): / From X (whispered to Y):
+LINE_DIRECTED = "directed"          # From X (whispered): / From X (to you):
+LINE_ACTIONS = "actions"            # "Action listing for:" opens the action list
+
+# One dispatcher for every line.  The anchored alternatives are tried first at
+# the start of the line; the banner markers can match anywhere in it.
+LINE_CLASSIFIER_REGEX = re.compile(
+    r'^(?P<banner_start>You are in)'
+    r'|^(?i:from)\s+(?P<sender>\S+?)(?:@[\w.]+)?\s*(?:\((?P<qualifier>[^)]*)\))?\s*:\s*(?P<message>.+)$'
+    r'|^(?P<actions>Action listing for:)'
+    r'|(?P<banner>Topic:|Just press|are here with you)')
+URL_EXTRACT_REGEX = re.compile(r'(https?://[^\s<>"\']+|www\.[^\s<>"\']+)')
+URL_TRAILING_PUNCTUATION = '.,;:'
+
+
+def extract_urls(text):
+    """Return the URLs in text, with trailing punctuation removed and www. links completed."""
+    if 'http' not in text and 'www.' not in text:
+        return []
+    urls = []
+    for url in URL_EXTRACT_REGEX.findall(text):
+        url = url.rstrip(URL_TRAILING_PUNCTUATION)
+        if url.startswith('www.'):
+            url = 'http://' + url
+        urls.append(url)
+    return urls
+
+
+class LineEvent:
+    """A classified line: what it is, who sent it to whom, and what it says."""
+
+    __slots__ = ('kind', 'text', 'lower', 'sender', 'recipient', 'message', 'chatlog_kind', 'urls')
+
+    def __init__(self, kind, text, sender=None, recipient=None, message=None,
+                 chatlog_kind=None, urls=()):
+        self.kind = kind
+        self.text = text
+        self.lower = text.lower()
+        self.sender = sender
+        self.recipient = recipient
+        self.message = message
+        self.chatlog_kind = chatlog_kind
+        self.urls = urls
+
+
+def classify_line(text):
+    """Classify one escape-free line with a single regex search."""
+    text = text.strip()
+    if not text:
+        return LineEvent(LINE_EMPTY, text)
+    match = LINE_CLASSIFIER_REGEX.search(text)
+    if not match:
+        return LineEvent(LINE_TEXT, text)
+    group = match.lastgroup
+    if group == 'message':
+        sender, qualifier, message = match.group('sender', 'qualifier', 'message')
+        qualifier = (qualifier or "").strip()
+        lowered = qualifier.lower()
+        if lowered in ("whispered", "to you"):
+            chatlog_kind = CHATLOG_KIND_WHISPERED if lowered == "whispered" else CHATLOG_KIND_TO_YOU
+            return LineEvent(LINE_DIRECTED, text, sender, "you", message,
+                             chatlog_kind, extract_urls(message))
+        recipient = None
+        chatlog_kind = CHATLOG_KIND_PUBLIC
+        if lowered.startswith("whispered to "):
+            recipient = qualifier[len("whispered to "):].strip()
+            chatlog_kind = CHATLOG_KIND_WHISPERED
+        elif lowered.startswith("to "):
+            recipient = qualifier[3:].strip()
+        return LineEvent(LINE_CHAT, text, sender, recipient, message,
+                         chatlog_kind, extract_urls(text))
+    if group == 'banner_start':
+        return LineEvent(LINE_BANNER_START, text)
+    if group == 'actions':
+        return LineEvent(LINE_ACTIONS, text)
+    return LineEvent(LINE_BANNER, text)
+
+
+###############################################################################
+#                         Trigger Engine
+###############################################################################
+
+TRIGGER_DEFAULT_COOLDOWN = 5.0  # seconds; stops a trigger looping on the server's echo
+
+
+class AhoCorasick:
+    """Multi-literal matcher: one pass over the text whatever the number of literals."""
+
+    __slots__ = ('delta', 'out')
+
+    def __init__(self, literals):
+        goto = [{}]
+        out = [set()]
+        for index, literal in literals:
+            state = 0
+            for ch in literal:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(set())
+                state = nxt
+            out[state].add(index)
+
+        # Breadth-first failure links, folded into a complete transition table
+        # so the search loop never has to follow them.
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            table = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                out[nxt] |= out[fail[nxt]]
+                queue.append(nxt)
+            table.update(goto[state])
+            delta[state] = table
+        self.delta = delta
+        self.out = [frozenset(indices) if indices else None for indices in out]
+
+    def search(self, text):
+        """Return the set of literal indices found in text."""
+        delta = self.delta
+        out = self.out
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class TriggerEngine:
+    """Compiled automation triggers with per-trigger cooldowns.
+
+    Each trigger is a dict with 'trigger' and 'response', plus optional
+    'regex' (bool), 'cooldown' and 'delay' (seconds).  Literal triggers are
+    matched case-insensitively through one Aho-Corasick automaton.  Regex
+    triggers without groups share one combined pattern that rejects
+    non-matching lines in a single search; triggers with groups are searched
+    one by one.  Regex responses may use \1 or \g<name> substitutions.
+    """
+
+    def __init__(self, triggers):
+        self.triggers = []
+        literals = []
+        patterns = []
+        for trigger in triggers:
+            text = trigger.get('trigger', '')
+            if not text or not trigger.get('response'):
+                continue
+            index = len(self.triggers)
+            if trigger.get('regex'):
+                try:
+                    compiled = re.compile(text, re.IGNORECASE)
+                except re.error as e:
+                    print(f"Ignoring invalid trigger pattern {text!r}: {e}")
+                    continue
+                patterns.append((index, compiled))
+            else:
+                literals.append((index, text.lower()))
+            self.triggers.append(trigger)
+        self.last_fired = [0.0] * len(self.triggers)
+        self.literals = AhoCorasick(literals) if literals else None
+        # Combining renumbers capture groups, so a back-reference like \1 would
+        # point at another pattern's group; only group-free patterns are combined
+        self.patterns = patterns
+        self.simple_patterns = [(index, compiled) for index, compiled in patterns if not compiled.groups]
+        self.group_patterns = [(index, compiled) for index, compiled in patterns if compiled.groups]
+        self.combined = None
+        if self.simple_patterns:
+            try:
+                self.combined = re.compile(
+                    "|".join(f"(?:{compiled.pattern})" for _, compiled in self.simple_patterns),
+                    re.IGNORECASE)
+            except re.error:
+                pass  # e.g. inline global flags; search them one by one
+
+    def match(self, text, lower=None, now=None):
+        """Return (trigger, response, delay) for every trigger that fires on text."""
+        if lower is None:
+            lower = text.lower()
+        hits = []
+        if self.literals:
+            for index in sorted(self.literals.search(lower)):
+                hits.append((index, self.triggers[index]['response']))
+        # Group-free patterns are only searched when the combined pattern matched
+        patterns = self.group_patterns
+        if self.simple_patterns and (self.combined is None or self.combined.search(text)):
+            patterns = self.patterns
+        for index, compiled in patterns:
+            found = compiled.search(text)
+            if found:
+                response = self.triggers[index]['response']
+                try:
+                    response = found.expand(response)
+                except (re.error, IndexError):
+                    pass
+                hits.append((index, response))
+        if not hits:
+            return []
+
+        now = time.monotonic() if now is None else now
+        fired = []
+        for index, response in hits:
+            trigger = self.triggers[index]
+            cooldown = float(trigger.get('cooldown', TRIGGER_DEFAULT_COOLDOWN) or 0)
+            if self.last_fired[index] and now - self.last_fired[index] < cooldown:
+                continue
+            self.last_fired[index] = now
+            fired.append((trigger, response, float(trigger.get('delay', 0) or 0)))
+        return fired
+
+
+###############################################################################
+#                         Outbound Writer
+###############################################################################
+
+OUTBOUND_RATE_LINES = 10.0   # default sustained send rate per session (0 = unlimited)
+OUTBOUND_BURST_LINES = 10    # lines that may go out back to back before the rate applies
+SEND_LATENCY_SMOOTHING = 0.1 # weight of the newest sample in the average send latency
+
+
+class OutboundWriter:
+    """The single task that writes to a connection, in FIFO order.
+
+    put() may be called from any thread.  Everything queued when the task
+    wakes is joined into one write() and one drain(), subject to a token
+    bucket of `rate` lines per second (bursts of up to `burst`) so automated
+    responses cannot get the session kicked for flooding.  If a write fails
+    the task reports it through on_error(exception) and stops; lines put()
+    while no task is running are dropped.
+    """
+
+    def __init__(self, loop, rate=OUTBOUND_RATE_LINES, burst=OUTBOUND_BURST_LINES, on_error=None):
+        self.loop = loop
+        self.on_error = on_error
+        self.rate = rate
+        self.burst = burst
+        self.queue = deque()   # (text, time queued)
+        self.wake_pending = False
+        self.wake = None
+        self.task = None
+        self.writer = None
+        self.tokens = burst
+        # Metrics
+        self.sent_lines = 0
+        self.sent_bytes = 0
+        self.writes = 0
+        self.last_latency = 0.0
+        self.avg_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def depth(self):
+        """Lines waiting to be written."""
+        return len(self.queue)
+
+    def stats(self):
+        return {
+            'depth': self.depth,
+            'sent_lines': self.sent_lines,
+            'sent_bytes': self.sent_bytes,
+            'writes': self.writes,
+            'last_latency': self.last_latency,
+            'avg_latency': self.avg_latency,
+            'max_latency': self.max_latency,
+        }
+
+    def put(self, text):
+        if self.task is None:
+            return
+        self.queue.append((text, time.perf_counter()))
+        if not self.wake_pending:
+            self.wake_pending = True
+            self.loop.call_soon_threadsafe(self.notify)
+
+    def notify(self):
+        self.wake_pending = False
+        if self.wake is not None:
+            self.wake.set()
+
+    def start(self, writer):
+        """Begin writing to writer; runs on the loop."""
+        self.stop()
+        self.writer = writer
+        self.tokens = self.burst
+        self.wake = asyncio.Event()
+        self.task = self.loop.create_task(self.run())
+
+    def stop(self):
+        """Stop the writer task and drop anything unsent; runs on the loop."""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        self.writer = None
+        self.queue.clear()
+
+    def take(self, count):
+        """Pop count queued lines as one string, recording their latency."""
+        now = time.perf_counter()
+        parts = []
+        for _ in range(count):
+            text, queued = self.queue.popleft()
+            parts.append(text)
+            latency = now - queued
+            self.last_latency = latency
+            self.avg_latency += (latency - self.avg_latency) * SEND_LATENCY_SMOOTHING
+            if latency > self.max_latency:
+                self.max_latency = latency
+        self.sent_lines += count
+        return "".join(parts)
+
+    def flush_now(self):
+        """Write everything queued immediately, ignoring the rate (e.g. before quitting)."""
+        if self.queue and self.writer is not None:
+            data = self.take(len(self.queue))
+            self.writer.write(data)
+            self.sent_bytes += len(data)
+            self.writes += 1
+
+    async def run(self):
+        last = time.monotonic()
+        try:
+            while True:
+                if not self.queue:
+                    self.wake.clear()
+                    if not self.queue:
+                        await self.wake.wait()
+                    continue
+
+                count = len(self.queue)
+                if self.rate > 0:
+                    now = time.monotonic()
+                    self.tokens = min(self.burst, self.tokens + (now - last) * self.rate)
+                    last = now
+                    if self.tokens < 1:
+                        await asyncio.sleep((1 - self.tokens) / self.rate)
+                        continue
+                    count = min(count, int(self.tokens))
+                    self.tokens -= count
+
+                data = self.take(count)
+                self.writer.write(data)
+                await self.writer.drain()
+                self.sent_bytes += len(data)
+                self.writes += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Error sending: {e}")
+            # The connection is unusable; stop rather than let the queue fill
+            self.task = None
+            self.stop()
+            if self.on_error is not None:
+                self.on_error(e)
+
+
+###############################################################################
+#                         Network Service
+###############################################################################
+
+class NetworkService:
+    """One thread owning the asyncio loop for the whole life of the app.
+
+    The service only runs work on the loop: schedule() runs a coroutine,
+    call_later() a delayed callback, and stop() cancels what is left and
+    joins the thread; all three are safe to call from any thread.
+    Connecting, disconnecting and sending belong to BBSSession, which every
+    session does on this shared loop: connect() and replay() go through
+    schedule(), and send() hands text to the session's OutboundWriter,
+    whose put() appends to a deque (appends are atomic, so the Tk thread
+    never takes a lock or touches a writer).
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run, name="network", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def schedule(self, coro):
+        """Run a coroutine on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_later(self, delay, callback, *args):
+        """Run callback on the loop after delay seconds."""
+        self.loop.call_soon_threadsafe(self.loop.call_later, delay, callback, *args)
+
+    def stop(self, timeout=5.0):
+        """Cancel outstanding tasks, stop the loop and wait for the thread."""
+        if not self.thread.is_alive():
+            return
+
+        def shutdown():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.call_soon(self.loop.stop)
+
+        self.loop.call_soon_threadsafe(shutdown)
+        self.thread.join(timeout)
+
+
+###############################################################################
+#                         Inbound Buffering
+###############################################################################
+
+INBOUND_BUFFER_BYTES = 1024 * 1024        # reader pauses when this much is waiting for the UI
+INBOUND_RESUME_BYTES = 256 * 1024         # ... and resumes once the backlog drains below this
+INBOUND_FAST_FORWARD_BYTES = 512 * 1024   # backlog at which fast-forward skips to the last screen
+CLEAR_SCREEN_REGEX = re.compile(r'\x1b\[2J')
+
+
+class InboundBuffer:
+    """Byte-bounded queue between the telnet reader and the Tk thread.
+
+    put() and wait_for_space() run on the asyncio loop; get_nowait() runs on
+    the Tk thread and raises queue.Empty like queue.Queue.  While the backlog
+    is above max_bytes the reader stops calling reader.read(), so TCP flow
+    control throttles the server instead of memory growing.  With fast-forward
+    on, a backlog above fast_forward_bytes is cut to start at the last queued
+    clear-screen, dropping the screens the user would only see flash past.
+    """
+
+    def __init__(self, max_bytes=INBOUND_BUFFER_BYTES, resume_bytes=INBOUND_RESUME_BYTES,
+                 fast_forward_bytes=INBOUND_FAST_FORWARD_BYTES):
+        self.max_bytes = max_bytes
+        self.resume_bytes = resume_bytes
+        self.fast_forward_bytes = fast_forward_bytes
+        self.fast_forward = False
+        self.lock = threading.Lock()
+        self.chunks = deque()
+        self.backlog_bytes = 0
+        self.queued_total = 0  # characters ever put; positions below count from the start
+        self.taken_total = 0   # characters ever taken or dropped
+        self.last_clear = None  # position of the last queued clear-screen
+        self.peak_bytes = 0
+        self.dropped_bytes = 0
+        self.fast_forwards = 0
+        self.paused = False
+        self.loop = None
+        self.space = None
+
+    def put(self, data):
+        # Find the chunk's last clear-screen now, so fast-forwarding never rescans the backlog
+        last = None
+        for last in CLEAR_SCREEN_REGEX.finditer(data):
+            pass
+        with self.lock:
+            if last is not None:
+                self.last_clear = self.queued_total + last.start()
+            self.queued_total += len(data)
+            self.chunks.append(data)
+            self.backlog_bytes += len(data)
+            if self.backlog_bytes > self.peak_bytes:
+                self.peak_bytes = self.backlog_bytes
+
+    async def wait_for_space(self):
+        """Suspend the reader while the backlog is over the limit."""
+        if self.space is None or self.loop is not asyncio.get_running_loop():
+            self.loop = asyncio.get_running_loop()
+            self.space = asyncio.Event()
+        while True:
+            with self.lock:
+                if self.backlog_bytes < self.max_bytes:
+                    return
+                self.paused = True
+                self.space.clear()
+            await self.space.wait()
+
+    def get_nowait(self):
+        """Return the next chunk, fast-forwarding first if enabled and far behind."""
+        with self.lock:
+            if not self.chunks:
+                raise queue.Empty
+            if (self.fast_forward and self.backlog_bytes > self.fast_forward_bytes
+                    and self.last_clear is not None and self.last_clear > self.taken_total):
+                self.skip_to_last_screen()
+            data = self.chunks.popleft()
+            self.backlog_bytes -= len(data)
+            self.taken_total += len(data)
+            if self.paused and self.backlog_bytes <= self.resume_bytes:
+                self.paused = False
+                self.loop.call_soon_threadsafe(self.space.set)
+            return data
+
+    def skip_to_last_screen(self):
+        """Drop queued data before the last clear-screen; the lock must be held.
+
+        Whole chunks before it are dropped and only the chunk holding it is
+        sliced, so the chunks after it are handed out as they were queued.
+        """
+        skip = self.last_clear - self.taken_total
+        while len(self.chunks[0]) <= skip:
+            data = self.chunks.popleft()
+            skip -= len(data)
+            self.discard(len(data))
+        if skip:
+            self.chunks[0] = self.chunks[0][skip:]
+            self.discard(skip)
+        self.fast_forwards += 1
+
+    def discard(self, size):
+        self.backlog_bytes -= size
+        self.taken_total += size
+        self.dropped_bytes += size
+
+    def release(self):
+        """Wake a paused reader, e.g. when disconnecting."""
+        with self.lock:
+            self.paused = False
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.space.set)
+
+
+###############################################################################
+#                         Performance Instrumentation
+###############################################################################
+
+PERF_WINDOW = 30.0           # seconds of samples the histograms cover
+PERF_BUCKETS_PER_OCTAVE = 4  # histogram resolution: ~19% wide buckets
+PERF_BUCKET_COUNT = 28 * PERF_BUCKETS_PER_OCTAVE  # 1 us up to ~4.5 minutes
+PERF_REFRESH_MS = 1000       # performance panel refresh interval
+
+
+class LatencyHistogram:
+    """Log-scaled latency histogram over a rolling window.
+
+    Samples go into the current half-window; when it is older than half of
+    the window it becomes the previous half and a fresh one starts, so the
+    percentiles always cover between half and all of the last `window`
+    seconds.  Adding a sample is one log2 and a list increment.
+    """
+
+    def __init__(self, window=PERF_WINDOW):
+        self.half_window = window / 2
+        self.current = [0] * PERF_BUCKET_COUNT
+        self.previous = [0] * PERF_BUCKET_COUNT
+        self.rotated_at = time.perf_counter()
+        self.total = 0      # samples since creation
+        self.current_max = 0.0   # slowest sample in each half-window
+        self.previous_max = 0.0
+
+    def add(self, seconds, now):
+        if now - self.rotated_at > self.half_window:
+            self.rotate(now)
+        micros = seconds * 1e6
+        index = int(math.log2(micros) * PERF_BUCKETS_PER_OCTAVE) if micros > 1 else 0
+        self.current[min(index, PERF_BUCKET_COUNT - 1)] += 1
+        self.total += 1
+        if seconds > self.current_max:
+            self.current_max = seconds
+
+    def rotate(self, now):
+        if now - self.rotated_at > self.half_window * 2:
+            # Idle for longer than the window: the current half is out of it too
+            self.previous = [0] * PERF_BUCKET_COUNT
+            self.previous_max = 0.0
+        else:
+            self.previous, self.previous_max = self.current, self.current_max
+        self.current = [0] * PERF_BUCKET_COUNT
+        self.current_max = 0.0
+        self.rotated_at = now
+
+    def stale(self):
+        """True when nothing has been recorded for a whole window."""
+        return time.perf_counter() - self.rotated_at > self.half_window * 2
+
+    def percentiles(self, *fractions):
+        """Return the upper bound in seconds of the bucket holding each fraction."""
+        if self.stale():
+            return [0.0 for _ in fractions]
+        counts = [a + b for a, b in zip(self.current, self.previous)]
+        count = sum(counts)
+        results = []
+        for fraction in fractions:
+            if not count:
+                results.append(0.0)
+                continue
+            target = fraction * count
+            seen = 0
+            for index, bucket in enumerate(counts):
+                seen += bucket
+                if seen >= target:
+                    break
+            results.append(2 ** ((index + 1) / PERF_BUCKETS_PER_OCTAVE) / 1e6)
+        return results
+
+    def window_count(self):
+        return 0 if self.stale() else sum(self.current) + sum(self.previous)
+
+    def window_max(self):
+        """The slowest sample in the window, in seconds."""
+        return 0.0 if self.stale() else max(self.current_max, self.previous_max)
+
+
+class PerfMonitor:
+    """Per-stage latency histograms, throughput counters and gauges.
+
+    Hot paths check `enabled` before reading the clock, so a disabled
+    monitor costs one attribute test per call site:
+
+        start = time.perf_counter() if perf.enabled else 0.0
+        ...
+        if start:
+            perf.record("stage", start)
+
+    Stages are recorded from both the network thread and the Tk thread;
+    the unlocked increments can lose a rare sample, which is fine for
+    statistics and keeps the timers cheap.
+    """
+
+    def __init__(self, window=PERF_WINDOW):
+        self.enabled = False
+        self.window = window
+        self.stages = {}    # stage name -> LatencyHistogram
+        self.counters = {}  # name -> running total
+        self.gauges = {}    # name -> callable returning the current value
+        self.rate_mark = (time.perf_counter(), {})
+
+    def record(self, stage, start):
+        """Add the time since start (a perf_counter value) to stage's histogram."""
+        now = time.perf_counter()
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram(self.window)
+        histogram.add(now - start, now)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_gauge(self, name, func):
+        self.gauges[name] = func
+
+    def reset(self):
+        self.stages = {}
+        self.counters = {}
+        self.rate_mark = (time.perf_counter(), {})
+
+    def snapshot(self):
+        """Current rates, gauges and per-stage percentiles as a JSON-ready dict.
+
+        Rates are per second since the previous snapshot.
+        """
+        now = time.perf_counter()
+        mark_time, mark_counts = self.rate_mark
+        elapsed = max(now - mark_time, 1e-9)
+        counters = dict(self.counters)
+        self.rate_mark = (now, counters)
+        stages = {}
+        for name, histogram in sorted(self.stages.items()):
+            p50, p99 = histogram.percentiles(0.50, 0.99)
+            stages[name] = {
+                'samples': histogram.window_count(),
+                'total': histogram.total,
+                'p50_ms': round(p50 * 1000, 3),
+                'p99_ms': round(p99 * 1000, 3),
+                'max_ms': round(histogram.window_max() * 1000, 3),
+            }
+        gauges = {}
+        for name, func in self.gauges.items():
+            try:
+                gauges[name] = func()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'enabled': self.enabled,
+            'window_seconds': self.window,
+            'rates': {name: round((total - mark_counts.get(name, 0)) / elapsed, 1)
+                      for name, total in sorted(counters.items())},
+            'totals': counters,
+            'gauges': gauges,
+            'stages': stages,
+        }
+
+    def export(self, path):
+        """Write a snapshot to path as JSON."""
+        with open(path, "w") as file:
+            json.dump(self.snapshot(), file, indent=2)
+
+
+###############################################################################
+#                         Session Recording
+###############################################################################
+
+RECORDING_MAGIC = b"BBSREC1\n"
+RECORDING_FRAME = struct.Struct("<dI")  # seconds since recording start, payload length
+RECORDINGS_DIR = "recordings"
+
+
+class SessionRecorder:
+    """Append every chunk received from the BBS to a compact binary file.
+
+    The file is RECORDING_MAGIC followed by one frame per chunk: a
+    RECORDING_FRAME header (monotonic offset from the start of the
+    recording and payload length) and the chunk as UTF-8.  Like ttyrec,
+    replaying the frames at their offsets reproduces the session exactly
+    as the parser saw it.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(RECORDING_MAGIC)
+        self.start = time.monotonic()
+        self.chunks = 0
+        self.bytes = 0
+
+    def write(self, data):
+        payload = data.encode("utf-8", errors="surrogatepass")
+        self.file.write(RECORDING_FRAME.pack(time.monotonic() - self.start, len(payload)))
+        self.file.write(payload)
+        self.chunks += 1
+        self.bytes += len(payload)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def read_recording(path):
+    """Yield (offset_seconds, text) for every chunk in a SessionRecorder file."""
+    with open(path, "rb") as file:
+        if file.read(len(RECORDING_MAGIC)) != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a session recording")
+        while True:
+            header = file.read(RECORDING_FRAME.size)
+            if len(header) < RECORDING_FRAME.size:
+                return  # end of file, or a frame cut short by a crash
+            offset, length = RECORDING_FRAME.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                return
+            yield offset, payload.decode("utf-8", errors="surrogatepass")
+
+
+def recording_path(host, port):
+    """Default file name for a new recording of host:port."""
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(RECORDINGS_DIR, f"{host}_{port}_{stamp}.bbsrec")
+
+
+###############################################################################
+#                         BBS Session
+###############################################################################
+
+KEEP_ALIVE_INTERVAL = 60    # seconds between keep-alive <ENTER>s
+LOGON_REPLY_DELAY = 0.5     # seconds to wait before answering a logon prompt
+MEMBER_STOPWORDS = {'in', 'the', 'chat', 'general', 'channel', 'topic', 'majorlink'}
+
+
+class SessionEvent:
+    """Base class for everything a BBSSession reports to its subscribers."""
+
+    __slots__ = ()
+
+
+class Connected(SessionEvent):
+    __slots__ = ('host', 'port')
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+
+class Disconnected(SessionEvent):
+    __slots__ = ()
+
+
+class TerminalLine(SessionEvent):
+    """A line for the main terminal; line is its LineEvent classification."""
+
+    __slots__ = ('parsed', 'line')
+
+    def __init__(self, parsed, line):
+        self.parsed = parsed
+        self.line = line
+
+
+class DirectedMessage(SessionEvent):
+    """A message whispered or sent to you."""
+
+    __slots__ = ('sender', 'message', 'line')
+
+    def __init__(self, sender, message, line):
+        self.sender = sender
+        self.message = message
+        self.line = line
+
+
+class MembersChanged(SessionEvent):
+    __slots__ = ('members',)
+
+    def __init__(self, members):
+        self.members = members
+
+
+class ActionsChanged(SessionEvent):
+    __slots__ = ('actions',)
+
+    def __init__(self, actions):
+        self.actions = actions
+
+
+class LinksStored(SessionEvent):
+    __slots__ = ('links',)
+
+    def __init__(self, links):
+        self.links = links  # StoredLink rows, new or with their counts updated
+
+
+def load_triggers_file(state):
+    """Load triggers from triggers.json, or return an empty list."""
+    # Older versions saved all ten fixed rows, blank ones included
+    return [trigger for trigger in state.load("triggers.json", []) if trigger.get('trigger')]
+
+
+class BBSSession:
+    """The protocol side of one BBS connection, independent of any UI.
+
+    A session connects through a NetworkService, parses and classifies what
+    the BBS sends, tracks chat members and the action list, answers logon
+    prompts and triggers, and writes chat to the chatlog.  Everything a UI
+    needs is reported as SessionEvent objects to the callbacks registered
+    with subscribe().  Connected/Disconnected are emitted on the network
+    loop and line events on whichever thread calls feed().
+
+    By default received data is fed straight to the parser on the network
+    loop (headless use).  A UI passes on_data to take the data onto its own
+    thread, and inbound (an InboundBuffer) to pause reading while it is
+    behind.
+    """
+
+    def __init__(self, network, chatlog_store, retention=None, on_data=None, inbound=None,
+                 members_key=None, state=None, perf=None):
+        self.network = network
+        self.state = state or JsonStateStore()
+        self.perf = perf or PerfMonitor()
+        self.outbound = OutboundWriter(network.loop,
+                                       on_error=lambda e: self.status(f"Error sending: {e}\n"))
+        self.connection = None  # concurrent Future of the running connection task
+        self.task = None        # asyncio Task of the latest run, set on the loop
+        self.chatlog_store = chatlog_store
+        self.retention = retention
+        self.on_data = on_data or self.feed
+        self.inbound = inbound
+        self.subscribers = []
+
+        # Connection settings
+        self.term = "ansi"
+        self.cols = 136  # Set the number of columns
+        self.rows = 50   # Set the number of rows
+
+        # Logon automation
+        self.logon_automation = False
+        self.username = ""
+        self.password = ""
+
+        # Telnet references
+        self.reader = None
+        self.writer = None
+        self.stop_event = threading.Event()  # signals the reader to stop
+        self.connected = False
+        self.disconnecting = False
+        self.keep_alive_task = None
+        self.recorder = None  # SessionRecorder while recording inbound data
+        self.persist = True   # False while replaying: chat, links and members are not saved
+
+        # Streaming ANSI parser; holds partial lines and colour state between reads
+        self.ansi_parser = AnsiParser()
+        self.trigger_engine = TriggerEngine([])
+
+        # Chat members; the member file is keyed by "host:port" and last_seen
+        # is shared by every session using the same state store
+        self.members_key = members_key
+        self.chat_members = self.load_chat_members_file()
+        self.last_seen = self.load_last_seen_file()
+        self.user_list_buffer = []
+        self.collecting_users = False
+
+        # Action list
+        self.actions = []
+        self.collecting_actions = False
+
+        # Throughput counters
+        self.bytes_received = 0
+        self.lines_parsed = 0
+
+    def subscribe(self, callback):
+        """Call callback(event) for every SessionEvent."""
+        self.subscribers.append(callback)
+
+    def emit(self, event):
+        for callback in self.subscribers:
+            callback(event)
+
+    def detach(self):
+        """Stop calling back into the UI; later data and events are dropped.
+
+        A UI shutting down calls this before it waits on close(), so the
+        loop never waits on a Tk thread that is itself waiting on the loop.
+        """
+        self.subscribers = []
+        self.on_data = lambda data: None
+
+    def set_triggers(self, triggers):
+        self.trigger_engine = TriggerEngine(triggers)
+
+    # Connection
+    def connect(self, host, port, record_path=None):
+        """Start connecting on the network thread; returns the connection future.
+
+        With record_path, every received chunk is also written there as a
+        session recording.
+        """
+        key = f"{host}:{port}"
+        if key != self.members_key:
+            self.members_key = key
+            self.chat_members = self.load_chat_members_file()
+            self.emit(MembersChanged(set(self.chat_members)))
+        self.disconnect()
+        self.connection = self.network.schedule(self.start(self.run(host, port, record_path), True))
+        return self.connection
+
+    def replay(self, path, speed=1.0, persist=False):
+        """Feed a session recording through the pipeline instead of a connection.
+
+        speed scales the recorded timing (2.0 plays twice as fast); 0 or
+        less feeds the chunks as fast as the consumer takes them.  Unless
+        persist is set, replayed chat, links and members are shown but not
+        saved, so playback never adds to the user's history.  Returns the
+        replay future; disconnect() stops it.
+        """
+        self.disconnect()
+        self.connection = self.network.schedule(self.start(self.play(path, speed), persist))
+        return self.connection
+
+    async def start(self, coro, persist):
+        """Run coro as the session's connection once the previous one has closed.
+
+        A cancelled run still logs off in its finally block, which sets
+        stop_event and clears the writer; starting the next run before that
+        finishes would let the old close() end the new connection.
+        """
+        previous, self.task = self.task, asyncio.current_task()
+        try:
+            # disconnect() has already cancelled it; a second cancel would
+            # interrupt its close() half way through logging off
+            if previous is not None and not previous.done():
+                await asyncio.wait([previous])
+        except asyncio.CancelledError:
+            coro.close()
+            raise
+        self.stop_event.clear()
+        self.persist = persist
+        await coro
+
+    def disconnect(self):
+        """Cancel the connection task; its own cleanup logs off and closes the socket."""
+        if self.connection and not self.connection.done():
+            self.connection.cancel()
+
+    def status(self, text):
+        """Report a status line through the same path as received data."""
+        self.on_data(text)
+
+    async def run(self, host, port, record_path=None):
+        """Connect via telnetlib3 (CP437 + ANSI) and read until disconnected."""
+        try:
+            reader, writer = await telnetlib3.open_connection(
+                host=host,
+                port=port,
+                term=self.term,
+                encoding='cp437',  # Use 'latin1' if your BBS uses it
+                cols=self.cols,    # Use the configured number of columns
+                rows=self.rows     # Use the configured number of rows
+            )
+        except Exception as e:
+            self.status(f"Connection failed: {e}\n")
+            return
+
+        self.reader = reader
+        self.writer = writer
+        self.outbound.start(writer)
+        self.connected = True
+        self.emit(Connected(host, port))
+        self.status(f"Connected to {host}:{port}\n")
+        if record_path:
+            try:
+                self.recorder = SessionRecorder(record_path)
+                self.status(f"Recording to {record_path}\n")
+            except OSError as e:
+                self.status(f"Could not start recording: {e}\n")
+
+        perf = self.perf
+        try:
+            while not self.stop_event.is_set():
+                if self.inbound is not None:
+                    # Stop reading while the UI is behind; TCP throttles the server
+                    await self.inbound.wait_for_space()
+                start = time.perf_counter() if perf.enabled else 0.0
+                data = await reader.read(4096)
+                if not data:
+                    break
+                if start:
+                    # Time spent waiting on the server; near zero when we are the bottleneck
+                    perf.record("read_wait", start)
+                    perf.count("bytes", len(data))
+                self.bytes_received += len(data)
+                if self.recorder:
+                    self.recorder.write(data)
+                self.on_data(data)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.status(f"Error reading from server: {e}\n")
+        finally:
+            if self.recorder:
+                self.recorder.close()
+                self.recorder = None
+            await self.close()
+
+    async def play(self, path, speed=1.0):
+        """Feed a recording to on_data with its original timing scaled by speed."""
+        self.status(f"Replaying {path}\n")
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        chunks = 0
+        try:
+            for offset, data in read_recording(path):
+                if self.stop_event.is_set():
+                    break
+                if speed > 0:
+                    delay = start + offset / speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if self.inbound is not None:
+                    await self.inbound.wait_for_space()
+                elif chunks % 64 == 0:
+                    await asyncio.sleep(0)  # let the loop breathe at max speed
+                if self.perf.enabled:
+                    self.perf.count("bytes", len(data))
+                self.bytes_received += len(data)
+                self.on_data(data)
+                chunks += 1
+        except asyncio.CancelledError:
+            self.status("Replay stopped\n")
+            raise
+        except (OSError, ValueError) as e:
+            self.status(f"Replay failed: {e}\n")
+            return
+        self.status(f"Replay finished: {chunks} chunks in {loop.time() - start:.1f}s\n")
+
+    async def close(self):
+        """Log off, close the connection and stop the keep-alive; runs on the loop."""
+        if not self.connected or self.disconnecting:
+            return
+
+        self.disconnecting = True
+        try:
+            self.stop_event.set()
+            self.stop_keep_alive()
+
+            # Clear the members list before disconnecting
+            self.clear_members()
+
+            if self.writer:
+                try:
+                    # Send disconnect command if still connected, after anything queued
+                    try:
+                        self.outbound.flush_now()
+                        self.writer.write('quit\r\n')
+                        await self.writer.drain()
+                    except Exception:
+                        pass  # Ignore errors during quit command
+
+                    # Close the writer
+                    if not self.writer.is_closing():
+                        self.writer.close()
+                        # Some telnet writers may not have wait_closed
+                        if hasattr(self.writer, 'wait_closed'):
+                            try:
+                                await self.writer.wait_closed()
+                            except Exception as e:
+                                print(f"Warning: Error during wait_closed: {e}")
+                        else:
+                            # Give the writer a moment to finish closing
+                            await asyncio.sleep(0.1)
+                except Exception as e:
+                    print(f"Warning: Error closing writer: {e}")
+
+            # Mark the connection as closed
+            self.connected = False
+            self.outbound.stop()
+            self.reader = None
+            self.writer = None
+            self.emit(Disconnected())
+            self.status("Disconnected from BBS.\n")
+        finally:
+            self.disconnecting = False
+
+    # Sending
+    def send(self, text):
+        """Send raw text if connected; written in order by the outbound writer."""
+        if self.connected and self.writer:
+            self.outbound.put(text)
+
+    def send_line(self, message, delay=0):
+        """Send message plus CR LF, optionally after a delay."""
+        if self.connected and self.writer:
+            message = message + "\r\n"
+            if delay > 0:
+                self.network.call_later(delay, self.send, message)
+            else:
+                self.outbound.put(message)
+
+    async def keep_alive(self):
+        """Send an <ENTER> keystroke every KEEP_ALIVE_INTERVAL seconds."""
+        while True:
+            self.send("\r\n")
+            await asyncio.sleep(KEEP_ALIVE_INTERVAL)
+
+    def start_keep_alive(self):
+        if self.keep_alive_task is None or self.keep_alive_task.done():
+            self.keep_alive_task = self.network.schedule(self.keep_alive())
+
+    def stop_keep_alive(self):
+        if self.keep_alive_task:
+            self.keep_alive_task.cancel()
+            self.keep_alive_task = None
+
+    # Receiving
+    def feed(self, data):
+        """Parse received data and process each complete line."""
+        perf = self.perf
+        start = time.perf_counter() if perf.enabled else 0.0
+        lines = self.ansi_parser.feed(data)
+        self.process_lines(lines)
+        if start:
+            perf.record("feed", start)
+            perf.count("lines", len(lines))
+
+    def process_lines(self, lines):
+        """Classify parsed lines and act on them: banners, actions, chat, triggers."""
+        skip_display = False  # Flag to track if we're in a banner section
+
+        for parsed in lines:
+            self.lines_parsed += 1
+            # Escapes are already stripped; classify the line once
+            event = classify_line(parsed.text)
+            clean_line = event.text
+            kind = event.kind
+
+            # --- Filter header lines ---
+            if self.collecting_users:
+                self.user_list_buffer.append(parsed.text)
+                if "are here with you." in clean_line:
+                    self.update_chat_members(self.user_list_buffer)
+                    self.collecting_users = False
+                    self.user_list_buffer = []
+                    skip_display = False  # End of banner section
+                    continue
+                skip_display = True  # Skip displaying banner content
+                continue
+
+            if kind == LINE_BANNER_START:
+                self.user_list_buffer = [parsed.text]
+                self.collecting_users = True
+                skip_display = True  # Start of banner section
+                continue
+
+            # Skip displaying banner-related lines
+            if kind == LINE_BANNER:
+                continue
+
+            # --- Process directed messages ---
+            if kind == LINE_DIRECTED:
+                # Save to chatlog and check for hyperlinks
+                self.save_chat_event(event)
+                self.emit(DirectedMessage(event.sender, event.message, event))
+                # Directed messages show in the main terminal as well
+                self.emit(TerminalLine(parsed, event))
+                continue
+
+            # --- Detect and update Action List ---
+            if kind == LINE_ACTIONS:
+                self.actions = []
+                self.collecting_actions = True
+                # Immediately send Enter keystroke when we start collecting actions
+                self.send("\r\n")
+                continue
+            if clean_line == ":" and self.collecting_actions:
+                self.collecting_actions = False
+                self.emit(ActionsChanged(list(self.actions)))
+                continue
+            if self.collecting_actions:
+                self.actions.extend(clean_line.split())
+                continue
+
+            # Only display the line if it's not part of the banner and not empty
+            if not skip_display and kind != LINE_EMPTY:
+                self.emit(TerminalLine(parsed, event))
+                self.check_triggers(event)
+                if self.logon_automation:
+                    self.detect_logon_prompt(event)
+                if kind == LINE_CHAT:
+                    self.save_chat_event(event)
+
+    def detect_logon_prompt(self, event):
+        """Simple triggers to automate login."""
+        lower_line = event.lower
+        # Typical BBS prompts
+        if "enter your password:" in lower_line:
+            self.send_line(self.password, LOGON_REPLY_DELAY)
+        elif "type it in and press enter" in lower_line or 'otherwise type "new":' in lower_line:
+            self.send_line(self.username, LOGON_REPLY_DELAY)
+
+    def check_triggers(self, event):
+        """Check incoming messages for triggers and send automated responses if matched."""
+        for trigger, response, delay in self.trigger_engine.match(event.text, event.lower):
+            self.send_line(response, delay)
+
+    # Chatlog and hyperlinks
+    def save_chat_event(self, event):
+        """Save a classified chat message with a timestamp and store its hyperlinks."""
+        line = event.text
+        ts = None
+        if not line.startswith('['):
+            ts, timestamp = chatlog_timestamp()
+            line = timestamp + line
+        self.save_chatlog_message(event.sender, line, ts, event.chatlog_kind)
+        if event.urls:
+            self.store_hyperlinks(event.urls, event.sender)
+
+    def save_chatlog_message(self, username, message, ts=None, kind=None):
+        """Save a message to the chatlog."""
+        if not self.persist:
+            return
+        start = time.perf_counter() if self.perf.enabled else 0.0
+        self.chatlog_store.append(username, message, kind=kind, ts=ts)
+        if start:
+            self.perf.record("chatlog_write", start)
+
+        # Hand off to the retention thread if the size cap is exceeded
+        if self.retention and self.retention.over_limit():
+            self.retention.request()
+
+    def store_hyperlinks(self, urls, sender=None):
+        """Store extracted hyperlinks; repeats of a stored link only bump its count."""
+        if not self.persist:
+            return
+        start = time.perf_counter() if self.perf.enabled else 0.0
+        links = self.chatlog_store.links.add(urls, sender)
+        if start:
+            self.perf.record("links_write", start)
+        self.emit(LinksStored(links))
+
+    # Chat members
+    def clear_members(self):
+        """Clear the active chat members list but preserve last seen timestamps."""
+        self.chat_members = set()
+        self.save_chat_members_file()
+        self.emit(MembersChanged(set()))
+
+    def update_chat_members(self, lines_with_users):
+        """Update the chat members from the lines of a room banner."""
+        combined = " ".join(lines_with_users)
+        combined_clean = re.sub(r'\x1b\[[0-9;]*m', '', combined)
+        print(f"[DEBUG] Raw banner: {combined_clean}")
+
+        # Extract all usernames from the banner
+        user_section = ""
+        if "You are in" in combined_clean and "are here with you" in combined_clean:
+            # Extract everything between "Topic:" and "are here with you"
+            match = re.search(r'Topic:.*?(?=\s+are here with you\.)', combined_clean, re.DOTALL)
+            if match:
+                user_section = match.group(0)
+                # Remove the Topic line and any parenthetical content
+                user_section = re.sub(r'Topic:.*?\n', '\n', user_section, flags=re.DOTALL)
+                user_section = re.sub(r'\(.*?\)', '', user_section)
+
+        # Get all usernames including the last one
+        final_usernames = set()
+
+        # First, get all the comma-separated usernames
+        usernames = re.findall(r'([A-Za-z][A-Za-z0-9._]+)@?[\w.]*(?:,|\s+and\s+|$)', user_section)
+
+        # Process each username
+        for username in usernames:
+            username = username.strip()
+            if (len(username) >= 2 and
+                username.lower() not in MEMBER_STOPWORDS and
+                re.match(r'^[A-Za-z][A-Za-z0-9._]*$', username)):
+                final_usernames.add(username)
+
+        # Also check for any remaining "and Username" pattern
+        last_user_match = re.search(r'and\s+([A-Za-z][A-Za-z0-9._]+)\s+are here', combined_clean)
+        if last_user_match:
+            final_usernames.add(last_user_match.group(1))
+
+        print(f"[DEBUG] Extracted usernames: {final_usernames}")
+        self.chat_members = final_usernames
+
+        # Update last seen timestamps
+        current_time = int(time.time())
+        for member in self.chat_members:
+            self.last_seen[member.lower()] = current_time
+        self.save_last_seen_file()
+
+        # Save the chat members to file
+        self.save_chat_members_file()
+        self.emit(MembersChanged(set(final_usernames)))
+
+    def read_chat_members_file(self):
+        """Return chat_members.json as a dict of "host:port" -> member list."""
+        data = self.state.load("chat_members.json", {})
+        # Older versions stored a single list for the one session
+        return data if isinstance(data, dict) else {None: data}
+
+    def load_chat_members_file(self):
+        """Load this session's chat members, or return an empty set if not found."""
+        members = self.read_chat_members_file()
+        return set(members.get(self.members_key or "", members.get(None, [])))
+
+    def save_chat_members_file(self):
+        """Save the current chat members set under this session's key."""
+        if not self.persist:
+            return
+        members = {key: names for key, names in self.read_chat_members_file().items() if key is not None}
+        members[self.members_key or ""] = list(self.chat_members)
+        self.state.save("chat_members.json", members)
+
+    def load_last_seen_file(self):
+        """Load last seen timestamps from last_seen.json, or return an empty dictionary if not found."""
+        return self.state.load("last_seen.json", {})
+
+    def save_last_seen_file(self):
+        """Save the current last seen timestamps to last_seen.json."""
+        if not self.persist:
+            return
+        self.state.save("last_seen.json", self.last_seen)
+
+
+###############################################################################
+#                         Terminal Rendering
+###############################################################################
+
+# Sustained rate the batched renderer is expected to hold during a flood
+RENDER_TARGET_LINES_PER_SEC = 20000
+
+# Longest a single queue drain may run before yielding to Tk events (< one 60 Hz frame)
+DRAIN_TIME_BUDGET = 0.012
+
+SCROLLBACK_LINES = 5000       # default lines kept in the terminal panes (0 = unlimited)
+SCROLLBACK_TRIM_CHUNK = 500   # lines allowed over the limit before trimming from the top
+
+URL_REGEX = re.compile(r'(https?://\S+)')
+
+ANSI_TAG_POOL_SIZE = 512  # most distinct attribute tags kept configured at once
+
+# The 16 basic ANSI colours; blue is lightened so it stays readable on black
+ANSI_PALETTE_16 = [
+    'black', 'red', 'green', 'yellow', '#3399FF', 'magenta', 'cyan', 'white',
+    '#808080', '#FF5555', '#55FF55', '#FFFF55', '#66B2FF', '#FF55FF', '#55FFFF', '#FFFFFF',
+]
+ANSI_CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+
+
+def ansi_color(color):
+    """Resolve a parser colour (palette index or '#rrggbb') to a Tk colour."""
+    if isinstance(color, str):
+        return color
+    if color < 16:
+        return ANSI_PALETTE_16[color]
+    if color < 232:
+        color -= 16
+        return "#%02x%02x%02x" % (ANSI_CUBE_LEVELS[color // 36],
+                                  ANSI_CUBE_LEVELS[(color // 6) % 6],
+                                  ANSI_CUBE_LEVELS[color % 6])
+    level = 8 + (color - 232) * 10
+    return "#%02x%02x%02x" % (level, level, level)
+
+
+class AnsiTagPool:
+    """Interns ANSI attribute combinations as Tk tags.
+
+    A tag is configured once, the first time its (fg, bg, flags) combination
+    is drawn, and then reused for every later run with the same attributes.
+    The pool is LRU-bounded; when it overflows, the least recently used tag
+    that no longer covers any text is deleted (trimmed scrollback frees them).
+    Runs are tagged when they are queued but inserted later, so eviction is
+    left to the TextBatch, which runs it only after a flush has put every
+    queued tag into the widget.
+    """
+
+    def __init__(self, widget, default_fg="white", default_bg="black",
+                 max_tags=ANSI_TAG_POOL_SIZE):
+        self.widget = widget
+        self.default_fg = default_fg
+        self.default_bg = default_bg
+        self.max_tags = max_tags
+        self.tags = OrderedDict()  # attr -> tag name
+        self.counter = itertools.count()
+
+    def tag_for(self, attr):
+        """Return the tag for attr, creating it on first use."""
+        tag = self.tags.get(attr)
+        if tag is not None:
+            self.tags.move_to_end(attr)
+            return tag
+        if attr == DEFAULT_ATTR:
+            tag = "normal"
+        else:
+            tag = f"ansi{next(self.counter)}"
+            self.widget.tag_configure(tag, **self.tag_options(attr))
+            # Keep hyperlinks styled on top of any colour
+            self.widget.tag_raise("hyperlink")
+        self.tags[attr] = tag
+        return tag
+
+    def tag_options(self, attr):
+        fg, bg, flags = attr
+        if flags & ATTR_BOLD:
+            # BBS convention: bold selects the bright half of the palette
+            if fg is None:
+                fg = 15
+            elif isinstance(fg, int) and fg < 8:
+                fg += 8
+        fg = ansi_color(fg) if fg is not None else self.default_fg
+        bg = ansi_color(bg) if bg is not None else None
+        if flags & ATTR_REVERSE:
+            fg, bg = bg or self.default_bg, fg
+        if flags & ATTR_CONCEAL:
+            fg = bg or self.default_bg
+        options = {'foreground': fg}
+        if bg is not None:
+            options['background'] = bg
+        if flags & ATTR_UNDERLINE:
+            options['underline'] = True
+        if flags & ATTR_STRIKE:
+            options['overstrike'] = True
+        return options
+
+    def evict(self):
+        """Drop least recently used tags that no longer cover any text."""
+        if len(self.tags) <= self.max_tags:
+            return
+        for attr in list(itertools.islice(self.tags, len(self.tags) - self.max_tags + 16)):
+            if len(self.tags) <= self.max_tags:
+                break
+            tag = self.tags[attr]
+            if tag == "normal" or self.widget.tag_nextrange(tag, "1.0"):
+                self.tags.move_to_end(attr)
+                continue
+            del self.tags[attr]
+            self.widget.tag_delete(tag)
+
+
+class TextBatch:
+    """Collects (text, tags) runs for a Text widget and inserts them in one call.
+
+    Tk re-lays out and redraws the widget after every insert, so a flood of
+    per-line inserts spends its time redrawing.  Runs queued during one drain
+    of the message queue are inserted together with a single state toggle and
+    a single scroll to the end.
+
+    The widget is also kept to max_lines of scrollback: once it grows a full
+    trim chunk past the limit, the oldest lines are deleted in one go, which
+    drops their tag ranges (colours, hyperlinks) along with the text.
+    """
+
+    def __init__(self, widget, max_lines=SCROLLBACK_LINES, trim_chunk=SCROLLBACK_TRIM_CHUNK,
+                 tag_pool=None):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.trim_chunk = trim_chunk
+        self.tag_pool = tag_pool  # AnsiTagPool whose tags the queued runs use
+        self.runs = []
+        self.lines = 0
+
+    def add(self, text, tags):
+        """Queue one run of text with its tags."""
+        self.runs.append(text)
+        self.runs.append(tags)
+
+    def flush(self):
+        """Insert every queued run. Returns the number of lines drawn."""
+        if not self.runs:
+            return 0
+        runs, self.runs = self.runs, []
+        lines, self.lines = self.lines, 0
+        self.widget.configure(state=tk.NORMAL)
+        self.widget.insert(tk.END, *runs)
+        self.trim()
+        if self.tag_pool is not None:
+            # Only now does every tag the runs used cover its text
+            self.tag_pool.evict()
+        self.widget.see(tk.END)
+        self.widget.configure(state=tk.DISABLED)
+        return lines
+
+    def trim(self):
+        """Delete lines from the top once the widget is a chunk over max_lines."""
+        if not self.max_lines:
+            return
+        line_count = int(self.widget.index("end-1c").split(".")[0])
+        excess = line_count - self.max_lines
+        if excess >= self.trim_chunk:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+
+
+###############################################################################
+#                         Link Previews
+###############################################################################
+
+PREVIEW_CACHE_DIR = "preview_cache"
+PREVIEW_MEMORY_BYTES = 32 * 1024 * 1024   # decoded thumbnails kept in memory
+PREVIEW_DISK_BYTES = 64 * 1024 * 1024     # encoded thumbnails kept on disk
+PREVIEW_FRESH_SECONDS = 3600              # cached previews used without revalidating
+PREVIEW_NEGATIVE_SECONDS = 600            # failures remembered before trying again
+PREVIEW_THUMBNAIL_SIZE = (200, 150)
+PREVIEW_FAVICON_SIZE = (32, 32)
+PREVIEW_TIMEOUT = 5
+PREVIEW_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+PREVIEW_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+PREVIEW_WORKERS = 4          # preview lookups running at once
+PREVIEW_PER_HOST = 2         # of which against any one host
+PREVIEW_HOVER_DELAY_MS = 300  # hover this long before a preview is fetched
+
+
+class Preview:
+    """A decoded link preview: thumbnail frames (none for text only) and a caption."""
+
+    __slots__ = ('frames', 'durations', 'caption', 'expires')
+
+    def __init__(self, frames=(), durations=(), caption="", expires=0.0):
+        self.frames = list(frames)        # PIL images; more than one is an animation
+        self.durations = list(durations)  # milliseconds per frame
+        self.caption = caption
+        self.expires = expires            # time.time() after which it is looked up again
+
+    @property
+    def size(self):
+        return sum(frame.width * frame.height * 4 for frame in self.frames) + 64
+
+
+class PreviewCache:
+    """Two-tier cache of link previews keyed by canonical_url().
+
+    The first tier is a size-bounded LRU of decoded thumbnails, so hovering
+    back over a link shows its preview without any I/O.  The second is a
+    directory of encoded thumbnails (PNG, or GIF for animations), each with
+    a JSON sidecar holding the source URL, its ETag / Last-Modified and when
+    it was last checked.  A preview older than PREVIEW_FRESH_SECONDS is
+    revalidated with a conditional GET; a 304, or no network at all, keeps
+    using the cached file.  Failures are cached as text-only previews for
+    PREVIEW_NEGATIVE_SECONDS.  The same limits apply to the memory tier: an
+    expired entry is a miss there, and get() revalidates it.  The disk tier
+    keeps a running total of its size and is trimmed, least recently used
+    first, to PREVIEW_DISK_BYTES once the total goes over.
+
+    get() does network and disk I/O and is meant for worker threads; cached()
+    only looks at memory and is cheap enough for the Tk thread.
+    """
+
+    def __init__(self, directory=PREVIEW_CACHE_DIR, memory_bytes=PREVIEW_MEMORY_BYTES,
+                 disk_bytes=PREVIEW_DISK_BYTES, http=None):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.http = http or requests
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # canonical url -> Preview
+        self.memory_used = 0
+        self.disk_used = None  # bytes in the directory; measured on first write
+
+    def key(self, url):
+        return hashlib.sha1(canonical_url(url).encode('utf-8')).hexdigest()
+
+    def cached(self, url):
+        """Return the in-memory preview for url, or None if it is missing or expired."""
+        key = self.key(url)
+        with self.lock:
+            preview = self.memory.get(key)
+            if preview is None or preview.expires <= time.time():
+                return None
+            self.memory.move_to_end(key)
+            return preview
+
+    def get(self, url):
+        """Return the preview for url from memory, disk or the network."""
+        preview = self.cached(url)
+        if preview is not None:
+            return preview
+        key = self.key(url)
+        meta = self.read_meta(key)
+        now = time.time()
+        if meta is not None:
+            if now < preview_expiry(meta):
+                preview = self.load(key, meta)
+                if preview is not None:
+                    return self.remember(key, preview)
+
+        try:
+            preview = self.fetch(url, key, meta)
+        except Exception as e:
+            print(f"DEBUG: Preview error: {e}")
+            if meta is not None and not meta.get('negative'):
+                # Offline or the server failed: a stale preview beats none
+                preview = self.load(key, meta)
+                if preview is not None:
+                    # Try the network again soon rather than after a full refresh period
+                    preview.expires = now + PREVIEW_NEGATIVE_SECONDS
+                    return self.remember(key, preview)
+            preview = Preview(caption="Preview not available")
+            self.store(key, {'url': url, 'negative': True}, preview)
+        return self.remember(key, preview)
+
+    def fetch(self, url, key, meta):
+        """Fetch url's preview, revalidating the cached copy when there is one."""
+        source = meta.get('source') if meta and not meta.get('negative') else None
+        if source is None:
+            if url.lower().endswith(PREVIEW_IMAGE_EXTENSIONS):
+                source = url
+            else:
+                # Only read the headers to tell an image from a page
+                with self.http.get(url, headers=PREVIEW_HEADERS, timeout=PREVIEW_TIMEOUT,
+                                   stream=True) as response:
+                    content_type = response.headers.get("Content-Type", "").lower()
+                    if "image" in content_type:
+                        response.raise_for_status()
+                        return self.store_image(url, key, url, response, favicon=False)
+                parsed_url = urllib.parse.urlparse(url)
+                source = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
+        favicon = source != url
+
+        headers = dict(PREVIEW_HEADERS)
+        if meta and not meta.get('negative'):
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        response = self.http.get(source, headers=headers, timeout=PREVIEW_TIMEOUT)
+        if response.status_code == 304:
+            meta['checked'] = time.time()
+            preview = self.load(key, meta)
+            if preview is not None:
+                self.write_meta(key, meta)
+                return preview
+            response = self.http.get(source, headers=PREVIEW_HEADERS, timeout=PREVIEW_TIMEOUT)
+        if favicon and response.status_code != 200:
+            # No favicon: the domain name is the preview
+            preview = Preview(caption=urllib.parse.urlparse(url).netloc)
+            self.store(key, {'url': url, 'negative': True}, preview)
+            return preview
+        response.raise_for_status()
+        return self.store_image(url, key, source, response, favicon)
+
+    def store_image(self, url, key, source, response, favicon):
+        """Decode a downloaded image into a thumbnail preview and cache it."""
+        image = Image.open(BytesIO(response.content))
+        caption = urllib.parse.urlparse(url).netloc if favicon else ""
+        if favicon:
+            frames = [image.convert("RGBA").resize(PREVIEW_FAVICON_SIZE, Image.Resampling.LANCZOS)]
+            durations = [0]
+        else:
+            frames, durations = thumbnail_frames(image)
+        preview = Preview(frames, durations, caption)
+        self.store(key, {
+            'url': url,
+            'source': source,
+            'etag': response.headers.get("ETag"),
+            'last_modified': response.headers.get("Last-Modified"),
+        }, preview)
+        return preview
+
+    def remember(self, key, preview):
+        """Put a preview in the memory tier, evicting least recently used ones."""
+        with self.lock:
+            old = self.memory.pop(key, None)
+            if old is not None:
+                self.memory_used -= old.size
+            self.memory[key] = preview
+            self.memory_used += preview.size
+            while self.memory_used > self.memory_bytes and len(self.memory) > 1:
+                _, evicted = self.memory.popitem(last=False)
+                self.memory_used -= evicted.size
+        return preview
+
+    # Disk tier
+    def path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def read_meta(self, key):
+        try:
+            with open(self.path(key, ".json"), "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def write_meta(self, key, meta):
+        self.write_file(self.path(key, ".json"), json.dumps(meta))
+
+    def write_file(self, path, data):
+        """Atomically replace a cache file, keeping disk_used up to date."""
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        if isinstance(data, bytes):
+            atomic_write_bytes(path, data)
+        else:
+            atomic_write_text(path, data)
+        size = os.path.getsize(path)
+        with self.lock:
+            if self.disk_used is not None:
+                self.disk_used += size - old_size
+
+    def store(self, key, meta, preview):
+        """Write the preview's encoded thumbnail and its sidecar to the disk tier."""
+        meta['checked'] = time.time()
+        meta['caption'] = preview.caption
+        preview.expires = preview_expiry(meta)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if self.disk_used is None:
+                self.disk_used = self.measure_disk()
+            if preview.frames:
+                buffer = BytesIO()
+                if len(preview.frames) > 1:
+                    meta['format'] = "gif"
+                    preview.frames[0].save(buffer, format="GIF", save_all=True,
+                                           append_images=preview.frames[1:],
+                                           duration=preview.durations, loop=0)
+                else:
+                    meta['format'] = "png"
+                    preview.frames[0].save(buffer, format="PNG")
+                self.write_file(self.path(key, ".img"), buffer.getvalue())
+            self.write_meta(key, meta)
+            if self.disk_used > self.disk_bytes:
+                self.trim_disk()
+        except OSError as e:
+            print(f"DEBUG: Could not cache preview: {e}")
+
+    def load(self, key, meta):
+        """Decode a preview from the disk tier, or None if its file is gone."""
+        if not meta.get('format'):
+            return Preview(caption=meta.get('caption', ""))
+        path = self.path(key, ".img")
+        try:
+            image = Image.open(path)
+            frames, durations = [], []
+            for index in range(getattr(image, "n_frames", 1)):
+                image.seek(index)
+                frames.append(image.convert("RGBA"))
+                durations.append(image.info.get("duration", 100))
+            os.utime(path)  # recently used: keep it through the next trim
+        except (OSError, ValueError, EOFError):
+            return None
+        return Preview(frames, durations, meta.get('caption', ""), preview_expiry(meta))
+
+    def disk_entries(self):
+        """Return (mtime, size, path) for every file in the cache directory."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                pass  # removed by another thread's trim
+        return entries
+
+    def measure_disk(self):
+        return sum(size for _, size, _ in self.disk_entries())
+
+    def trim_disk(self):
+        """Delete least recently used files until the directory fits PREVIEW_DISK_BYTES."""
+        entries = self.disk_entries()
+        used = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if used <= self.disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+        self.disk_used = used
+
+
+def preview_expiry(meta):
+    """When a cached preview with this sidecar needs looking up again."""
+    ttl = PREVIEW_NEGATIVE_SECONDS if meta.get('negative') else PREVIEW_FRESH_SECONDS
+    return meta.get('checked', 0) + ttl
+
+
+def thumbnail_frames(image):
+    """Return an image's frames shrunk to PREVIEW_THUMBNAIL_SIZE, with their durations."""
+    frames, durations = [], []
+    for index in range(getattr(image, "n_frames", 1) if getattr(image, "is_animated", False) else 1):
+        image.seek(index)
+        frame = image.convert("RGBA")
+        frame.thumbnail(PREVIEW_THUMBNAIL_SIZE)
+        frames.append(frame)
+        durations.append(image.info.get("duration", 100))
+    return frames, durations
+
+
+def preview_http_session(pool_size=PREVIEW_WORKERS):
+    """A requests.Session whose keep-alive connections are shared by preview fetches."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(PREVIEW_HEADERS)
+    return session
+
+
+class PreviewFetcher:
+    """Look up previews on a small thread pool, at most per_host at a time per host.
+
+    Hovering over a column of links must not start a download per link, so
+    lookups share PREVIEW_WORKERS threads.  A lookup only reaches the pool
+    once its host has a free slot; until then it waits in a per-host queue,
+    so a slow host cannot tie up workers that other hosts could use.
+    Hovering over a link whose lookup is already queued or running joins
+    that lookup instead of starting another.  A lookup still queued when the
+    pointer leaves is cancelled.  One already running finishes and fills the
+    cache, but the caller ignores its result.
+    """
+
+    def __init__(self, cache, workers=PREVIEW_WORKERS, per_host=PREVIEW_PER_HOST):
+        self.cache = cache
+        self.per_host = per_host
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+        self.lock = threading.Lock()
+        self.active = {}   # netloc -> lookups running against it
+        self.waiting = {}  # netloc -> deque of (url, Future) waiting for a slot
+        self.pending = {}  # url -> Future
+        self.closed = False
+
+    def submit(self, url):
+        """Return a concurrent.futures.Future resolving to url's Preview."""
+        with self.lock:
+            future = self.pending.get(url)
+            if future is not None and not future.cancelled():
+                return future
+            future = Future()
+            self.pending[url] = future
+            host = urllib.parse.urlparse(url).netloc.lower()
+            if self.closed:
+                future.cancel()
+            elif self.active.get(host, 0) < self.per_host:
+                self.start(host, url, future)
+            else:
+                self.waiting.setdefault(host, deque()).append((url, future))
+        future.add_done_callback(functools.partial(self.finished, url))
+        return future
+
+    def start(self, host, url, future):
+        """Hand a lookup to the pool unless it was cancelled; the lock must be held."""
+        if not future.set_running_or_notify_cancel():
+            return False
+        self.active[host] = self.active.get(host, 0) + 1
+        self.executor.submit(self.lookup, host, url, future)
+        return True
+
+    def lookup(self, host, url, future):
+        try:
+            preview = self.cache.get(url)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(preview)
+        finally:
+            self.release(host)
+
+    def release(self, host):
+        """Free a host slot and start the host's next queued lookup that wasn't cancelled."""
+        with self.lock:
+            self.active[host] -= 1
+            if not self.active[host]:
+                del self.active[host]
+            waiting = self.waiting.get(host)
+            while waiting and not self.closed:
+                url, future = waiting.popleft()
+                if self.start(host, url, future):
+                    break
+            if not waiting:
+                self.waiting.pop(host, None)
+
+    def finished(self, url, future):
+        with self.lock:
+            if self.pending.get(url) is future:
+                del self.pending[url]
+
+    def shutdown(self):
+        """Drop queued lookups; running ones finish in the background."""
+        with self.lock:
+            self.closed = True
+            waiting = [future for queued in self.waiting.values() for _, future in queued]
+            self.waiting.clear()
+        for future in waiting:
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 
 ###############################################################################
 #                         BBS Telnet App (No Chatbot)
 ###############################################################################
 
+class SessionTab:
+    """One connection in the terminal notebook.
+
+    Each tab has its own session (parser, triggers, members), inbound buffer,
+    terminal widget, render batch and tag pool; the network loop and the
+    chatlog store are shared.  Lines arriving while the tab is not selected
+    are parked in `pending`, bounded by the scrollback limit, and inserted in
+    one batch when it is selected.
+    """
+
+    def __init__(self, frame, widget, scrollbar, max_lines=SCROLLBACK_LINES):
+        self.frame = frame
+        self.widget = widget
+        self.scrollbar = scrollbar
+        self.tags = AnsiTagPool(widget)
+        self.batch = TextBatch(widget, max_lines, tag_pool=self.tags)
+        self.pending = deque(maxlen=max_lines or None)
+        self.inbound = InboundBuffer()
+        self.session = None
+        self.title = "New Session"
+        self.drain_lock = threading.Lock()
+        self.drain_scheduled = False
+        self.queued_at = 0.0  # perf_counter when a drain was requested (instrumentation only)
+
+
 class BBSTerminalApp:
     def __init__(self, master):
         # 1.0️⃣ 🎉 SETUP
         self.master = master
         self.master.title("Retro BBS Terminal")
 
+        # JSON settings and state are cached here and written behind
+        self.state = JsonStateStore()
+        self.state.start()
+
         # Load saved font settings or use defaults
         saved_font_settings = self.load_font_settings()
         self.font_name = tk.StringVar(value=saved_font_settings.get('font_name', "Courier New"))
@@ -53,8 +3133,10 @@ class BBSTerminalApp:
         self.logon_automation_enabled = tk.BooleanVar(value=False)
         self.auto_login_enabled = tk.BooleanVar(value=False)
 
-        # A queue to pass incoming telnet data => main thread
-        self.msg_queue = queue.Queue()
+        # Each tab passes incoming telnet data => main thread through its own
+        # byte-bounded buffer; the reader wakes the Tk thread only when it
+        # enqueues, and only once per pending drain
+        self.fast_forward_enabled = tk.BooleanVar(value=False)
 
         # Terminal font
         self.font_name = tk.StringVar(value="Courier New")
@@ -63,46 +3145,77 @@ class BBSTerminalApp:
         # Terminal mode (ANSI or something else)
         self.terminal_mode = tk.StringVar(value="ANSI")
 
-        # Telnet references
-        self.reader = None
-        self.writer = None
-        self.stop_event = threading.Event()  # signals background thread to stop
-        self.connected = False
-
-        # Buffer for partial lines
-        self.partial_line = ""
 
         # Keep-Alive
-        self.keep_alive_stop_event = threading.Event()
-        self.keep_alive_task = None
         self.keep_alive_enabled = tk.BooleanVar(value=False)
 
-        # Our own event loop for asyncio
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
+        # Record inbound data of new connections to RECORDINGS_DIR
+        self.record_sessions = tk.BooleanVar(value=False)
+
+        # One network thread owns the asyncio loop for the app's lifetime
+        self.network = NetworkService()
+        self.network.start()
+        self.send_rate_limit = tk.DoubleVar(value=OUTBOUND_RATE_LINES)
+
+        # Per-stage latency instrumentation, enabled while the panel is shown
+        self.perf = PerfMonitor()
+        self.perf.add_gauge("inbound_bytes", lambda: sum(tab.inbound.backlog_bytes for tab in self.tabs))
+        self.perf.add_gauge("outbound_lines", lambda: sum(tab.session.outbound.depth for tab in self.tabs))
+        self.perf.add_gauge("sessions", lambda: len(self.tabs))
+        self.show_performance = tk.BooleanVar(value=False)
+        self.performance_window = None
 
         # Favorites
         self.favorites = self.load_favorites()
         self.favorites_window = None
 
+        # Chatlog storage and retention
+        self.chatlog_store = ChatlogStore()
+        self.chatlog_retention = ChatlogRetention(
+            self.chatlog_store,
+            max_bytes=int(self.chatlog_store.get_meta('max_bytes', CHATLOG_MAX_BYTES)),
+            max_age_days=int(self.chatlog_store.get_meta('max_age_days', 0)))
+        self.chatlog_limit_mb = tk.IntVar(value=self.chatlog_retention.max_bytes // (1024 * 1024))
+        self.chatlog_keep_days = tk.IntVar(value=self.chatlog_retention.max_age_days)
+        self.chatlog_retention.start()
+
+        # Session tabs; each tab's protocol core parses on the Tk thread through
+        # the tab's inbound buffer and reports back as session events.  The
+        # attributes below always point at the selected tab's objects.
+        self.tabs = []
+        self.active_tab = None
+        self.session = None
+        self.inbound = None
+        self.terminal_display = None
+        self.terminal_scrollbar = None
+        self.terminal_batch = None
+        self.ansi_tags = None
+        self.session_handlers = {
+            Connected: self.on_session_connected,
+            Disconnected: self.on_session_disconnected,
+            TerminalLine: self.on_terminal_line,
+            DirectedMessage: self.on_directed_message,
+            MembersChanged: self.on_members_changed,
+            ActionsChanged: self.on_actions_changed,
+            LinksStored: self.on_links_stored,
+        }
+
         # Triggers
         self.triggers = self.load_triggers()
         self.triggers_window = None
+        self.trigger_edits = []  # working copy while the triggers window is open
         self.chatlog_window = None
 
         self.last_message_info = None  # will hold (sender, recipient) of the last parsed message
 
         # Chat members
-        self.chat_members = self.load_chat_members_file()
-        self.last_seen = self.load_last_seen_file()
-
-        self.user_list_buffer = []
-        self.collecting_users = False
-
-        self.cols = 136  # Set the number of columns
-        self.rows = 50   # Set the number of rows
+        self.displayed_members = None
 
         self.preview_window = None  # Initialize the preview_window attribute
+        self.preview_cache = PreviewCache(http=preview_http_session())
+        self.preview_fetcher = PreviewFetcher(self.preview_cache)
+        self.preview_after = None   # pending hover delay
+        self.preview_future = None  # lookup for the preview being shown
 
         # Variables to track visibility of sections
         self.show_connection_settings = tk.BooleanVar(value=True)
@@ -110,18 +3223,22 @@ class BBSTerminalApp:
         self.show_password = tk.BooleanVar(value=True)
         self.show_all = tk.BooleanVar(value=True)
 
-        # Action list
-        self.actions = []
-        self.collecting_actions = False
+        # Frame-coalesced rendering (batches are created in build_ui)
+        self.directed_batch = None
+        self.render_flush_pending = False
+        self.render_stats = {'lines': 0, 'frames': 0, 'seconds': 0.0}
+        self.scrollback_lines = tk.IntVar(value=self.load_scrollback_lines())
 
         # 1.2️⃣ 🎉 BUILD UI
         self.build_ui()
+        self.add_session_tab(f"{self.host.get()}:{self.port.get()}")
 
-        # Periodically check for incoming telnet data
-        self.master.after(100, self.process_incoming_messages)
+        # Keep the session's logon settings in step with the UI
+        for var in (self.username, self.password, self.logon_automation_enabled, self.auto_login_enabled):
+            var.trace_add("write", lambda *args: self.sync_session_settings())
 
-        # Start the periodic task to refresh chat members
-        self.master.after(5000, self.refresh_chat_members)
+        # Show the members remembered from the last session
+        self.update_members_display()
 
     def build_ui(self):
         """Creates all the frames and widgets for the UI."""
@@ -206,6 +3323,18 @@ class BBSTerminalApp:
         keep_alive_check = ttk.Checkbutton(self.conn_frame, text="Keep Alive", variable=self.keep_alive_enabled, command=self.toggle_keep_alive)
         keep_alive_check.grid(row=0, column=8, padx=5, pady=5)
 
+        # Session tab buttons
+        new_tab_button = ttk.Button(self.conn_frame, text="New Tab", command=self.add_session_tab)
+        new_tab_button.grid(row=0, column=9, padx=5, pady=5)
+        close_tab_button = ttk.Button(self.conn_frame, text="Close Tab", command=self.close_session_tab)
+        close_tab_button.grid(row=0, column=10, padx=5, pady=5)
+
+        # Session recording and replay
+        record_check = ttk.Checkbutton(self.conn_frame, text="Record", variable=self.record_sessions)
+        record_check.grid(row=0, column=11, padx=5, pady=5)
+        replay_button = ttk.Button(self.conn_frame, text="Replay", command=self.replay_recording)
+        replay_button.grid(row=0, column=12, padx=5, pady=5)
+
         # Checkbox frame for visibility toggles
         checkbox_frame = ttk.Frame(top_frame)
         checkbox_frame.grid(row=2, column=0, columnspan=5, sticky="ew", padx=5, pady=5)
@@ -221,6 +3350,10 @@ class BBSTerminalApp:
         # Checkbox to show/hide Password
         password_check = ttk.Checkbutton(checkbox_frame, text="Show Password", variable=self.show_password, command=self.toggle_password)
         password_check.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+
+        # Checkbox to show/hide the performance panel
+        performance_check = ttk.Checkbutton(checkbox_frame, text="Show Performance", variable=self.show_performance, command=self.toggle_performance_panel)
+        performance_check.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
         
         # Username frame
         self.username_frame = ttk.LabelFrame(top_frame, text="Username")
@@ -257,16 +3390,10 @@ class BBSTerminalApp:
         self.output_frame = ttk.LabelFrame(self.paned, text="BBS Output")
         self.paned.add(self.output_frame)
         self.paned.paneconfig(self.output_frame, minsize=200)  # Set minimum size for the top pane
-        self.terminal_display = tk.Text(self.output_frame, wrap=tk.WORD, state=tk.DISABLED, bg="black", font=("Courier New", 10))
-        self.terminal_display.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-        scroll_bar = ttk.Scrollbar(self.output_frame, command=self.terminal_display.yview)
-        scroll_bar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.terminal_display.configure(yscrollcommand=self.on_scroll_change)
-        self.define_ansi_tags()
-        self.terminal_display.tag_configure("hyperlink", foreground="blue", underline=True)
-        self.terminal_display.tag_bind("hyperlink", "<Button-1>", self.open_hyperlink)
-        self.terminal_display.tag_bind("hyperlink", "<Enter>", self.show_thumbnail_preview)
-        self.terminal_display.tag_bind("hyperlink", "<Leave>", self.hide_thumbnail_preview)
+        # One tab per session; the terminal widgets are created by add_session_tab
+        self.terminal_notebook = ttk.Notebook(self.output_frame)
+        self.terminal_notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.terminal_notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         
         # Bottom pane: Messages to You
         messages_frame = ttk.LabelFrame(self.paned, text="Messages to You")
@@ -274,6 +3401,7 @@ class BBSTerminalApp:
         self.paned.paneconfig(messages_frame, minsize=100)  # Set minimum size for the bottom pane
         self.directed_msg_display = tk.Text(messages_frame, wrap=tk.WORD, state=tk.DISABLED, bg="lightyellow", font=("Courier New", 10, "bold"))
         self.directed_msg_display.pack(fill=tk.BOTH, expand=True)
+        self.directed_batch = TextBatch(self.directed_msg_display, self.scrollback_lines.get())
         self.directed_msg_display.tag_configure("hyperlink", foreground="blue", underline=True)
         self.directed_msg_display.tag_bind("hyperlink", "<Button-1>", self.open_directed_message_hyperlink)
         self.directed_msg_display.tag_bind("hyperlink", "<Enter>", self.show_directed_message_thumbnail_preview)
@@ -421,6 +3549,7 @@ class BBSTerminalApp:
         """Select the specified user in the chatlog listbox."""
         for i in range(self.chatlog_listbox.size()):
             if self.chatlog_listbox.get(i) == username:
+                self.chatlog_listbox.selection_clear(0, tk.END)
                 self.chatlog_listbox.selection_set(i)
                 self.chatlog_listbox.see(i)
                 self.display_chatlog_messages(None)
@@ -542,6 +3671,30 @@ class BBSTerminalApp:
         ttk.Checkbutton(settings_win, variable=self.auto_login_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
         row_index += 1
 
+        # Scrollback
+        ttk.Label(settings_win, text="Scrollback Lines (0 = unlimited):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.scrollback_lines, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Chatlog retention
+        ttk.Label(settings_win, text="Chatlog Limit (MB):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.chatlog_limit_mb, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        ttk.Label(settings_win, text="Keep Chatlog Days (0 = forever):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.chatlog_keep_days, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Outbound rate limit
+        ttk.Label(settings_win, text="Send Rate (lines/s, 0 = unlimited):").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(settings_win, textvariable=self.send_rate_limit, width=8).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
+        # Inbound backlog
+        ttk.Label(settings_win, text="Fast-forward When Behind:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Checkbutton(settings_win, variable=self.fast_forward_enabled).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        row_index += 1
+
         # Save Button
         save_button = ttk.Button(settings_win, text="Save", command=lambda: self.save_settings(settings_win))
         save_button.grid(row=row_index, column=0, columnspan=2, pady=10)
@@ -549,8 +3702,53 @@ class BBSTerminalApp:
     def save_settings(self, window):
         """Called when user clicks 'Save' in the settings window."""
         self.update_display_font()
+        self.update_scrollback()
+        self.update_chatlog_retention()
+        for tab in self.tabs:
+            tab.inbound.fast_forward = self.fast_forward_enabled.get()
+        self.update_send_rate()
         window.destroy()
 
+    def update_send_rate(self):
+        """Apply the outbound rate limit from the settings window to every session."""
+        try:
+            rate = max(0.0, float(self.send_rate_limit.get()))
+        except (tk.TclError, ValueError) as e:
+            print(f"Error reading send rate setting: {e}")
+            return
+        for tab in self.tabs:
+            tab.session.outbound.rate = rate
+
+    def update_scrollback(self):
+        """Apply the scrollback limit to the terminal and directed message panes."""
+        try:
+            max_lines = max(0, self.scrollback_lines.get())
+        except tk.TclError as e:
+            print(f"Error reading scrollback setting: {e}")
+            return
+        self.save_scrollback_lines(max_lines)
+        for tab in self.tabs:
+            tab.pending = deque(tab.pending, maxlen=max_lines or None)
+        for batch in [tab.batch for tab in self.tabs] + [self.directed_batch]:
+            batch.max_lines = max_lines
+            batch.widget.configure(state=tk.NORMAL)
+            batch.trim()
+            batch.widget.configure(state=tk.DISABLED)
+
+    def update_chatlog_retention(self):
+        """Apply and persist the chatlog size/age limits from the settings window."""
+        try:
+            max_bytes = max(0, self.chatlog_limit_mb.get()) * 1024 * 1024
+            max_age_days = max(0, self.chatlog_keep_days.get())
+        except tk.TclError as e:
+            print(f"Error reading chatlog retention settings: {e}")
+            return
+        self.chatlog_retention.max_bytes = max_bytes
+        self.chatlog_retention.max_age_days = max_age_days
+        self.chatlog_store.set_meta('max_bytes', max_bytes)
+        self.chatlog_store.set_meta('max_age_days', max_age_days)
+        self.chatlog_retention.request()
+
     def update_display_font(self):
         """Update all text widgets' fonts with current settings."""
         try:
@@ -559,7 +3757,8 @@ class BBSTerminalApp:
                 'fg': self.current_font_settings.get('fg', 'white'),
                 'bg': self.current_font_settings.get('bg', 'black')
             }
-            self.terminal_display.configure(**font_settings)
+            for tab in self.tabs:
+                tab.widget.configure(**font_settings)
             self.directed_msg_display.configure(**font_settings)
             self.members_listbox.configure(**font_settings)
             self.actions_listbox.configure(**font_settings)
@@ -567,47 +3766,14 @@ class BBSTerminalApp:
             print(f"Error updating display font: {e}")
 
     # 1.4️⃣ ANSI PARSING
-    def define_ansi_tags(self):
-        """Define text tags for basic ANSI foreground colors (30-37, 90-97) and custom colors."""
-        self.terminal_display.tag_configure("normal", foreground="white")
-
-        color_map = {
-            '30': 'black',
-            '31': 'red',
-            '32': 'green',
-            '33': 'yellow',
-            '34': 'blue',
-            '35': 'magenta',
-            '36': 'cyan',
-            '37': 'white',
-            '90': 'bright_black',
-            '91': 'bright_red',
-            '92': 'bright_green',
-            '93': 'bright_yellow',
-            '94': 'bright_blue',
-            '95': 'bright_magenta',
-            '96': 'bright_cyan',
-            '97': 'bright_white',
-            '38': 'grey'  # Custom tag for grey color
-        }
-
-        for code, tag in color_map.items():
-            if tag == 'blue':
-                # Use a lighter blue instead of the default dark blue
-                self.terminal_display.tag_configure(tag, foreground="#3399FF")
-            elif tag == 'grey':
-                # Set grey color to a visible shade
-                self.terminal_display.tag_configure(tag, foreground="#B0B0B0")
-            elif tag.startswith("bright_"):
-                base_color = tag.split("_", 1)[1]
-                self.terminal_display.tag_configure(tag, foreground=base_color)
-            else:
-                self.terminal_display.tag_configure(tag, foreground=tag)
+    def define_ansi_tags(self, widget):
+        """Define the default text tag; ANSI attribute tags are created on demand by AnsiTagPool."""
+        widget.tag_configure("normal", foreground="white")
 
     # 1.5️⃣ CONNECT / DISCONNECT
     def toggle_connection(self):
-        """Connect or disconnect from the BBS."""
-        if self.connected:
+        """Connect or disconnect the selected tab's session."""
+        if self.session.connected:
             self.connect_button.configure(style="Disconnect.TButton")
             self.send_custom_message('=x')
         else:
@@ -615,270 +3781,240 @@ class BBSTerminalApp:
             self.start_connection()
 
     def start_connection(self):
-        """Start the telnetlib3 client in a background thread."""
+        """Start the selected session's telnetlib3 client on the network thread."""
         host = self.host.get()
         port = self.port.get()
-        self.stop_event.clear()
-
-        def run_telnet():
-            asyncio.set_event_loop(self.loop)
-            self.loop.run_until_complete(self.telnet_client_task(host, port))
-
-        thread = threading.Thread(target=run_telnet, daemon=True)
-        thread.start()
+        self.sync_session_settings()
+        if self.remember_username.get():
+            self.save_username()
+        if self.remember_password.get():
+            self.save_password()
+        self.set_tab_title(self.active_tab, f"{host}:{port}")
+        record_path = recording_path(host, port) if self.record_sessions.get() else None
+        self.session.connect(host, port, record_path)
         self.append_terminal_text(f"Connecting to {host}:{port}...\n", "normal")
         self.start_keep_alive()
 
-    async def telnet_client_task(self, host, port):
-        """Async function connecting via telnetlib3 (CP437 + ANSI)."""
-        try:
-            reader, writer = await telnetlib3.open_connection(
-                host=host,
-                port=port,
-                term=self.terminal_mode.get().lower(),
-                encoding='cp437',  # Use 'latin1' if your BBS uses it
-                cols=self.cols,    # Use the configured number of columns
-                rows=self.rows     # Use the configured number of rows
-            )
-        except Exception as e:
-            self.msg_queue.put_nowait(f"Connection failed: {e}\n")
+    def replay_recording(self):
+        """Play a session recording into the selected tab, or a new one if it is connected."""
+        path = filedialog.askopenfilename(
+            title="Replay Recording", initialdir=RECORDINGS_DIR if os.path.isdir(RECORDINGS_DIR) else ".",
+            filetypes=[("Session recordings", "*.bbsrec"), ("All files", "*.*")])
+        if not path:
             return
-
-        self.reader = reader
-        self.writer = writer
-        self.connected = True
-        self.connect_button.config(text="Disconnect")
-        self.msg_queue.put_nowait(f"Connected to {host}:{port}\n")
-
-        try:
-            while not self.stop_event.is_set():
-                data = await reader.read(4096)
-                if not data:
-                    break
-                self.msg_queue.put_nowait(data)
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            self.msg_queue.put_nowait(f"Error reading from server: {e}\n")
-        finally:
-            await self.disconnect_from_bbs()
-
-    async def disconnect_from_bbs(self):
-        """Stop the background thread and close connections."""
-        if not self.connected or getattr(self, '_disconnecting', False):
+        speed = simpledialog.askfloat("Replay Speed", "Speed (1 = real time, 0 = as fast as possible):",
+                                      initialvalue=1.0, minvalue=0.0, parent=self.master)
+        if speed is None:
             return
+        title = f"Replay: {os.path.basename(path)}"
+        if self.session.connected:
+            self.add_session_tab(title)
+        else:
+            self.set_tab_title(self.active_tab, title)
+        self.session.replay(path, speed)
+
+    def sync_session_settings(self):
+        """Copy connection and logon settings from the UI to the selected session."""
+        self.session.term = self.terminal_mode.get().lower()
+        self.session.username = self.username.get()
+        self.session.password = self.password.get()
+        self.session.logon_automation = self.auto_login_enabled.get() or self.logon_automation_enabled.get()
+
+    # Session tabs
+    def add_session_tab(self, title="New Session"):
+        """Open a new terminal tab with its own session and select it."""
+        frame = ttk.Frame(self.terminal_notebook)
+        widget = tk.Text(frame, wrap=tk.WORD, state=tk.DISABLED, bg="black", font=("Courier New", 10))
+        widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar = ttk.Scrollbar(frame, command=widget.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Only move the scrollbar; the batched renderer scrolls to the end once per frame
+        widget.configure(yscrollcommand=scrollbar.set)
+        self.define_ansi_tags(widget)
+        widget.tag_configure("hyperlink", foreground="blue", underline=True)
+        widget.tag_bind("hyperlink", "<Button-1>", self.open_hyperlink)
+        widget.tag_bind("hyperlink", "<Enter>", self.show_thumbnail_preview)
+        widget.tag_bind("hyperlink", "<Leave>", self.hide_thumbnail_preview)
+        widget.configure(
+            font=(self.font_name.get(), self.font_size.get()),
+            fg=self.current_font_settings.get('fg', 'white'),
+            bg=self.current_font_settings.get('bg', 'black'))
+
+        tab = SessionTab(frame, widget, scrollbar, self.scrollback_lines.get())
+        tab.title = title
+        tab.inbound.fast_forward = self.fast_forward_enabled.get()
+        tab.session = BBSSession(self.network, self.chatlog_store, self.chatlog_retention,
+                                 on_data=lambda data: self.enqueue_incoming(tab, data),
+                                 inbound=tab.inbound, members_key=title, state=self.state,
+                                 perf=self.perf)
+        tab.session.outbound.rate = self.send_rate_limit.get()
+        tab.session.set_triggers(self.triggers)
+        tab.session.subscribe(lambda event: self.on_session_event(tab, event))
+        self.tabs.append(tab)
+        self.terminal_notebook.add(frame, text=title)
+        self.terminal_notebook.select(frame)
+        self.select_tab(tab)
+        return tab
+
+    def close_session_tab(self):
+        """Disconnect and remove the selected tab; the last tab stays open."""
+        if len(self.tabs) < 2:
+            return
+        tab = self.active_tab
+        # The session's own close() still reports back; the tab won't be there to show it
+        tab.session.detach()
+        if tab.session.connected:
+            tab.session.disconnect()
+        tab.session.stop_keep_alive()
+        self.tabs.remove(tab)
+        self.terminal_notebook.forget(tab.frame)
+        tab.frame.destroy()
+        self.select_tab(self.tab_for_frame(self.terminal_notebook.select()))
+
+    def tab_for_frame(self, frame_name):
+        for tab in self.tabs:
+            if str(tab.frame) == str(frame_name):
+                return tab
+        return None
 
-        self._disconnecting = True
-        try:
-            self.stop_event.set()
-            self.stop_keep_alive()
-            
-            # Clear the members list before disconnecting
-            self.clear_chat_members()
+    def on_tab_changed(self, event):
+        tab = self.tab_for_frame(self.terminal_notebook.select())
+        if tab is not None and tab is not self.active_tab:
+            self.select_tab(tab)
+
+    def select_tab(self, tab):
+        """Point the UI at tab's session and draw the lines it received while hidden."""
+        if self.active_tab is not None and self.terminal_batch is not None:
+            self.flush_render()
+        self.active_tab = tab
+        self.session = tab.session
+        self.inbound = tab.inbound
+        self.terminal_display = tab.widget
+        self.terminal_scrollbar = tab.scrollbar
+        self.terminal_batch = tab.batch
+        self.ansi_tags = tab.tags
+
+        if tab.pending:
+            for parsed in tab.pending:
+                self.append_terminal_line(parsed)
+            tab.pending.clear()
+            self.flush_render()
+        self.set_tab_title(tab, tab.title)
+        self.connect_button.config(text="Disconnect" if tab.session.connected else "Connect")
+        if ":" in tab.title and tab.session.connected:
+            host, port = tab.title.rsplit(":", 1)
+            self.host.set(host)
+            self.port.set(int(port))
+        self.sync_session_settings()
+        self.update_members_display()
+        self.update_actions_listbox()
 
-            if self.writer:
-                try:
-                    # Send disconnect command if still connected
-                    try:
-                        self.writer.write('quit\r\n')
-                        await self.writer.drain()
-                    except Exception:
-                        pass  # Ignore errors during quit command
-                    
-                    # Close the writer
-                    if not self.writer.is_closing():
-                        self.writer.close()
-                        # Some telnet writers may not have wait_closed
-                        if hasattr(self.writer, 'wait_closed'):
-                            try:
-                                await self.writer.wait_closed()
-                            except Exception as e:
-                                print(f"Warning: Error during wait_closed: {e}")
-                        else:
-                            # Give the writer a moment to finish closing
-                            await asyncio.sleep(0.1)
-                except Exception as e:
-                    print(f"Warning: Error closing writer: {e}")
+    def set_tab_title(self, tab, title, unread=False):
+        tab.title = title
+        self.terminal_notebook.tab(tab.frame, text=f"* {title}" if unread else title)
 
-            # Mark the connection as closed
-            self.connected = False
-            self.reader = None
-            self.writer = None
+    # Session events
+    def on_session_event(self, tab, event):
+        """Run the handler for a tab's session event on the Tk thread."""
+        handler = self.session_handlers.get(type(event))
+        if handler is None:
+            return
+        if threading.current_thread() is threading.main_thread():
+            if tab in self.tabs:
+                handler(tab, event)
+        else:
+            self.master.after_idle(self.on_session_event, tab, event)
 
-            def update_connect_button():
-                if self.connect_button and self.connect_button.winfo_exists():
-                    self.connect_button.config(text="Connect")
-            if threading.current_thread() is threading.main_thread():
-                update_connect_button()
-            else:
-                self.master.after_idle(update_connect_button)
+    def on_session_connected(self, tab, event):
+        if tab is self.active_tab:
+            self.connect_button.config(text="Disconnect")
 
-            self.msg_queue.put_nowait("Disconnected from BBS.\n")
-        finally:
-            self._disconnecting = False
+    def on_session_disconnected(self, tab, event):
+        if tab is self.active_tab and self.connect_button and self.connect_button.winfo_exists():
+            self.connect_button.config(text="Connect")
 
-    def clear_chat_members(self):
-        """Clear the active chat members list but preserve last seen timestamps."""
-        self.chat_members = set()
-        self.save_chat_members_file()
-        self.update_members_display()
+    def on_terminal_line(self, tab, event):
+        if tab is self.active_tab:
+            self.append_terminal_line(event.parsed)
+        else:
+            # Hidden tabs skip rendering until selected
+            if not tab.pending:
+                self.set_tab_title(tab, tab.title, unread=True)
+            tab.pending.append(event.parsed)
+        if event.line.kind == LINE_CHAT:
+            # Play ding sound for any message
+            self.play_ding_sound()
+
+    def on_directed_message(self, tab, event):
+        prefix = f"[{tab.title}] " if len(self.tabs) > 1 else ""
+        self.append_directed_message(f"{prefix}From {event.sender}: {event.message}\n")
+        self.play_ding_sound()
+
+    def on_members_changed(self, tab, event):
+        if tab is self.active_tab:
+            self.update_members_display()
+
+    def on_actions_changed(self, tab, event):
+        if tab is self.active_tab:
+            self.update_actions_listbox()
+
+    def on_links_stored(self, tab, event):
+        # Update links display if window is open
+        if self.chatlog_window and self.chatlog_window.winfo_exists():
+            self.add_links_to_panel(event.links)
 
     # 1.6️⃣ MESSAGES
-    def process_incoming_messages(self):
-        """Check the queue for data and parse lines for display."""
+    def enqueue_incoming(self, tab, data):
+        """Queue data for the Tk thread and wake it unless a drain is already pending."""
+        tab.inbound.put(data)
+        with tab.drain_lock:
+            if tab.drain_scheduled:
+                return
+            tab.drain_scheduled = True
+            if self.perf.enabled:
+                tab.queued_at = time.perf_counter()
+        self.master.after_idle(self.process_incoming_messages, tab)
+
+    def process_incoming_messages(self, tab):
+        """Drain a tab's queued data within a time budget and parse lines for display."""
+        if tab not in self.tabs:
+            return  # Closed while a drain was pending
+        with tab.drain_lock:
+            tab.drain_scheduled = False
+            queued_at, tab.queued_at = tab.queued_at, 0.0
+        if queued_at and self.perf.enabled:
+            # How long data waited for the Tk thread to wake up
+            self.perf.record("queue_wait", queued_at)
+        deadline = time.perf_counter() + DRAIN_TIME_BUDGET
         try:
             while True:
-                data = self.msg_queue.get_nowait()
-                self.process_data_chunk(data)
+                fast_forwards = tab.inbound.fast_forwards
+                data = tab.inbound.get_nowait()
+                if tab.inbound.fast_forwards != fast_forwards:
+                    # The parser's partial line belongs to a screen that was skipped
+                    tab.session.ansi_parser.discard_partial()
+                tab.session.feed(data)
+                if time.perf_counter() > deadline:
+                    break
         except queue.Empty:
-            pass
-        finally:
-            self.master.after(100, self.process_incoming_messages)
-
-    def process_data_chunk(self, data):
-        """Accumulate data, split on newlines, and process each complete line."""
-        # Normalize newlines
-        data = data.replace('\r\n', '\n').replace('\r', '\n')
-        self.partial_line += data
-        lines = self.partial_line.split("\n")
-        
-        # Precompile an ANSI escape code regex
-        ansi_regex = re.compile(r'\x1b\[[0-9;]*m')
-        
-        skip_display = False  # Flag to track if we're in a banner section
-        
-        for line in lines[:-1]:
-            # Remove ANSI codes for filtering purposes only.
-            clean_line = ansi_regex.sub('', line).strip()
-            
-            # --- Filter header lines ---
-            if self.collecting_users:
-                self.user_list_buffer.append(line)
-                if "are here with you." in clean_line:
-                    self.update_chat_members(self.user_list_buffer)
-                    self.collecting_users = False
-                    self.user_list_buffer = []
-                    skip_display = False  # End of banner section
-                    continue
-                skip_display = True  # Skip displaying banner content
-                continue
-            
-            if clean_line.startswith("You are in"):
-                self.user_list_buffer = [line]
-                self.collecting_users = True
-                skip_display = True  # Start of banner section
-                continue
-            
-            # Skip displaying banner-related lines
-            if any(pattern in clean_line for pattern in [
-                "Topic:",
-                "Just press",
-                "are here with you"
-            ]):
-                continue
-                
-            # --- Process directed messages ---
-            directed_msg_match = re.match(r'^From\s+(\S+)\s+\((whispered|to you)\):\s*(.+)$', clean_line, re.IGNORECASE)
-            if directed_msg_match:
-                sender, msg_type, message = directed_msg_match.groups()
-                self.append_directed_message(f"From {sender}: {message}\n")
-                self.play_ding_sound()
-                # Save to chatlog and check for hyperlinks
-                timestamp = time.strftime("[%Y-%m-%d %H:%M:%S] ")
-                self.save_chatlog_message(sender, timestamp + line)
-                self.parse_and_store_hyperlinks(message, sender)
-                # Display directed messages in the main terminal as well
-                self.append_terminal_text(line + "\n", "normal")
-                continue
-            
-            # --- Detect and update Action List ---
-            if clean_line.startswith("Action listing for:"):
-                self.actions = []
-                self.collecting_actions = True
-                # Immediately send Enter keystroke when we start collecting actions
-                if self.connected and self.writer:
-                    self.writer.write("\r\n")
-                    self.loop.call_soon_threadsafe(self.writer.drain)
-                continue
-            if clean_line == ":" and self.collecting_actions:
-                self.collecting_actions = False
-                self.master.after_idle(self.update_actions_listbox)
-                continue
-            if self.collecting_actions:
-                self.actions.extend(clean_line.split())
-                continue
-            
-            # Only display the line if it's not part of the banner and not empty
-            if not skip_display and clean_line:
-                self.append_terminal_text(line + "\n", "normal")
-                self.check_triggers(line)
-                self.parse_and_save_chatlog_message(line)
-                if self.auto_login_enabled.get() or self.logon_automation_enabled.get():
-                    self.detect_logon_prompt(line)
-                
-                # Play ding sound for any message
-                if re.match(r'^From\s+\S+', clean_line, re.IGNORECASE):
-                    self.play_ding_sound()
-        
-        self.partial_line = lines[-1]
-
-    def detect_logon_prompt(self, line):
-        """Simple triggers to automate login if toggles are on."""
-        lower_line = line.lower()
-        # Typical BBS prompts
-        if "enter your password:" in lower_line:
-            self.master.after(500, self.send_password)
-        elif "type it in and press enter" in lower_line or 'otherwise type "new":' in lower_line:
-            self.master.after(500, self.send_username)
-
-    def parse_and_save_chatlog_message(self, line):
-        """Parse and save chat messages with timestamps."""
-        # Remove any ANSI escape sequences
-        clean_line = re.sub(r'\x1b\[[0-9;]*m', '', line)
-        
-        # Skip system messages and banner info
-        skip_patterns = [
-            r"You are in",
-            r"Topic:",
-            r"Just press",
-            r"are here with you",
-            r"^\s*$",  # Empty lines
-            r"^\s*:.*$",  # Lines starting with colon (commands)
-            r"^\s*\(.*\)\s*$"  # Lines containing only parenthetical content
-        ]
-        
-        if any(re.search(pattern, clean_line, re.IGNORECASE) for pattern in skip_patterns):
             return
+        finally:
+            # Draw everything this drain produced as one frame
+            self.flush_render()
 
-        # Enhanced patterns to match different message types
-        message_patterns = [
-            # Whispered messages - check these first
-            r'^From\s+(\S+?)(?:@[\w.]+)?\s*\(whispered(?:\s+to\s+\S+)?\):\s*(.+)$',
-            # Normal messages
-            r'^From\s+(\S+?)(?:@[\w.]+)?(?:\s+\([^)]+\))?\s*:\s*(.+)$',
-            # Directed messages (to someone)
-            r'^From\s+(\S+?)(?:@[\w.]+)?\s*\(to\s+[^)]+\):\s*(.+)$'
-        ]
-
-        for pattern in message_patterns:
-            message_match = re.match(pattern, clean_line, re.IGNORECASE)
-            if message_match:
-                sender = message_match.group(1)
-                message = message_match.group(2)
-                
-                # Add timestamp if not present
-                if not clean_line.strip().startswith('['):
-                    clean_line = time.strftime("[%Y-%m-%d %H:%M:%S] ") + clean_line
-
-                # Save to chatlog
-                self.save_chatlog_message(sender, clean_line)
-                # Extract any URLs (pass sender for attribution)
-                self.parse_and_store_hyperlinks(clean_line, sender)
-                break
+        # Budget spent with data still queued: let Tk handle input and redraw
+        # before the next slice
+        with tab.drain_lock:
+            if tab.drain_scheduled:
+                return
+            tab.drain_scheduled = True
+            if self.perf.enabled:
+                tab.queued_at = time.perf_counter()
+        self.master.after(1, self.process_incoming_messages, tab)
 
     def send_message(self, event=None):
         """Send the user's typed message to the BBS."""
-        if not self.connected or not self.writer:
+        if not self.session.connected:
             self.append_terminal_text("Not connected to any BBS.\n", "normal")
             return
 
@@ -894,66 +4030,30 @@ class BBSTerminalApp:
             prefix = "Gos " if self.mud_mode.get() else ""
             message = prefix + user_input + "\r\n"
             
-        # Send message using asyncio.run_coroutine_threadsafe
-        if self.connected and self.writer:
-            async def send():
-                try:
-                    self.writer.write(message)
-                    await self.writer.drain()
-                except Exception as e:
-                    print(f"Error sending message: {e}")
-                    
-            asyncio.run_coroutine_threadsafe(send(), self.loop)
+        # Hand the message to the network thread
+        self.session.send(message)
 
     def send_username(self):
         """Send the username to the BBS."""
-        if self.connected and self.writer:
-            message = self.username.get() + "\r\n"
-            self.writer.write(message)
-            try:
-                self.loop.call_soon_threadsafe(self.writer.drain)
-                if self.remember_username.get():
-                    self.save_username()
-            except Exception as e:
-                print(f"Error sending username: {e}")
+        if self.session.connected:
+            self.session.send_line(self.username.get())
+            if self.remember_username.get():
+                self.save_username()
 
     def send_password(self):
         """Send the password to the BBS."""
-        if self.connected and self.writer:
-            message = self.password.get() + "\r\n"
-            self.writer.write(message)
-            try:
-                self.loop.call_soon_threadsafe(self.writer.drain)
-                if self.remember_password.get():
-                    self.save_password()
-            except Exception as e:
-                print(f"Error sending password: {e}")
-
-    def check_triggers(self, message):
-        """Check incoming messages for triggers and send automated response if matched."""
-        # Loop through the triggers array
-        for trigger_obj in self.triggers:
-            # Perform a case-insensitive check if the trigger text exists in the message
-            if trigger_obj['trigger'] and trigger_obj['trigger'].lower() in message.lower():
-                # Send the associated response
-                self.send_custom_message(trigger_obj['response'])
-
-    def send_custom_message(self, message):
-        """Send a custom message (for trigger responses)."""
-        if self.connected and self.writer:
-            message = message + "\r\n"
-            async def send():
-                try:
-                    self.writer.write(message)
-                    await self.writer.drain()
-                except Exception as e:
-                    print(f"Error sending custom message: {e}")
-                    
-            asyncio.run_coroutine_threadsafe(send(), self.loop)
+        if self.session.connected:
+            self.session.send_line(self.password.get())
+            if self.remember_password.get():
+                self.save_password()
+
+    def send_custom_message(self, message, delay=0):
+        """Send a custom message (for trigger responses), optionally after a delay."""
+        self.session.send_line(message, delay)
 
     def send_action(self, action):
         """Send an action to the BBS, optionally appending the highlighted username."""
-        if not self.connected or not self.writer:
+        if not self.session.connected:
             return
             
         selected_indices = self.members_listbox.curselection()
@@ -961,47 +4061,29 @@ class BBSTerminalApp:
             username = self.members_listbox.get(selected_indices[0])
             action = f"{action} {username}"
             
-        message = action + "\r\n"
-        async def send():
-            try:
-                self.writer.write(message)
-                await self.writer.drain()
-                # Deselect the action after sending
-                self.actions_listbox.selection_clear(0, tk.END)
-                self.members_listbox.selection_clear(0, tk.END)
-            except Exception as e:
-                print(f"Error sending action: {e}")
-                
-        asyncio.run_coroutine_threadsafe(send(), self.loop)
+        self.session.send_line(action)
+        # Deselect the action after sending
+        self.actions_listbox.selection_clear(0, tk.END)
+        self.members_listbox.selection_clear(0, tk.END)
 
     # 1.7️⃣ KEEP-ALIVE
-    async def keep_alive(self):
-        """Send an <ENTER> keystroke every 10 seconds."""
-        while not self.keep_alive_stop_event.is_set():
-            if self.connected and self.writer:
-                self.writer.write("\r\n")
-                await self.writer.drain()
-            await asyncio.sleep(60)
-
     def start_keep_alive(self):
-        """Start the keep-alive coroutine if enabled."""
+        """Start the session's keep-alive if enabled."""
         if self.keep_alive_enabled.get():
-            self.keep_alive_stop_event.clear()
-            if self.loop:
-                self.keep_alive_task = self.loop.create_task(self.keep_alive())
+            self.session.start_keep_alive()
 
     def stop_keep_alive(self):
-        """Stop the keep-alive coroutine."""
-        self.keep_alive_stop_event.set()
-        if self.keep_alive_task:
-            self.keep_alive_task.cancel()
+        """Stop the session's keep-alive."""
+        self.session.stop_keep_alive()
 
     def toggle_keep_alive(self):
-        """Toggle the keep-alive coroutine based on the checkbox state."""
-        if self.keep_alive_enabled.get():
-            self.start_keep_alive()
-        else:
-            self.stop_keep_alive()
+        """Toggle the keep-alive of every connected session based on the checkbox state."""
+        for tab in self.tabs:
+            if self.keep_alive_enabled.get():
+                if tab.session.connected:
+                    tab.session.start_keep_alive()
+            else:
+                tab.session.stop_keep_alive()
 
     # 1.8️⃣ FAVORITES
     def show_favorites_window(self):
@@ -1062,47 +4144,37 @@ class BBSTerminalApp:
             self.host.set(address)
 
     def load_favorites(self):
-        if os.path.exists("favorites.json"):
-            with open("favorites.json", "r") as file:
-                return json.load(file)
-        return []
+        return self.state.load("favorites.json", [])
 
     def save_favorites(self):
-        with open("favorites.json", "w") as file:
-            json.dump(self.favorites, file)
+        self.state.save("favorites.json", self.favorites)
 
     # 1.9️⃣ LOCAL STORAGE FOR USER/PASS
     def load_username(self):
-        if os.path.exists("username.json"):
-            with open("username.json", "r") as file:
-                return json.load(file)
-        return ""
+        return self.state.load("username.json", "")
 
     def save_username(self):
-        with open("username.json", "w") as file:
-            json.dump(self.username.get(), file)
+        self.state.save("username.json", self.username.get())
 
     def load_password(self):
-        if os.path.exists("password.json"):
-            with open("password.json", "r") as file:
-                return json.load(file)
-        return ""
+        return self.state.load("password.json", "")
 
     def save_password(self):
-        with open("password.json", "w") as file:
-            json.dump(self.password.get(), file)
+        self.state.save("password.json", self.password.get())
+
+    def load_scrollback_lines(self):
+        return self.state.load("scrollback.json", SCROLLBACK_LINES)
+
+    def save_scrollback_lines(self, max_lines):
+        self.state.save("scrollback.json", max_lines)
 
     def load_triggers(self):
         """Load triggers from a local file or initialize an empty list."""
-        if os.path.exists("triggers.json"):
-            with open("triggers.json", "r") as file:
-                return json.load(file)
-        return []
+        return load_triggers_file(self.state)
 
     def save_triggers_to_file(self):
         """Save triggers to a local file."""
-        with open("triggers.json", "w") as file:
-            json.dump(self.triggers, file)
+        self.state.save("triggers.json", self.triggers)
 
     def show_triggers_window(self):
         """Open a Toplevel window to manage triggers."""
@@ -1111,6 +4183,9 @@ class BBSTerminalApp:
             self.triggers_window.attributes('-topmost', True)
             return
 
+        # Edits apply to a copy until Save, so closing the window discards them
+        self.trigger_edits = [dict(trigger) for trigger in self.triggers]
+
         self.triggers_window = tk.Toplevel(self.master)
         self.triggers_window.title("Automation Triggers")
         self.triggers_window.attributes('-topmost', True)  # Keep window on top
@@ -1118,95 +4193,174 @@ class BBSTerminalApp:
         row_index = 0
         triggers_frame = ttk.Frame(self.triggers_window)
         triggers_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        triggers_frame.columnconfigure(1, weight=1)
+        triggers_frame.rowconfigure(0, weight=1)
+
+        self.triggers_listbox = tk.Listbox(triggers_frame, height=12, width=70, exportselection=False)
+        self.triggers_listbox.grid(row=row_index, column=0, columnspan=4, padx=5, pady=5, sticky="nsew")
+        triggers_scrollbar = ttk.Scrollbar(triggers_frame, command=self.triggers_listbox.yview)
+        triggers_scrollbar.grid(row=row_index, column=4, sticky="ns", pady=5)
+        self.triggers_listbox.configure(yscrollcommand=triggers_scrollbar.set)
+        self.triggers_listbox.bind("<<ListboxSelect>>", self.populate_trigger_fields)
+
+        self.trigger_var = tk.StringVar()
+        self.response_var = tk.StringVar()
+        self.trigger_regex_var = tk.BooleanVar(value=False)
+        self.trigger_cooldown_var = tk.DoubleVar(value=TRIGGER_DEFAULT_COOLDOWN)
+        self.trigger_delay_var = tk.DoubleVar(value=0)
 
-        self.trigger_vars = []
-        self.response_vars = []
+        row_index += 1
+        ttk.Label(triggers_frame, text="Trigger:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(triggers_frame, textvariable=self.trigger_var, width=40).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.EW)
+        ttk.Checkbutton(triggers_frame, text="Regex", variable=self.trigger_regex_var).grid(row=row_index, column=2, padx=5, pady=5, sticky=tk.W)
+
+        row_index += 1
+        ttk.Label(triggers_frame, text="Response:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
+        ttk.Entry(triggers_frame, textvariable=self.response_var, width=40).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.EW)
+
+        row_index += 1
+        timing_frame = ttk.Frame(triggers_frame)
+        timing_frame.grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
+        ttk.Label(timing_frame, text="Cooldown (s):").pack(side=tk.LEFT)
+        ttk.Spinbox(timing_frame, from_=0, to=3600, increment=1, textvariable=self.trigger_cooldown_var, width=6).pack(side=tk.LEFT, padx=(2, 10))
+        ttk.Label(timing_frame, text="Delay (s):").pack(side=tk.LEFT)
+        ttk.Spinbox(timing_frame, from_=0, to=600, increment=0.5, textvariable=self.trigger_delay_var, width=6).pack(side=tk.LEFT, padx=2)
 
-        for i in range(10):
-            ttk.Label(triggers_frame, text=f"Trigger {i+1}:").grid(row=row_index, column=0, padx=5, pady=5, sticky=tk.E)
-            trigger_var = tk.StringVar(value=self.triggers[i]['trigger'] if i < len(self.triggers) else "")
-            response_var = tk.StringVar(value=self.triggers[i]['response'] if i < len(self.triggers) else "")
-            self.trigger_vars.append(trigger_var)
-            self.response_vars.append(response_var)
-            ttk.Entry(triggers_frame, textvariable=trigger_var, width=30).grid(row=row_index, column=1, padx=5, pady=5, sticky=tk.W)
-            ttk.Entry(triggers_frame, textvariable=response_var, width=30).grid(row=row_index, column=2, padx=5, pady=5, sticky=tk.W)
-            row_index += 1
+        row_index += 1
+        buttons_frame = ttk.Frame(triggers_frame)
+        buttons_frame.grid(row=row_index, column=0, columnspan=4, pady=10)
+        ttk.Button(buttons_frame, text="Add", command=self.add_trigger).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Update", command=self.update_trigger).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Remove", command=self.remove_trigger).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Save", command=self.save_triggers).pack(side=tk.LEFT, padx=5)
+
+        self.update_triggers_listbox()
+
+    def update_triggers_listbox(self):
+        self.triggers_listbox.delete(0, tk.END)
+        for trigger in self.trigger_edits:
+            kind = "regex" if trigger.get('regex') else "text"
+            self.triggers_listbox.insert(tk.END, f"[{kind}] {trigger['trigger']}  ->  {trigger['response']}")
+
+    def populate_trigger_fields(self, event):
+        selected_index = self.triggers_listbox.curselection()
+        if selected_index:
+            trigger = self.trigger_edits[selected_index[0]]
+            self.trigger_var.set(trigger['trigger'])
+            self.response_var.set(trigger['response'])
+            self.trigger_regex_var.set(bool(trigger.get('regex')))
+            self.trigger_cooldown_var.set(trigger.get('cooldown', TRIGGER_DEFAULT_COOLDOWN))
+            self.trigger_delay_var.set(trigger.get('delay', 0))
+
+    def trigger_from_fields(self):
+        """Build a trigger dict from the editor fields, or None if it is incomplete or invalid."""
+        text = self.trigger_var.get().strip()
+        response = self.response_var.get().strip()
+        if not text or not response:
+            return None
+        if self.trigger_regex_var.get():
+            try:
+                re.compile(text)
+            except re.error as e:
+                tk.messagebox.showerror("Invalid Pattern", f"{text}\n\n{e}", parent=self.triggers_window)
+                return None
+        try:
+            cooldown = max(0.0, float(self.trigger_cooldown_var.get()))
+            delay = max(0.0, float(self.trigger_delay_var.get()))
+        except (tk.TclError, ValueError):
+            cooldown, delay = TRIGGER_DEFAULT_COOLDOWN, 0.0
+        return {
+            'trigger': text,
+            'response': response,
+            'regex': self.trigger_regex_var.get(),
+            'cooldown': cooldown,
+            'delay': delay
+        }
 
-        save_button = ttk.Button(triggers_frame, text="Save", command=self.save_triggers)
-        save_button.grid(row=row_index, column=0, columnspan=3, pady=10)
+    def add_trigger(self):
+        trigger = self.trigger_from_fields()
+        if trigger:
+            self.trigger_edits.append(trigger)
+            self.update_triggers_listbox()
+            self.trigger_var.set("")
+            self.response_var.set("")
+
+    def update_trigger(self):
+        selected_index = self.triggers_listbox.curselection()
+        trigger = self.trigger_from_fields()
+        if selected_index and trigger:
+            self.trigger_edits[selected_index[0]] = trigger
+            self.update_triggers_listbox()
+
+    def remove_trigger(self):
+        selected_index = self.triggers_listbox.curselection()
+        if selected_index:
+            del self.trigger_edits[selected_index[0]]
+            self.update_triggers_listbox()
 
     def save_triggers(self):
-        """Save triggers from the triggers window."""
-        self.triggers = []
-        for trigger_var, response_var in zip(self.trigger_vars, self.response_vars):
-            self.triggers.append({
-                'trigger': trigger_var.get().strip(),
-                'response': response_var.get().strip()
-            })
+        """Save triggers from the triggers window and recompile the engine."""
+        self.triggers = self.trigger_edits
+        for tab in self.tabs:
+            tab.session.set_triggers(self.triggers)
         self.save_triggers_to_file()
         self.triggers_window.destroy()
 
     def append_terminal_text(self, text, default_tag="normal"):
-        """Append text to the terminal display with optional ANSI parsing."""
-        self.terminal_display.configure(state=tk.NORMAL)
-        self.parse_ansi_and_insert(text)
-        self.terminal_display.see(tk.END)
-        self.master.update_idletasks()  # Force update to ensure proper display
-        self.terminal_display.configure(state=tk.DISABLED)
-
-    def parse_ansi_and_insert(self, text_data):
-        """Minimal parser for ANSI color codes (foreground only)."""
-        ansi_escape_regex = re.compile(r'\x1b\[(.*?)m')
-        url_regex = re.compile(r'(https?://\S+)')
-        last_end = 0
-        current_tag = "normal"
-
-        for match in ansi_escape_regex.finditer(text_data):
-            start, end = match.span()
-            if start > last_end:
-                segment = text_data[last_end:start]
-                self.insert_with_hyperlinks(segment, current_tag)
-            code_string = match.group(1)
-            codes = code_string.split(';')
-            if '0' in codes:
-                current_tag = "normal"
-                codes.remove('0')
-
-            for c in codes:
-                mapped_tag = self.map_code_to_tag(c)
-                if mapped_tag:
-                    current_tag = mapped_tag
-            last_end = end
-
-        if last_end < len(text_data):
-            segment = text_data[last_end:]
-            self.insert_with_hyperlinks(segment, current_tag)
-
-    def insert_with_hyperlinks(self, text, tag):
-        """Insert text with hyperlinks detected and tagged."""
-        url_regex = re.compile(r'(https?://\S+)')
+        """Queue local status text for the terminal display; it is drawn on the next frame."""
+        self.insert_with_hyperlinks(text, default_tag)
+        self.terminal_batch.lines += text.count("\n")
+        self.schedule_render()
+
+    def schedule_render(self):
+        """Make sure queued text is drawn once Tk is idle, even outside a queue drain."""
+        if not self.render_flush_pending:
+            self.render_flush_pending = True
+            self.master.after_idle(self.flush_render)
+
+    def flush_render(self):
+        """Insert all queued terminal and directed-message text in one batch per pane."""
+        self.render_flush_pending = False
+        start = time.perf_counter()
+        lines = self.terminal_batch.flush() + self.directed_batch.flush()
+        if lines:
+            self.render_stats['lines'] += lines
+            self.render_stats['frames'] += 1
+            self.render_stats['seconds'] += time.perf_counter() - start
+            if self.perf.enabled:
+                self.perf.record("render", start)
+                self.perf.count("rendered_lines", lines)
+
+    def render_lines_per_second(self):
+        """Lines drawn per second of Tk insert time, to compare with RENDER_TARGET_LINES_PER_SEC."""
+        seconds = self.render_stats['seconds']
+        return self.render_stats['lines'] / seconds if seconds else 0.0
+
+    def append_terminal_line(self, parsed):
+        """Queue one parsed line with its ANSI attributes for the terminal display."""
+        attrs = self.session.ansi_parser.attrs
+        for text, attr_id in parsed.runs:
+            self.insert_with_hyperlinks(text, self.ansi_tags.tag_for(attrs[attr_id]))
+        self.terminal_batch.add("\n", "normal")
+        self.terminal_batch.lines += 1
+        self.schedule_render()
+
+    def insert_with_hyperlinks(self, text, tag, batch=None):
+        """Queue text with hyperlinks detected and tagged."""
+        batch = batch or self.terminal_batch
         last_end = 0
-        for match in url_regex.finditer(text):
+        for match in URL_REGEX.finditer(text):
             start, end = match.span()
             if start > last_end:
-                self.terminal_display.insert(tk.END, text[last_end:start], tag)
-            self.terminal_display.insert(tk.END, text[start:end], ("hyperlink", tag))
+                batch.add(text[last_end:start], tag)
+            batch.add(text[start:end], ("hyperlink", tag))
             last_end = end
         if last_end < len(text):
-            self.terminal_display.insert(tk.END, text[last_end:], tag)
+            batch.add(text[last_end:], tag)
 
     def insert_directed_message_with_hyperlinks(self, text, tag):
-        """Insert directed message text with hyperlinks detected and tagged."""
-        url_regex = re.compile(r'(https?://\S+)')
-        last_end = 0
-        for match in url_regex.finditer(text):
-            start, end = match.span()
-            if start > last_end:
-                self.directed_msg_display.insert(tk.END, text[last_end:start], tag)
-            self.directed_msg_display.insert(tk.END, text[start:end], ("hyperlink", tag))
-            last_end = end
-        if last_end < len(text):
-            self.directed_msg_display.insert(tk.END, text[last_end:], tag)
+        """Queue directed message text with hyperlinks detected and tagged."""
+        self.insert_with_hyperlinks(text, tag, self.directed_batch)
 
     def open_hyperlink(self, event):
         """Open the hyperlink in a web browser."""
@@ -1253,10 +4407,18 @@ class BBSTerminalApp:
         self.show_thumbnail(url, event)
 
     def show_thumbnail(self, url, event):
-        """Display a thumbnail preview near the mouse pointer."""
-        if self.preview_window is not None:
-            self.preview_window.destroy()
+        """Display a thumbnail preview near the mouse pointer once the hover settles."""
+        self.hide_thumbnail_preview(event)
+        preview = self.preview_cache.cached(url)
+        if preview is not None:
+            self.open_preview(url, preview)
+            return
+        # Sweeping the pointer across links should not fetch each of them
+        self.preview_after = self.master.after(PREVIEW_HOVER_DELAY_MS, self.open_preview, url)
 
+    def open_preview(self, url, preview=None):
+        """Open the preview window, fetching the preview on the pool if it isn't cached."""
+        self.preview_after = None
         self.preview_window = tk.Toplevel(self.master)
         self.preview_window.overrideredirect(True)
         self.preview_window.attributes("-topmost", True)
@@ -1269,109 +4431,51 @@ class BBSTerminalApp:
         label = tk.Label(self.preview_window, text="Loading preview...", background="white")
         label.pack()
 
-        # Start a new thread to fetch the preview
-        threading.Thread(target=self._fetch_preview, args=(url, label), daemon=True).start()
+        if preview is not None:
+            self.display_preview(label, preview)
+            return
+        self.preview_future = self.preview_fetcher.submit(url)
+        self.preview_future.add_done_callback(functools.partial(self.preview_fetched, label))
 
-    def _fetch_preview(self, url, label):
-        """Fetch either an image thumbnail or website favicon."""
+    def preview_fetched(self, label, future):
+        """Called on a pool thread; hands the preview to the Tk thread."""
+        if future.cancelled() or future.exception() is not None:
+            return
         try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            # Check if URL is directly an image
-            if any(url.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif']):
-                response = requests.get(url, headers=headers, timeout=5)
-                response.raise_for_status()
-                self._handle_image_preview(response.content, label, is_gif=url.lower().endswith('.gif'))
-            else:
-                # Try to get webpage first to check for proper image content type
-                response = requests.get(url, headers=headers, timeout=5)
-                content_type = response.headers.get("Content-Type", "").lower()
-                
-                if "image" in content_type:
-                    self._handle_image_preview(response.content, label, is_gif='gif' in content_type)
-                else:
-                    self._handle_website_preview(url, label)
-
-        except Exception as e:
-            print(f"DEBUG: Preview error: {e}")
-            def update_label_error():
+            self.master.after(0, self.display_preview, label, future.result())
+        except RuntimeError:
+            pass  # The app closed while the preview was loading
+
+    def display_preview(self, label, preview):
+        """Show a cached preview in the label; animations cycle through their frames."""
+        # A label from a preview the pointer has since left no longer exists
+        if not self.preview_window or not label.winfo_exists():
+            return
+        if not preview.frames:
+            label.config(text=preview.caption)
+            return
+        # PhotoImages belong to the Tk thread, so they are made here, not by the fetcher
+        photos = [ImageTk.PhotoImage(frame) for frame in preview.frames]
+        label.config(image=photos[0], text=preview.caption, compound="top" if preview.caption else "none")
+        label.image = photos[0]  # Keep reference
+        if len(photos) > 1:
+            def animate(frame_index=1):
                 if self.preview_window and label.winfo_exists():
-                    label.config(text="Preview not available")
-            self.master.after(0, update_label_error)
-
-    def _handle_image_preview(self, image_data, label, is_gif=False):
-        """Handle preview for image content, including GIFs."""
-        try:
-            image = Image.open(BytesIO(image_data))
-            
-            if is_gif and getattr(image, "is_animated", False):
-                # Handle animated GIF
-                frames = []
-                try:
-                    while True:
-                        frame = image.copy()
-                        frame.thumbnail((200, 150))
-                        frames.append(ImageTk.PhotoImage(frame))
-                        image.seek(len(frames))
-                except EOFError:
-                    pass
-                
-                if frames:
-                    def animate(frame_index=0):
-                        if self.preview_window and label.winfo_exists():
-                            label.config(image=frames[frame_index])
-                            label.image = frames[frame_index]  # Keep reference
-                            next_frame = (frame_index + 1) % len(frames)
-                            self.master.after(100, lambda: animate(next_frame))
-                    
-                    self.master.after(0, animate)
-                    return
-            else:
-                # Handle static image
-                image.thumbnail((200, 150))
-                photo = ImageTk.PhotoImage(image)
-                
-                def update_label():
-                    if self.preview_window and label.winfo_exists():
-                        label.config(image=photo, text="")
-                        label.image = photo
-                self.master.after(0, update_label)
-        except Exception as e:
-            print(f"Image preview error: {e}")
+                    label.config(image=photos[frame_index])
+                    label.image = photos[frame_index]
+                    next_frame = (frame_index + 1) % len(photos)
+                    self.master.after(preview.durations[frame_index] or 100, animate, next_frame)
 
-    def _handle_website_preview(self, url, label):
-        """Handle preview for website content by showing favicon."""
-        try:
-            # Parse the URL to get the base domain
-            from urllib.parse import urlparse
-            parsed_url = urlparse(url)
-            favicon_url = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
-            
-            # Try to get the favicon
-            response = requests.get(favicon_url, timeout=5)
-            if response.status_code == 200:
-                image = Image.open(BytesIO(response.content))
-                # Resize favicon to reasonable size
-                image = image.resize((32, 32), Image.Resampling.LANCZOS)
-                photo = ImageTk.PhotoImage(image)
-
-                def update_label():
-                    if self.preview_window and label.winfo_exists():
-                        label.config(image=photo, text=parsed_url.netloc)
-                        label.image = photo
-                self.master.after(0, update_label)
-            else:
-                raise Exception("Favicon not found")
-        except Exception as e:
-            print(f"Favicon preview error: {e}")
-            # Show domain name if favicon fails
-            parsed_url = urlparse(url)
-            def update_label():
-                if self.preview_window and label.winfo_exists():
-                    label.config(text=parsed_url.netloc)
-            self.master.after(0, update_label)
+            self.master.after(preview.durations[0] or 100, animate)
 
     def hide_thumbnail_preview(self, event):
-        """Hide the thumbnail preview."""
+        """Hide the thumbnail preview, dropping a pending hover or queued fetch."""
+        if self.preview_after is not None:
+            self.master.after_cancel(self.preview_after)
+            self.preview_after = None
+        if self.preview_future is not None:
+            self.preview_future.cancel()
+            self.preview_future = None
         if self.preview_window:
             self.preview_window.destroy()
             self.preview_window = None
@@ -1380,15 +4484,10 @@ class BBSTerminalApp:
         """Attempt to load a thumbnail image from an image URL.
            Returns a PhotoImage if successful, otherwise None.
         """
-        if any(url.lower().endswith(ext) for ext in [".jpg", ".jpeg", ".png", ".gif"]):
-            try:
-                response = requests.get(url, timeout=5)
-                image_data = response.content
-                image = Image.open(BytesIO(image_data))
-                image.thumbnail((200, 200))  # Set thumbnail size as needed.
-                return ImageTk.PhotoImage(image)
-            except Exception as e:
-                print("Error loading thumbnail:", e)
+        if url.lower().endswith(PREVIEW_IMAGE_EXTENSIONS):
+            preview = self.preview_cache.get(url)
+            if preview.frames:
+                return ImageTk.PhotoImage(preview.frames[0])
         return None
 
     def show_preview(self, event, url):
@@ -1411,87 +4510,23 @@ class BBSTerminalApp:
             self.preview_window.destroy()
             self.preview_window = None
 
-    def map_code_to_tag(self, color_code):
-        """Map numeric color code to a defined Tk tag."""
-        valid_codes = {
-            '30': 'black',
-            '31': 'red',
-            '32': 'green',
-            '33': 'yellow',
-            '34': 'blue',
-            '35': 'magenta',
-            '36': 'cyan',
-            '37': 'white',
-            '90': 'bright_black',
-            '91': 'bright_red',
-            '92': 'bright_green',
-            '93': 'bright_yellow',
-            '94': 'bright_blue',
-            '95': 'bright_magenta',
-            '96': 'bright_cyan',
-            '97': 'bright_white',
-        }
-        return valid_codes.get(color_code, None)
-
-    def save_chatlog_message(self, username, message):
-        """Save a message to the chatlog."""
-        chatlog = self.load_chatlog()
-        if username not in chatlog:
-            chatlog[username] = []
-        chatlog[username].append(message)
-
-        # Check if chatlog exceeds 1GB and trim if necessary
-        chatlog_size = len(json.dumps(chatlog).encode('utf-8'))
-        if chatlog_size > 1 * 1024 * 1024 * 1024:  # 1GB
-            self.trim_chatlog(chatlog)
-
-        self.save_chatlog(chatlog)
-
-    def load_chatlog(self):
-        """Load chatlog from a local file or initialize an empty dictionary."""
-        if os.path.exists("chatlog.json"):
-            with open("chatlog.json", "r") as file:
-                return json.load(file)
-        return {}
-
-    def save_chatlog(self, chatlog):
-        """Save chatlog to a local file."""
-        with open("chatlog.json", "w") as file:
-            json.dump(chatlog, file)
-
-    def trim_chatlog(self, chatlog):
-        """Trim the chatlog to fit within the size limit."""
-        usernames = list(chatlog.keys())
-        while len(json.dumps(chatlog).encode('utf-8')) > 1 * 1024 * 1024 * 1024:  # 1GB
-            for username in usernames:
-                if chatlog[username]:
-                    chatlog[username].pop(0)  # Remove the oldest message
-                    if len(json.dumps(chatlog).encode('utf-8')) <= 1 * 1024 * 1024 * 1024:
-                        break
-
     def clear_chatlog_for_user(self, username):
         """Clear all chatlog messages for the specified username."""
-        chatlog = self.load_chatlog()
-        if username in chatlog:
-            chatlog[username] = []  # Reset the messages list
-            self.save_chatlog(chatlog)
+        self.chatlog_store.clear_user(username)
 
     def clear_active_chatlog(self):
-        """Clear chatlog messages for the currently selected user in the listbox."""
-        selected_index = self.chatlog_listbox.curselection()
-        if selected_index:
-            username = self.chatlog_listbox.get(selected_index)
-            self.clear_chatlog_for_user(username)
+        """Clear chatlog messages for every user selected in the listbox."""
+        usernames = [self.chatlog_listbox.get(i) for i in self.chatlog_listbox.curselection()]
+        if usernames:
+            for username in usernames:
+                self.clear_chatlog_for_user(username)
             self.display_chatlog_messages(None)  # Refresh the display
 
     def load_panel_sizes(self):
         """Load saved panel sizes from file."""
-        try:
-            if os.path.exists("panel_sizes.json"):
-                with open("panel_sizes.json", "r") as file:
-                    return json.load(file)
-        except Exception as e:
-            print(f"Error loading panel sizes: {e}")
+        sizes = self.state.load("panel_sizes.json")
+        if sizes:
+            return sizes
         return {
             "users": 150,  # 15 chars * ~10 pixels per char
             "links": 300,  # 30 chars * ~10 pixels per char
@@ -1513,11 +4548,85 @@ class BBSTerminalApp:
                 "links": paned.winfo_width() - sash_pos2
             }
             
-            with open("panel_sizes.json", "w") as file:
-                json.dump(sizes, file)
+            self.state.save("panel_sizes.json", sizes)
         except Exception as e:
             print(f"Error saving panel sizes: {e}")
 
+    def toggle_performance_panel(self):
+        """Show or hide the performance panel; timers only run while it is shown."""
+        if self.show_performance.get():
+            self.show_performance_window()
+        else:
+            self.close_performance_window()
+
+    def show_performance_window(self):
+        """Open a window with live throughput, queue depths and per-stage latencies."""
+        if self.performance_window and self.performance_window.winfo_exists():
+            self.performance_window.lift()
+            return
+        self.perf.reset()
+        self.perf.enabled = True
+
+        self.performance_window = tk.Toplevel(self.master)
+        self.performance_window.title("Performance")
+        self.performance_window.geometry("620x380")
+        self.performance_window.protocol("WM_DELETE_WINDOW", self.close_performance_window)
+
+        self.performance_display = tk.Text(self.performance_window, wrap=tk.NONE, font=("Courier New", 10),
+                                           state=tk.DISABLED, height=18)
+        self.performance_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        button_frame = ttk.Frame(self.performance_window)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Reset", command=self.perf.reset).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Export JSON", command=self.export_performance).pack(side=tk.LEFT, padx=5)
+
+        self.refresh_performance_window()
+
+    def close_performance_window(self):
+        self.perf.enabled = False
+        self.show_performance.set(False)
+        if self.performance_window and self.performance_window.winfo_exists():
+            self.performance_window.destroy()
+        self.performance_window = None
+
+    def refresh_performance_window(self):
+        """Redraw the performance panel from a fresh snapshot, once per PERF_REFRESH_MS."""
+        if not (self.performance_window and self.performance_window.winfo_exists()):
+            return
+        snapshot = self.perf.snapshot()
+        rates = snapshot['rates']
+        gauges = snapshot['gauges']
+        text = [
+            f"Lines/sec    {rates.get('lines', 0):>12,.0f}     Rendered/sec {rates.get('rendered_lines', 0):>12,.0f}",
+            f"Bytes/sec    {rates.get('bytes', 0):>12,.0f}     Sessions     {gauges.get('sessions', 0):>12}",
+            f"Inbound      {gauges.get('inbound_bytes', 0):>12,} B   Outbound     {gauges.get('outbound_lines', 0):>12} lines",
+            "",
+            f"{'Stage':<15}{'Samples':>10}{'p50 ms':>11}{'p99 ms':>11}{'max ms':>11}",
+        ]
+        for name, stage in snapshot['stages'].items():
+            text.append(f"{name:<15}{stage['samples']:>10}{stage['p50_ms']:>11.3f}"
+                        f"{stage['p99_ms']:>11.3f}{stage['max_ms']:>11.3f}")
+        text.append("")
+        text.append(f"Percentiles cover the last {PERF_WINDOW / 2:g}-{PERF_WINDOW:g} seconds.")
+
+        self.performance_display.configure(state=tk.NORMAL)
+        self.performance_display.delete("1.0", tk.END)
+        self.performance_display.insert(tk.END, "\n".join(text))
+        self.performance_display.configure(state=tk.DISABLED)
+        self.performance_window.after(PERF_REFRESH_MS, self.refresh_performance_window)
+
+    def export_performance(self):
+        """Save a performance snapshot as JSON."""
+        path = filedialog.asksaveasfilename(
+            parent=self.performance_window, title="Export Performance", defaultextension=".json",
+            initialfile=time.strftime("perf-%Y%m%d-%H%M%S.json"), filetypes=[("JSON", "*.json")])
+        if path:
+            try:
+                self.perf.export(path)
+            except OSError as e:
+                print(f"Error exporting performance snapshot: {e}")
+
     def show_chatlog_window(self):
         """Open a Toplevel window to manage chatlog and hyperlinks."""
         if self.chatlog_window and self.chatlog_window.winfo_exists():
@@ -1549,11 +4658,42 @@ class BBSTerminalApp:
         main_frame = ttk.Frame(self.chatlog_window)
         main_frame.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+
+        # Search bar with sender, date range and message type filters
+        search_frame = ttk.Frame(main_frame)
+        search_frame.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        search_frame.columnconfigure(1, weight=1)
+
+        self.chatlog_search_var = tk.StringVar()
+        self.chatlog_search_sender = tk.StringVar()
+        self.chatlog_search_since = tk.StringVar()
+        self.chatlog_search_until = tk.StringVar()
+        self.chatlog_search_kind = tk.StringVar(value="All")
+        self.chatlog_search_before_id = None
+
+        ttk.Label(search_frame, text="Search:").grid(row=0, column=0, padx=5, sticky=tk.E)
+        search_entry = ttk.Entry(search_frame, textvariable=self.chatlog_search_var)
+        search_entry.grid(row=0, column=1, padx=5, sticky="ew")
+        search_entry.bind("<Return>", lambda e: self.run_chatlog_search())
+        self.create_context_menu(search_entry)
+        ttk.Label(search_frame, text="Sender:").grid(row=0, column=2, padx=5, sticky=tk.E)
+        self.chatlog_sender_combo = ttk.Combobox(search_frame, textvariable=self.chatlog_search_sender, width=15)
+        self.chatlog_sender_combo.grid(row=0, column=3, padx=5)
+        ttk.Label(search_frame, text="From (YYYY-MM-DD):").grid(row=0, column=4, padx=5, sticky=tk.E)
+        ttk.Entry(search_frame, textvariable=self.chatlog_search_since, width=11).grid(row=0, column=5, padx=5)
+        ttk.Label(search_frame, text="To:").grid(row=0, column=6, padx=5, sticky=tk.E)
+        ttk.Entry(search_frame, textvariable=self.chatlog_search_until, width=11).grid(row=0, column=7, padx=5)
+        ttk.Combobox(search_frame, textvariable=self.chatlog_search_kind, width=10, state="readonly",
+                     values=list(CHATLOG_SEARCH_KINDS.keys())).grid(row=0, column=8, padx=5)
+        ttk.Button(search_frame, text="Search", command=self.run_chatlog_search).grid(row=0, column=9, padx=5)
+        self.chatlog_more_button = ttk.Button(search_frame, text="Older Results", state=tk.DISABLED,
+                                              command=lambda: self.run_chatlog_search(more=True))
+        self.chatlog_more_button.grid(row=0, column=10, padx=5)
 
         # Create paned window with users/messages/links panels
         paned = ttk.PanedWindow(main_frame, orient=tk.HORIZONTAL, name="main_paned")
-        paned.grid(row=0, column=0, sticky="nsew")
+        paned.grid(row=1, column=0, sticky="nsew")
 
         # Users panel
         users_frame = ttk.Frame(paned, width=panel_sizes["users"])
@@ -1562,7 +4702,7 @@ class BBSTerminalApp:
         users_frame.rowconfigure(1, weight=1)
         
         ttk.Label(users_frame, text="Users").grid(row=0, column=0, sticky="w")
-        self.chatlog_listbox = tk.Listbox(users_frame, height=10, **chatlog_font_settings)
+        self.chatlog_listbox = tk.Listbox(users_frame, height=10, selectmode=tk.EXTENDED, **chatlog_font_settings)
         self.chatlog_listbox.grid(row=1, column=0, sticky="nsew")
         users_scrollbar = ttk.Scrollbar(users_frame, command=self.chatlog_listbox.yview)
         users_scrollbar.grid(row=1, column=1, sticky="ns")
@@ -1582,7 +4722,10 @@ class BBSTerminalApp:
         self.chatlog_display.grid(row=1, column=0, sticky="nsew")
         messages_scrollbar = ttk.Scrollbar(messages_frame, command=self.chatlog_display.yview)
         messages_scrollbar.grid(row=1, column=1, sticky="ns")
-        self.chatlog_display.configure(yscrollcommand=messages_scrollbar.set)
+        self.chatlog_display.configure(
+            yscrollcommand=lambda first, last: (messages_scrollbar.set(first, last),
+                                                self.on_chatlog_scroll(first, last)))
+        self.chatlog_view = None
         
         paned.add(messages_frame)
 
@@ -1627,11 +4770,12 @@ class BBSTerminalApp:
 
         # Buttons frame at bottom
         buttons_frame = ttk.Frame(main_frame)
-        buttons_frame.grid(row=1, column=0, sticky="ew", pady=5)
+        buttons_frame.grid(row=2, column=0, sticky="ew", pady=5)
         
         ttk.Button(buttons_frame, text="Clear Chat", command=self.confirm_clear_chatlog).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Clear Links", command=self.confirm_clear_links).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Show All", command=self.show_all_messages).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Jump to Latest", command=self.display_chatlog_messages).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Close", command=self.chatlog_window.destroy).pack(side=tk.RIGHT, padx=5)
         ttk.Button(buttons_frame, text="Change Font", command=self.show_change_font_window).pack(side=tk.RIGHT, padx=5)  # New button for changing font and colors
 
@@ -1840,8 +4984,7 @@ class BBSTerminalApp:
                 'fg': self.current_selections['color'],
                 'bg': self.current_selections['bg']
             }
-            with open("font_settings.json", "w") as file:
-                json.dump(settings_to_save, file)
+            self.state.save("font_settings.json", settings_to_save)
             
             window.destroy()
         except Exception as e:
@@ -1849,13 +4992,12 @@ class BBSTerminalApp:
 
     def confirm_clear_chatlog(self):
         """Show confirmation dialog before clearing chatlog."""
-        selected_index = self.chatlog_listbox.curselection()
-        if not selected_index:
+        usernames = [self.chatlog_listbox.get(i) for i in self.chatlog_listbox.curselection()]
+        if not usernames:
             return
             
-        username = self.chatlog_listbox.get(selected_index)
         if tk.messagebox.askyesno("Confirm Clear", 
-                                 f"Are you sure you want to clear the chatlog for {username}?",
+                                 f"Are you sure you want to clear the chatlog for {', '.join(usernames)}?",
                                  icon='warning'):
             self.clear_active_chatlog()
 
@@ -1867,166 +5009,168 @@ class BBSTerminalApp:
             self.clear_links_history()
 
     def load_chatlog_list(self):
-        """Load chatlog from a local file and populate the listbox."""
-        chatlog = self.load_chatlog()
+        """Load chatlog users from the store and populate the listbox."""
+        usernames = self.chatlog_store.usernames()
         self.chatlog_listbox.delete(0, tk.END)
-        for username in chatlog.keys():
+        for username in usernames:
             self.chatlog_listbox.insert(tk.END, username)
+        self.chatlog_sender_combo.configure(values=[""] + usernames)
 
     def display_chatlog_messages(self, event=None):
-        """Display messages for the selected user or all messages if no user is selected."""
-        chatlog = self.load_chatlog()
+        """Display the newest page for the selected users, or for everyone if no user is selected.
+
+        Only a window of at most CHATLOG_VIEW_MAX_ROWS rows is rendered; older
+        and newer pages are fetched from the store as the view is scrolled.
+        Selecting several users shows their merged timeline.
+        """
+        usernames = [self.chatlog_listbox.get(i) for i in self.chatlog_listbox.curselection()]
+        username = usernames[0] if len(usernames) == 1 else (usernames or None)
+        rows = self.chatlog_store.page(username)
+        self.chatlog_view = {
+            'username': username,
+            'keys': deque((ts, row_id) for ts, row_id, message in rows),
+            'has_older': len(rows) == CHATLOG_VIEW_PAGE_SIZE,
+            'has_newer': False,
+            'loading': False,
+        }
+
         self.chatlog_display.configure(state=tk.NORMAL)
         self.chatlog_display.delete(1.0, tk.END)
-        
-        if event is None or not self.chatlog_listbox.curselection():
-            # Show all messages combined chronologically
-            all_messages = []
-            for username, messages in chatlog.items():
-                all_messages.extend(messages)
-            
-            # Sort by timestamp
-            def get_timestamp(msg):
-                match = re.match(r'\[(.*?)\]', msg)
-                return match.group(1) if match else "0"
-            all_messages.sort(key=get_timestamp)
-            
-            for message in all_messages:
-                self.chatlog_display.insert(tk.END, message + "\n")
-        else:
-            # Show messages for selected user
-            selected_index = self.chatlog_listbox.curselection()
-            username = self.chatlog_listbox.get(selected_index)
-            messages = chatlog.get(username, [])
-            messages.sort(key=lambda x: re.match(r'\[(.*?)\]', x).group(1) if re.match(r'\[(.*?)\]', x) else "0")
-            for message in messages:
-                self.chatlog_display.insert(tk.END, message + "\n")
-        
+        self.chatlog_display.insert(tk.END, "".join(message + "\n" for ts, row_id, message in rows))
         self.chatlog_display.configure(state=tk.DISABLED)
         self.chatlog_display.see(tk.END)
 
-    def update_members_display(self):
-        """Update the chat members Listbox with the current chat_members set."""
-        self.members_listbox.delete(0, tk.END)
-        for member in sorted(self.chat_members):
-            self.members_listbox.insert(tk.END, member)
-
-    def update_chat_members(self, lines_with_users):
-        """Update the chat members based on the provided lines."""
-        combined = " ".join(lines_with_users)
-        combined_clean = re.sub(r'\x1b\[[0-9;]*m', '', combined)
-        print(f"[DEBUG] Raw banner: {combined_clean}")
-        
-        # Extract all usernames from the banner
-        user_section = ""
-        if "You are in" in combined_clean and "are here with you" in combined_clean:
-            # Extract everything between "Topic:" and "are here with you"
-            match = re.search(r'Topic:.*?(?=\s+are here with you\.)', combined_clean, re.DOTALL)
-            if match:
-                user_section = match.group(0)
-                # Remove the Topic line and any parenthetical content
-                user_section = re.sub(r'Topic:.*?\n', '\n', user_section, flags=re.DOTALL)
-                user_section = re.sub(r'\(.*?\)', '', user_section)
-        
-        # Get all usernames including the last one
-        final_usernames = set()
-        
-        # First, get all the comma-separated usernames
-        usernames = re.findall(r'([A-Za-z][A-Za-z0-9._]+)@?[\w.]*(?:,|\s+and\s+|$)', user_section)
-        
-        # Process each username
-        for username in usernames:
-            username = username.strip()
-            if (len(username) >= 2 and 
-                username.lower() not in {'in', 'the', 'chat', 'general', 'channel', 'topic', 'majorlink'} and
-                re.match(r'^[A-Za-z][A-Za-z0-9._]*$', username)):
-                final_usernames.add(username)
-        
-        # Also check for any remaining "and Username" pattern
-        last_user_match = re.search(r'and\s+([A-Za-z][A-Za-z0-9._]+)\s+are here', combined_clean)
-        if last_user_match:
-            final_usernames.add(last_user_match.group(1))
-
-        print(f"[DEBUG] Extracted usernames: {final_usernames}")
-        self.chat_members = final_usernames
-
-        # Update last seen timestamps
-        current_time = int(time.time())
-        for member in self.chat_members:
-            self.last_seen[member.lower()] = current_time
-        self.save_last_seen_file()
-
-        # Save the chat members to file
-        self.save_chat_members_file()
-
-        # Refresh the members display panel
-        self.update_members_display()
-
-    def load_chat_members_file(self):
-        """Load chat members from chat_members.json, or return an empty set if not found."""
-        if os.path.exists("chat_members.json"):
-            with open("chat_members.json", "r") as file:
-                try:
-                    return set(json.load(file))
-                except Exception as e:
-                    print(f"[DEBUG] Error loading chat members file: {e}")
-                    return set()
-        return set()
+    def on_chatlog_scroll(self, first, last):
+        """Fetch the neighbouring page when the viewer is scrolled near either end."""
+        view = self.chatlog_view
+        if not view or view['loading']:
+            return
+        if float(first) <= 0.05 and view['has_older']:
+            view['loading'] = True
+            self.chatlog_display.after_idle(self.load_older_chatlog_page)
+        elif float(last) >= 0.95 and view['has_newer']:
+            view['loading'] = True
+            self.chatlog_display.after_idle(self.load_newer_chatlog_page)
+
+    def load_older_chatlog_page(self):
+        """Prepend the page before the first rendered row, dropping rows off the bottom."""
+        view = self.chatlog_view
+        if not view:
+            return
+        try:
+            rows = self.chatlog_store.page(view['username'], before=view['keys'][0]) if view['keys'] else []
+            view['has_older'] = len(rows) == CHATLOG_VIEW_PAGE_SIZE
+            if not rows:
+                return
+            self.chatlog_display.configure(state=tk.NORMAL)
+            self.chatlog_display.insert("1.0", "".join(message + "\n" for ts, row_id, message in rows))
+            view['keys'].extendleft((ts, row_id) for ts, row_id, message in reversed(rows))
+            excess = len(view['keys']) - CHATLOG_VIEW_MAX_ROWS
+            if excess > 0:
+                self.chatlog_display.delete(f"end-{excess + 1}l linestart", "end-1c")
+                for _ in range(excess):
+                    view['keys'].pop()
+                view['has_newer'] = True
+            self.chatlog_display.configure(state=tk.DISABLED)
+            # Keep the row that was at the top in place
+            self.chatlog_display.yview(f"{len(rows) + 1}.0")
+        finally:
+            view['loading'] = False
 
-    def save_chat_members_file(self):
-        """Save the current chat members set to chat_members.json."""
+    def load_newer_chatlog_page(self):
+        """Append the page after the last rendered row, dropping rows off the top."""
+        view = self.chatlog_view
+        if not view:
+            return
         try:
-            with open("chat_members.json", "w") as file:
-                json.dump(list(self.chat_members), file)
-        except Exception as e:
-            print(f"[DEBUG] Error saving chat members file: {e}")
+            rows = self.chatlog_store.page(view['username'], after=view['keys'][-1]) if view['keys'] else []
+            view['has_newer'] = len(rows) == CHATLOG_VIEW_PAGE_SIZE
+            if not rows:
+                return
+            self.chatlog_display.configure(state=tk.NORMAL)
+            self.chatlog_display.insert("end-1c", "".join(message + "\n" for ts, row_id, message in rows))
+            view['keys'].extend((ts, row_id) for ts, row_id, message in rows)
+            excess = len(view['keys']) - CHATLOG_VIEW_MAX_ROWS
+            if excess > 0:
+                self.chatlog_display.delete("1.0", f"{excess + 1}.0")
+                for _ in range(excess):
+                    view['keys'].popleft()
+                view['has_older'] = True
+                self.chatlog_display.yview(f"{max(1, len(view['keys']) - len(rows) - 10)}.0")
+            self.chatlog_display.configure(state=tk.DISABLED)
+        finally:
+            view['loading'] = False
+
+    def parse_search_date(self, value, end_of_day=False):
+        """Convert a YYYY-MM-DD filter to epoch seconds (None when blank)."""
+        value = value.strip()
+        if not value:
+            return None
+        ts = time.mktime(time.strptime(value, "%Y-%m-%d"))
+        return ts + 86400 if end_of_day else ts
+
+    def run_chatlog_search(self, more=False):
+        """Search the chatlog with the current filters and show a page of results."""
+        try:
+            since = self.parse_search_date(self.chatlog_search_since.get())
+            until = self.parse_search_date(self.chatlog_search_until.get(), end_of_day=True)
+        except ValueError:
+            tk.messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format")
+            return
 
-    def load_last_seen_file(self):
-        """Load last seen timestamps from last_seen.json, or return an empty dictionary if not found."""
-        if os.path.exists("last_seen.json"):
-            with open("last_seen.json", "r") as file:
-                try:
-                    return json.load(file)
-                except Exception as e:
-                    print(f"[DEBUG] Error loading last seen file: {e}")
-                    return {}
-        return {}
+        if not more:
+            self.chatlog_search_before_id = None
+        self.chatlog_view = None  # search results replace the paged timeline
+        results = self.chatlog_store.search(
+            self.chatlog_search_var.get(),
+            sender=self.chatlog_search_sender.get().strip() or None,
+            since=since,
+            until=until,
+            kind=CHATLOG_SEARCH_KINDS.get(self.chatlog_search_kind.get()),
+            before_id=self.chatlog_search_before_id)
 
-    def save_last_seen_file(self):
-        """Save the current last seen timestamps to last_seen.json."""
-        try:
-            with open("last_seen.json", "w") as file:
-                json.dump(self.last_seen, file)
-        except Exception as e:
-            print(f"[DEBUG] Error saving last seen file: {e}")
+        self.chatlog_display.configure(state=tk.NORMAL)
+        if not more:
+            self.chatlog_display.delete(1.0, tk.END)
+            if not results:
+                self.chatlog_display.insert(tk.END, "No matching messages.\n")
+        for row_id, username, ts, kind, message in results:
+            self.chatlog_display.insert(tk.END, message + "\n")
+        self.chatlog_display.configure(state=tk.DISABLED)
+        if not more:
+            self.chatlog_display.see(1.0)
 
-    def refresh_chat_members(self):
-        """Periodically refresh the chat members list."""
-        self.update_members_display()
-        self.master.after(5000, self.refresh_chat_members)
+        if results:
+            self.chatlog_search_before_id = results[-1][0]
+        more_state = tk.NORMAL if len(results) == CHATLOG_SEARCH_PAGE_SIZE else tk.DISABLED
+        self.chatlog_more_button.configure(state=more_state)
+
+    def update_members_display(self):
+        """Update the chat members Listbox, redrawing only when the members changed."""
+        members = sorted(self.session.chat_members)
+        if members == self.displayed_members:
+            return
+        self.displayed_members = members
+        self.members_listbox.delete(0, tk.END)
+        if members:
+            self.members_listbox.insert(tk.END, *members)
 
     def append_directed_message(self, text):
         """Append text to the directed messages display with a timestamp."""
         timestamp = time.strftime("[%Y-%m-%d %H:%M:%S] ")
-        self.directed_msg_display.configure(state=tk.NORMAL)
         self.insert_directed_message_with_hyperlinks(timestamp + text + "\n", "normal")
-        self.directed_msg_display.see(tk.END)
-        self.directed_msg_display.configure(state=tk.DISABLED)
+        self.directed_batch.lines += 1
+        self.schedule_render()
 
     def play_ding_sound(self):
         """Play a standard ding sound effect."""
-        winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
-
-    async def _send_message(self, message):
-        """Async helper method to send messages."""
-        if self.connected and self.writer:
-            self.writer.write(message)
-            await self.writer.drain()
+        if winsound:
+            winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
 
     def update_actions_listbox(self):
         """Update the Actions listbox with the current actions."""
         self.actions_listbox.delete(0, tk.END)
-        for action in self.actions:
+        for action in self.session.actions:
             self.actions_listbox.insert(tk.END, action)
 
     def on_action_select(self, event):
@@ -2040,69 +5184,64 @@ class BBSTerminalApp:
             
             # Format and send the action command
             action_command = f"{action} {username}"
-            if self.connected and self.writer:
-                asyncio.run_coroutine_threadsafe(
-                    self._send_message(action_command + "\r\n"), 
-                    self.loop
-                )
+            if self.session.connected:
+                self.session.send_line(action_command)
                 
                 # Deselect the action after sending
                 self.actions_listbox.selection_clear(0, tk.END)
                 self.members_listbox.selection_clear(0, tk.END)
 
-    def store_hyperlink(self, url, sender="Unknown", timestamp=None):
-        """Store a hyperlink with metadata."""
-        if timestamp is None:
-            timestamp = time.strftime("[%Y-%m-%d %H:%M:%S]")
-        
-        links = self.load_links_history()
-        links.append({
-            "url": url,
-            "sender": sender,
-            "timestamp": timestamp
-        })
-        self.save_links_history(links)
-        
-        # Update links display if window is open
-        if self.chatlog_window and self.chatlog_window.winfo_exists():
-            self.display_stored_links()
-
-    def load_links_history(self):
-        """Load stored hyperlinks from file."""
-        if os.path.exists("hyperlinks.json"):
-            with open("hyperlinks.json", "r") as file:
-                return json.load(file)
-        return []
-
-    def save_links_history(self, links):
-        """Save hyperlinks to file."""
-        with open("hyperlinks.json", "w") as file:
-            json.dump(links, file)
-
     def clear_links_history(self):
         """Clear all stored hyperlinks."""
-        self.save_links_history([])
+        self.chatlog_store.links.clear()
         if self.chatlog_window and self.chatlog_window.winfo_exists():
             self.display_stored_links()
 
     def display_stored_links(self):
-        """Display stored hyperlinks in the links panel."""
+        """Display the most recent stored hyperlinks in the links panel."""
         if not hasattr(self, 'links_display'):
             return
 
         self.links_display.configure(state=tk.NORMAL)
         self.links_display.delete(1.0, tk.END)
-        
-        links = self.load_links_history()
-        for link in links:
-            timestamp = link.get("timestamp", "")
-            sender = link.get("sender", "Unknown")
-            url = link.get("url", "")
-            
-            self.links_display.insert(tk.END, f"{timestamp} from {sender}:\n")
-            self.links_display.insert(tk.END, f"{url}\n\n", "hyperlink")
-        
+        for mark in self.links_display.mark_names():
+            if mark.startswith("link"):
+                self.links_display.mark_unset(mark)
+        self.links_shown = deque()
         self.links_display.configure(state=tk.DISABLED)
+        self.add_links_to_panel(self.chatlog_store.links.recent())
+
+    def link_header(self, link):
+        timestamp = time.strftime("[%Y-%m-%d %H:%M:%S]", time.localtime(link.last_seen))
+        sender = link.sender or "Unknown"
+        count = f" ({link.count}x)" if link.count > 1 else ""
+        return f"{timestamp} from {sender}{count}:"
+
+    def add_links_to_panel(self, links):
+        """Append new links to the links panel and update the header of repeated ones.
+
+        Each entry starts at a "link<id>" mark, so a repeated link only has
+        its header line rewritten; the oldest entries are dropped past
+        LINKS_VIEW_LIMIT.
+        """
+        display = self.links_display
+        display.configure(state=tk.NORMAL)
+        for link in links:
+            mark = f"link{link.id}"
+            if mark in display.mark_names():
+                display.delete(mark, f"{mark} lineend")
+                display.insert(mark, self.link_header(link))
+                continue
+            display.mark_set(mark, "end-1c")
+            display.mark_gravity(mark, tk.LEFT)
+            display.insert(tk.END, self.link_header(link) + "\n")
+            display.insert(tk.END, f"{link.url}\n\n", "hyperlink")
+            self.links_shown.append(mark)
+            if len(self.links_shown) > LINKS_VIEW_LIMIT:
+                oldest = self.links_shown.popleft()
+                display.delete("1.0", self.links_shown[0])
+                display.mark_unset(oldest)
+        display.configure(state=tk.DISABLED)
 
     def open_chatlog_hyperlink(self, event):
         """Handle clicking a hyperlink in the chatlog links panel."""
@@ -2126,34 +5265,6 @@ class BBSTerminalApp:
                 self.show_thumbnail(url, event)
                 break
 
-    def parse_and_store_hyperlinks(self, message, sender=None):
-        """Extract and store hyperlinks from a message."""
-        # More comprehensive URL pattern
-        url_pattern = re.compile(r'(https?://[^\s<>"\']+|www\.[^\s<>"\']+)')
-        
-        # Extract all URLs from the message
-        urls = url_pattern.findall(message)
-        
-        # Add debug output to see raw message
-        print(f"[DEBUG] Raw message: {message}")
-        print(f"[DEBUG] Found URLs: {urls}")
-        
-        # Clean URLs (remove trailing punctuation)
-        cleaned_urls = []
-        for url in urls:
-            # Remove trailing punctuation that might have been caught
-            url = re.sub(r'[.,;:]+$', '', url)
-            # Add http:// to www. urls
-            if url.startswith('www.'):
-                url = 'http://' + url
-            cleaned_urls.append(url)
-        
-        timestamp = time.strftime("[%Y-%m-%d %H:%M:%S]")
-        
-        for url in cleaned_urls:
-            print(f"[DEBUG] Storing URL: {url} from {sender}")  # Debug line
-            self.store_hyperlink(url, sender, timestamp)
-
     def show_all_messages(self):
         """Deselect user and show all messages combined."""
         self.chatlog_listbox.selection_clear(0, tk.END)
@@ -2161,12 +5272,9 @@ class BBSTerminalApp:
 
     def load_font_settings(self):
         """Load font settings from a local file or return defaults."""
-        try:
-            if os.path.exists("font_settings.json"):
-                with open("font_settings.json", "r") as file:
-                    return json.load(file)
-        except Exception as e:
-            print(f"Error loading font settings: {e}")
+        settings = self.state.load("font_settings.json")
+        if settings:
+            return settings
         return {
             'font_name': "Courier New",
             'font_size': 10,
@@ -2175,76 +5283,162 @@ class BBSTerminalApp:
         }
 
     def delete_selected_user(self):
-        """Delete the selected user from the chatlog and users list."""
+        """Delete the selected users from the chatlog and users list."""
         selected = self.chatlog_listbox.curselection()
         if not selected:
             return
             
-        username = self.chatlog_listbox.get(selected)
+        usernames = [self.chatlog_listbox.get(i) for i in selected]
         if tk.messagebox.askyesno("Confirm Delete", 
-                                 f"Are you sure you want to delete {username} and their chat logs?",
+                                 f"Are you sure you want to delete {', '.join(usernames)} and their chat logs?",
                                  icon='warning'):
             # Remove from chatlog
-            chatlog = self.load_chatlog()
-            if username in chatlog:
-                del chatlog[username]
-                self.save_chatlog(chatlog)
+            for username in usernames:
+                self.chatlog_store.delete_user(username)
             
-            # Remove from listbox
-            self.chatlog_listbox.delete(selected)
+            # Remove from listbox, last first so the indices stay valid
+            for index in reversed(selected):
+                self.chatlog_listbox.delete(index)
             
             # Show all messages after deletion
             self.display_chatlog_messages(None)
 
-    def on_scroll_change(self, *args):
-        """Custom scrollbar handler to ensure bottom line visibility."""
-        self.terminal_display.yview_moveto(args[0])
-        if float(args[1]) == 1.0:  # If scrolled to bottom
-            self.master.update_idletasks()
-            self.terminal_display.see(tk.END)
+
+def run_headless(host, port, username=None, password=None, quiet=False,
+                 record_path=None, replay_path=None, speed=1.0, perf_path=None):
+    """Run one session without a display: log lines, answer triggers, keep the chatlog.
+
+    With replay_path the session is fed from a recording instead of host:port,
+    which makes a repeatable benchmark when speed is 0.  A replay writes its
+    chatlog to a fresh database in a temporary directory and never writes the
+    JSON state, so every run does the same work and the user's history is
+    left alone.  With perf_path the per-stage latencies are measured and
+    written there as JSON on exit.
+    """
+    scratch = tempfile.TemporaryDirectory(prefix="bbs-replay-") if replay_path else None
+    if scratch:
+        chatlog_store = ChatlogStore(os.path.join(scratch.name, CHATLOG_DB_FILE),
+                                     legacy_path=None, legacy_links_path=None)
+    else:
+        chatlog_store = ChatlogStore()
+    retention = ChatlogRetention(
+        chatlog_store,
+        max_bytes=int(chatlog_store.get_meta('max_bytes', CHATLOG_MAX_BYTES)),
+        max_age_days=int(chatlog_store.get_meta('max_age_days', 0)))
+    retention.start()
+    network = NetworkService()
+    network.start()
+
+    # Replays read the saved triggers and members but never start the writer
+    state = JsonStateStore()
+    if not scratch:
+        state.start()
+
+    perf = PerfMonitor()
+    perf.enabled = perf_path is not None
+    session = BBSSession(network, chatlog_store, retention, state=state, perf=perf)
+    perf.add_gauge("outbound_lines", lambda: session.outbound.depth)
+    session.set_triggers(load_triggers_file(state))
+    if username and password:
+        session.username = username
+        session.password = password
+        session.logon_automation = True
+
+    def log(event):
+        if isinstance(event, TerminalLine):
+            if not quiet:
+                print(event.parsed.text)
+        elif isinstance(event, DirectedMessage):
+            print(f"[to you] From {event.sender}: {event.message}", file=sys.stderr)
+
+    session.subscribe(log)
+    start = time.perf_counter()
+    try:
+        if replay_path:
+            session.replay(replay_path, speed, persist=True).result()
+        else:
+            session.connect(host, port, record_path).result()
+    except KeyboardInterrupt:
+        if session.connected:
+            network.schedule(session.close()).result(timeout=5.0)
+    finally:
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        network.stop()
+        if not scratch:
+            state.stop()
+        retention.stop()
+        chatlog_store.close()
+        if scratch:
+            scratch.cleanup()
+        print(f"{session.lines_parsed} lines, {session.bytes_received} bytes in {elapsed:.1f}s "
+              f"({session.lines_parsed / elapsed:,.0f} lines/s)", file=sys.stderr)
+        if perf_path:
+            # No earlier snapshot, so the rates cover the whole run
+            perf.export(perf_path)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Retro BBS Terminal")
+    parser.add_argument("--headless", nargs=2, metavar=("HOST", "PORT"),
+                        help="connect without a UI, logging to stdout")
+    parser.add_argument("--username", help="answer the logon prompt (headless)")
+    parser.add_argument("--password", help="answer the password prompt (headless)")
+    parser.add_argument("--quiet", action="store_true", help="do not echo received lines (headless)")
+    parser.add_argument("--record", metavar="FILE", help="record received data to FILE (headless)")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play a recording without a UI or network instead of connecting")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed multiplier; 0 plays as fast as possible (default 1)")
+    parser.add_argument("--perf", metavar="FILE",
+                        help="measure per-stage latencies and write them to FILE as JSON on exit (headless)")
+    args = parser.parse_args()
+
+    if args.replay:
+        run_headless(None, None, quiet=args.quiet, replay_path=args.replay, speed=args.speed,
+                     perf_path=args.perf)
+        return
+    if args.headless:
+        host, port = args.headless
+        run_headless(host, int(port), args.username, args.password, args.quiet, record_path=args.record,
+                     perf_path=args.perf)
+        return
+
     root = tk.Tk()
     app = BBSTerminalApp(root)
     
-    async def cleanup():
-        """Async cleanup function to handle disconnection."""
-        try:
-            # Cancel all pending tasks first
-            for task in asyncio.all_tasks(app.loop):
-                task.cancel()
-            
-            # Clear only the active members list
-            app.clear_chat_members()
-            
-            # Then handle the disconnect
-            if app.connected:
-                await app.disconnect_from_bbs()
-                
-            # Finally close the loop
-            app.loop.stop()
-            app.loop.close()
-        except Exception as e:
-            print(f"Error during cleanup: {e}")
-
     def on_closing():
         """Handle window closing event."""
         try:
-            # Create a new event loop for cleanup
-            cleanup_loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(cleanup_loop)
-            
-            # Run cleanup synchronously with a timeout
-            cleanup_loop.run_until_complete(asyncio.wait_for(cleanup(), timeout=5.0))
-            cleanup_loop.close()
-        except (asyncio.TimeoutError, Exception) as e:
+            # Disconnect every session on the network thread, then stop it;
+            # closing a session also clears its active members list.  The Tk
+            # thread blocks on close(), so the sessions must stop calling it first
+            for tab in app.tabs:
+                tab.session.detach()
+            for tab in app.tabs:
+                if tab.session.connected:
+                    app.network.schedule(tab.session.close()).result(timeout=5.0)
+                else:
+                    tab.session.clear_members()
+        except Exception as e:
             print(f"Error or timeout during cleanup: {e}")
         finally:
-            # Force quit even if cleanup fails
             try:
-                root.quit()
+                app.network.stop()
+
+                app.preview_fetcher.shutdown()
+
+                # Write any settings and state still waiting for the debounce
+                app.state.stop()
+
+                # Stop retention, then flush and close the chatlog database
+                app.chatlog_retention.stop()
+                app.chatlog_store.close()
             finally:
-                root.destroy()
+                # Force quit even if cleanup fails
+                try:
+                    root.quit()
+                finally:
+                    root.destroy()
 
     # Bind the closing handler
     root.protocol("WM_DELETE_WINDOW", on_closing)